@@ -0,0 +1,84 @@
+# anchor_tracker.py
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import screen_utils
+from config import ANCHOR_SEARCH_MARGIN, GLOBAL_CONFIDENCE
+from screen_utils import Box, ImageSource
+from tracing import span
+from window_context import WindowLocal
+
+
+class AnchorTracker:
+    """
+    기준 이미지(post.png, inven.png 등)의 마지막 확인 위치를 기억합니다.
+    캐시된 위치 주변의 작은 영역만 다시 매칭해 보고, 실패했을 때만 전체 화면을 탐색합니다.
+    """
+
+    def __init__(self, search_margin: int = ANCHOR_SEARCH_MARGIN):
+        self.search_margin = search_margin
+        self.hits = 0
+        self.misses = 0
+        self._anchors: Dict[Path, Box] = {}
+        self._lock = threading.Lock()
+
+    def locate(self, image: ImageSource, confidence: float = GLOBAL_CONFIDENCE) -> Optional[Box]:
+        """기준 이미지의 현재 위치를 반환합니다. 찾지 못하면 None을 반환합니다."""
+        key = self._key(image)
+        with self._lock:
+            cached = self._anchors.get(key)
+
+        with span("anchor_lookup", "vision", image=key.name) as current:
+            if cached:
+                margin = self.search_margin
+                region = (cached.left - margin, cached.top - margin,
+                          cached.width + 2 * margin, cached.height + 2 * margin)
+                location = screen_utils.find_image_in_region(image, region, confidence)
+                if location:
+                    with self._lock:
+                        self.hits += 1
+                        self._anchors[key] = location
+                    return location
+
+            if current:
+                current.args["full_screen"] = True
+            location = screen_utils.find_image_on_screen(image, confidence)
+            with self._lock:
+                self.misses += 1
+                if location:
+                    self._anchors[key] = location
+                else:
+                    self._anchors.pop(key, None)
+            return location
+
+    def invalidate(self, image: Optional[ImageSource] = None):
+        """창을 옮긴 뒤처럼 위치가 바뀌었음을 알 때, 캐시된 위치(또는 전체)를 버립니다."""
+        with self._lock:
+            if image is None:
+                self._anchors.clear()
+            else:
+                self._anchors.pop(self._key(image), None)
+
+    def stats(self) -> Dict[str, int]:
+        """재검증 성공(hits)과 전체 탐색으로 넘어간 횟수(misses)를 반환합니다."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _key(image: ImageSource) -> Path:
+        return Path(getattr(image, "path", image))
+
+
+# 창마다 기준 이미지 위치가 다르므로, 여러 창을 동시에 조작할 때는 창별 트래커를 사용합니다.
+TRACKER: AnchorTracker = WindowLocal(AnchorTracker)
+
+
+def locate_anchor(image: ImageSource, confidence: float = GLOBAL_CONFIDENCE) -> Optional[Box]:
+    """공용 트래커로 기준 이미지의 위치를 찾습니다."""
+    return TRACKER.locate(image, confidence)
+
+
+def invalidate_anchor(image: Optional[ImageSource] = None):
+    """공용 트래커에서 기준 이미지의 캐시된 위치를 버립니다."""
+    TRACKER.invalidate(image)
@@ -0,0 +1,148 @@
+# benchmarks/multi_window_check.py
+"""
+여러 창 모드(multi_window)를 게임 없이 점검합니다.
+FakeWindowBackend로 게임 창 두 개를 흉내 내고, 두 창이 나란히 놓인 합성 화면을 ReplayCaptureBackend로 공급한 뒤
+run_receives와 run_deliveries를 실제 작업 스레드에서 동시에 실행합니다. 입력은 RecordingInputBackend에 기록해,
+모든 좌표 입력이 어느 한 창 안에 떨어지고 두 창 모두에 입력이 들어갔는지 확인합니다.
+화면은 바뀌지 않으므로 우편 받기는 정해진 시간 동안 같은 항목을 계속 받고, 배송은 첫 세트의 검증 단계에서 멈출 수 있습니다.
+이 점검은 창별 좌표 변환, 창별 상태 분리, 입력 순서만 확인합니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.multi_window_check
+    python -m benchmarks.multi_window_check --receive-seconds 6 --sets 2
+"""
+import argparse
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import config
+import input_dispatch
+import screen_capture
+import window_backend
+from benchmarks.synthetic_screens import synthesize_desktop
+from cancellation import CancellationToken
+from config import ASSETS_DIR, MULTI_WINDOW_CONFIG, POST_CONFIG, RECEIVE_CONFIG, WINDOW_TITLE
+from multi_window import MultiRunReport, MultiWindowOrchestrator
+from template_registry import get_template
+from window_backend import FakeWindowBackend, WindowInfo
+
+Region = Tuple[int, int, int, int]
+CLIENT_COUNT = 2
+
+
+def _paste(frame: np.ndarray, path, x: int, y: int):
+    template = get_template(path)
+    frame[y:y + template.height, x:x + template.width] = template.image
+
+
+def receive_tile(seed: int) -> np.ndarray:
+    """받을 항목 하나와 영수증 창이 떠 있는 우편 창 한 장(창 기준 좌표)을 그립니다."""
+    tile = synthesize_desktop(MULTI_WINDOW_CONFIG.client_width, MULTI_WINDOW_CONFIG.client_height, seed)
+    post_x, post_y = 300, 120
+    _paste(tile, POST_CONFIG.base_image_path, post_x, post_y)
+    _paste(tile, RECEIVE_CONFIG.payment_image_path,
+           post_x + RECEIVE_CONFIG.list_offset_x + 10, post_y + RECEIVE_CONFIG.list_offset_y + 10)
+    _paste(tile, RECEIVE_CONFIG.receipt_image_path, post_x + 450, post_y + 200)
+    return tile
+
+
+def delivery_tile(seed: int) -> np.ndarray:
+    """우편 창, 아이템이 든 인벤토리, 최종 확인 창이 떠 있는 화면 한 장(창 기준 좌표)을 그립니다."""
+    tile = synthesize_desktop(MULTI_WINDOW_CONFIG.client_width, MULTI_WINDOW_CONFIG.client_height, seed)
+    post_x, post_y = 100, 120
+    inven_x, inven_y = post_x + config.MIN_POST_INVEN_GAP + 55, 120
+    _paste(tile, POST_CONFIG.base_image_path, post_x, post_y)
+    _paste(tile, config.INVEN_CONFIG.base_image_path, inven_x, inven_y)
+    cider = get_template(config.INVEN_SCAN_TARGET_IMAGE_PATH)
+    cell_width = config.INVEN_CONFIG.grid_width // config.INVEN_CONFIG.grid_cols
+    cell_height = config.INVEN_CONFIG.grid_height // config.INVEN_CONFIG.grid_rows
+    grid_x = inven_x + config.INVEN_CONFIG.grid_offset_x
+    grid_y = inven_y + config.INVEN_CONFIG.grid_offset_y
+    for col in range(config.INVEN_CONFIG.grid_cols):
+        _paste(tile, config.INVEN_SCAN_TARGET_IMAGE_PATH, grid_x + col * cell_width + (cell_width - cider.width) // 2,
+               grid_y + (cell_height - cider.height) // 2)
+    _paste(tile, ASSETS_DIR / "send_check2.png", post_x + 250, post_y + 560)
+    return tile
+
+
+def desktop(tile) -> np.ndarray:
+    """창 CLIENT_COUNT개를 바둑판 배치 결과와 같은 위치에 나란히 놓은 화면을 만듭니다."""
+    return np.hstack([tile(seed) for seed in range(CLIENT_COUNT)])
+
+
+def client_regions() -> List[Region]:
+    width, height = MULTI_WINDOW_CONFIG.client_width, MULTI_WINDOW_CONFIG.client_height
+    return [(index * width, 0, width, height) for index in range(CLIENT_COUNT)]
+
+
+def check_inputs(recorder: input_dispatch.RecordingInputBackend, regions: List[Region]) -> List[str]:
+    """좌표 입력이 모두 어느 한 창 안에 있고, 모든 창에 입력이 들어갔는지 확인합니다."""
+    problems = []
+    hits: Dict[int, int] = {index: 0 for index in range(len(regions))}
+    for dispatched in recorder.events:
+        event = dispatched.event
+        if event.kind not in ("click", "move", "drag_to"):
+            continue
+        x, y = event.args[0], event.args[1]
+        owners = [index for index, (left, top, width, height) in enumerate(regions)
+                  if left <= x < left + width and top <= y < top + height]
+        if not owners:
+            problems.append(f"창 밖 입력: {event.kind} ({x}, {y})")
+        for index in owners:
+            hits[index] += 1
+    problems += [f"client-{index + 1}에 입력이 없습니다." for index, count in hits.items() if not count]
+    return problems
+
+
+def run_check(name: str, frame: np.ndarray, job, seconds: float) -> Tuple[MultiRunReport, List[str]]:
+    screen_capture.set_backend(screen_capture.ReplayCaptureBackend([frame]))
+    # 창은 일부러 겹쳐 둡니다. discover()가 바둑판으로 다시 배치해야 합성 화면과 위치가 맞습니다.
+    window_backend.set_backend(FakeWindowBackend([WindowInfo(100 + index, WINDOW_TITLE, 0, 0, 800, 600)
+                                                  for index in range(CLIENT_COUNT)]))
+    recorder = input_dispatch.RecordingInputBackend(realtime=False)
+    input_dispatch.set_backend(recorder)
+
+    orchestrator = MultiWindowOrchestrator()
+    try:
+        # 화면이 바뀌지 않으므로 작업이 스스로 끝나지 않을 수 있어, 시간 제한이 있는 토큰 아래에서 실행합니다.
+        with CancellationToken(name).child(seconds).activate():
+            report = job(orchestrator)
+    finally:
+        orchestrator.close()
+
+    problems = [f"{result.client}: {result.error}" for result in report.results if result.error]
+    if len(report.results) != CLIENT_COUNT:
+        problems.append(f"창 {CLIENT_COUNT}개 중 {len(report.results)}개에서만 실행되었습니다.")
+    problems += check_inputs(recorder, client_regions())
+    print(f"[{name}] 입력 {len(recorder.events)}개, 결과 {report.as_dict()}")
+    return report, problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="여러 창 모드 헤드리스 점검")
+    parser.add_argument("--receive-seconds", type=float, default=4.0, help="우편 받기를 실행할 시간")
+    parser.add_argument("--sets", type=int, default=2, help="창 전체에 나눠 보낼 배송 세트 수")
+    parser.add_argument("--delivery-seconds", type=float, default=30.0, help="배송 실행 시간 제한")
+    args = parser.parse_args()
+
+    problems = []
+    report, found = run_check("receive", desktop(receive_tile), lambda orchestrator: orchestrator.run_receives(),
+                              args.receive_seconds)
+    problems += found
+    problems += [f"{result.client}: 받은 우편이 없습니다." for result in report.results if not result.units]
+
+    _, found = run_check("delivery", desktop(delivery_tile),
+                         lambda orchestrator: orchestrator.run_deliveries(args.sets, "standard", "tester", "1"),
+                         args.delivery_seconds)
+    problems += found
+
+    for problem in problems:
+        print(f"문제: {problem}")
+    print("여러 창 점검 통과" if not problems else f"여러 창 점검 실패 ({len(problems)}건)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
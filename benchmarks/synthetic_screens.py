@@ -0,0 +1,17 @@
+# benchmarks/synthetic_screens.py
+"""게임 없이 벤치마크와 점검 스크립트를 실행하기 위한 합성 화면 생성기입니다."""
+import cv2
+import numpy as np
+
+
+def synthesize_desktop(width: int, height: int, seed: int) -> np.ndarray:
+    """흐린 노이즈 배경 위에 창처럼 보이는 사각형을 흩뿌린 가짜 데스크톱 프레임을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    for _ in range(40):
+        x, y = int(rng.integers(0, width - 50)), int(rng.integers(0, height - 50))
+        w, h = int(rng.integers(50, 400)), int(rng.integers(30, 300))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, thickness=-1)
+    return frame
@@ -0,0 +1,316 @@
+# benchmarks/vision_regression.py
+"""
+라벨이 붙은 스크린샷 코퍼스로 화면 인식 함수의 지연 시간과 정확도를 측정합니다.
+각 케이스는 프로세스 풀에서 병렬로 실행되며, 기준선(baseline) 대비 성능 저하 시 실패 코드를 반환합니다.
+
+코퍼스 (benchmarks/corpus/manifest.json):
+    {"cases": [{
+        "file": "post_open.png",             # manifest 기준 상대 경로
+        "state": "post",                     # post / inventory / shop / receipt 등 분류용
+        "anchors": {"post.png": [l, t, w, h], "inven.png": null},
+        "regions": [{"template": "payment.png", "region": [l, t, w, h], "box": [l, t, w, h] 또는 null}],
+        "grids": [{"config": "INVEN_CONFIG", "template": "cider.png", "occupied": [0, 1, 5]}],
+        "scroll": {"top": true, "bottom": false}
+    }]}
+    grids의 셀 좌표는 anchors에 라벨링된 기준 이미지 위치로부터 계산합니다.
+    frame_recorder가 저장한 실패 프레임에 라벨을 붙여 코퍼스에 추가하면 됩니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.vision_regression                        # 코퍼스 실행 (비어 있으면 합성 케이스)
+    python -m benchmarks.vision_regression --synthetic 40         # 합성 케이스로 실행
+합성 케이스는 inventory / post / shop / receipt 네 상태를 차례로 만듭니다.
+    python -m benchmarks.vision_regression --save-baseline base.json
+    python -m benchmarks.vision_regression --baseline base.json   # p90이 허용치를 넘으면 종료 코드 1
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from config import ASSETS_DIR, GLOBAL_CONFIDENCE, INVEN_CONFIG, INVEN_SCAN_TARGET_IMAGE_PATH
+
+CORPUS_MANIFEST = Path(__file__).parent / "corpus" / "manifest.json"
+BOX_TOLERANCE = 2
+# 코퍼스에 라벨이 붙은 케이스가 없을 때 대신 실행할 합성 케이스 수 (상태마다 10개)
+DEFAULT_SYNTHETIC_CASES = 40
+
+
+def _box_matches(actual, expected) -> bool:
+    if actual is None or expected is None:
+        return actual is None and expected is None
+    return all(abs(a - e) <= BOX_TOLERANCE for a, e in zip(actual, expected))
+
+
+def _grid_cells(window_config: config.WindowConfig, anchor: List[int]):
+    from grid_cell_utils import get_grid_cell_coords
+    left = anchor[0] + window_config.grid_offset_x
+    top = anchor[1] + window_config.grid_offset_y
+    return get_grid_cell_coords(left, top, left + window_config.grid_width, top + window_config.grid_height,
+                                window_config.grid_rows, window_config.grid_cols)
+
+
+def _paste(frame: np.ndarray, template, x: int, y: int) -> List[int]:
+    frame[y:y + template.height, x:x + template.width] = template.image
+    return [x, y, template.width, template.height]
+
+
+def _synthesize_inventory(frame: np.ndarray, rng: np.random.Generator, case: Dict):
+    """인벤토리 창(기준 이미지, 그리드, 스크롤 끝 표시)을 그립니다."""
+    from template_registry import get_template
+
+    inven = get_template(INVEN_CONFIG.base_image_path)
+    inven_x, inven_y = int(rng.integers(20, 900)), int(rng.integers(20, 300))
+    case["anchors"][inven.name] = _paste(frame, inven, inven_x, inven_y)
+
+    cider = get_template(INVEN_SCAN_TARGET_IMAGE_PATH)
+    cells = _grid_cells(INVEN_CONFIG, case["anchors"][inven.name])
+    # 실제 인벤토리처럼 어두운 빈 슬롯과 밝은 테두리로 그리드 영역을 칠합니다.
+    for left, top, width, height in cells:
+        frame[top:top + height, left:left + width] = (52, 46, 40)
+        frame[top:top + height, left:left + 1] = frame[top:top + 1, left:left + width] = (120, 110, 100)
+    occupied = sorted(int(i) for i in rng.choice(len(cells), size=int(rng.integers(0, 8)), replace=False))
+    for index in occupied:
+        left, top, width, height = cells[index]
+        _paste(frame, cider, left + int(rng.integers(2, width - cider.width - 1)),
+               top + int(rng.integers(2, height - cider.height - 1)))
+    case["grids"].append({"config": "INVEN_CONFIG", "template": cider.name, "occupied": occupied})
+
+    scroll_state = {}
+    for check, name, offset_y in (("top", "inventop.png", 50), ("bottom", "invenbot.png", 300)):
+        shown = bool(rng.integers(0, 2))
+        scroll_state[check] = shown
+        if shown:
+            _paste(frame, get_template(ASSETS_DIR / name), inven_x + 155 + 40, inven_y + offset_y + 30)
+    case["scroll"] = scroll_state
+
+
+def _synthesize_shop(frame: np.ndarray, rng: np.random.Generator, case: Dict):
+    """상점 화면: 시장 표시(market.png)와, 절반의 확률로 '더 살 수 없음' 창(nomore.png)을 그립니다."""
+    from template_registry import get_template
+
+    market = get_template(ASSETS_DIR / "market.png")
+    case["anchors"][market.name] = _paste(frame, market, int(rng.integers(700, 1300)), int(rng.integers(400, 700)))
+    region = config.SHOP_BUY_CONFIG.nomore_region
+    nomore = get_template(config.SHOP_BUY_CONFIG.nomore_image_path)
+    box = None
+    if rng.integers(0, 2):
+        box = _paste(frame, nomore, region[0] + int(rng.integers(0, region[2] - nomore.width)),
+                     region[1] + int(rng.integers(0, region[3] - nomore.height)))
+    case["regions"].append({"template": nomore.name, "region": list(region), "box": box})
+
+
+def _synthesize_receipt(frame: np.ndarray, rng: np.random.Generator, case: Dict):
+    """우편 받기 화면: 받기 목록의 항목(payment.png)과 우편 창 주변에 뜬 영수증 창(receipt.png)을 그립니다."""
+    from post_util import get_post_dialog_region
+    from screen_utils import Box
+    from template_registry import get_template
+
+    receive = config.RECEIVE_CONFIG
+    # 받기 목록 영역이 화면 안에 들어오는 위치에 우편 창을 둡니다.
+    post = get_template(config.POST_CONFIG.base_image_path)
+    anchor = _paste(frame, post, int(rng.integers(20, frame.shape[1] - receive.list_offset_x - receive.list_width)),
+                    int(rng.integers(20, frame.shape[0] - receive.list_offset_y - receive.list_height)))
+    case["anchors"][post.name] = anchor
+    list_region = [anchor[0] + receive.list_offset_x, anchor[1] + receive.list_offset_y,
+                   receive.list_width, receive.list_height]
+    payment = get_template(receive.payment_image_path)
+    box = _paste(frame, payment, list_region[0] + int(rng.integers(0, list_region[2] - payment.width)),
+                 list_region[1] + int(rng.integers(0, list_region[3] - payment.height)))
+    case["regions"].append({"template": payment.name, "region": list_region, "box": box})
+
+    dialog = get_post_dialog_region(Box(*anchor))
+    left, top = max(dialog[0], 0), max(dialog[1], 0)
+    right = min(dialog[0] + dialog[2], frame.shape[1])
+    bottom = min(dialog[1] + dialog[3], frame.shape[0])
+    receipt = get_template(receive.receipt_image_path)
+    box = _paste(frame, receipt, int(rng.integers(left, right - receipt.width)),
+                 int(rng.integers(top, bottom - receipt.height)))
+    case["regions"].append({"template": receipt.name, "region": list(dialog), "box": box})
+
+
+# 합성 케이스가 seed 순서대로 돌아가며 만드는 화면 상태
+SYNTHETIC_STATES = ("inventory", "post", "shop", "receipt")
+
+
+def synthesize_case(seed: int) -> Tuple[np.ndarray, Dict]:
+    """에셋을 알려진 위치에 붙여 넣은 합성 프레임과 그 라벨을 만듭니다. 상태는 SYNTHETIC_STATES를 차례로 돌아갑니다."""
+    from benchmarks.synthetic_screens import synthesize_desktop
+    from template_registry import get_template
+
+    rng = np.random.default_rng(seed)
+    frame = synthesize_desktop(1366, 768, seed)
+    state = SYNTHETIC_STATES[seed % len(SYNTHETIC_STATES)]
+    case: Dict = {"file": f"synthetic_{seed}", "state": state, "anchors": {}, "regions": [], "grids": []}
+    post = get_template(config.POST_CONFIG.base_image_path)
+
+    if state in ("inventory", "post"):
+        _synthesize_inventory(frame, rng, case)
+        # 인벤토리 창이 왼쪽 위에 있으므로 우편 기준 이미지는 그와 겹치지 않는 오른쪽 아래에 둡니다.
+        case["anchors"][post.name] = None
+        if state == "post":
+            case["anchors"][post.name] = _paste(frame, post, int(rng.integers(1000, 1300)),
+                                                int(rng.integers(400, 700)))
+    elif state == "shop":
+        _synthesize_shop(frame, rng, case)
+        case["anchors"][post.name] = None
+    else:
+        _synthesize_receipt(frame, rng, case)
+    return frame, case
+
+
+def run_case(task: Tuple[Optional[str], Optional[int], Optional[Dict], int]) -> Dict:
+    """한 케이스를 재생 백엔드로 실행하고 함수별 지연 시간(ms)과 정답 여부를 반환합니다. (워커 프로세스)"""
+    frame_path, seed, case, repeat = task
+    import screen_capture
+    import screen_utils
+    from anchor_tracker import invalidate_anchor
+    from grid_cell_utils import scan_grid_for_image
+
+    if seed is not None:
+        frame, case = synthesize_case(seed)
+        screen_capture.set_backend(screen_capture.ReplayCaptureBackend([frame]))
+    else:
+        screen_capture.set_backend(screen_capture.ReplayCaptureBackend([frame_path]))
+    invalidate_anchor()
+
+    timings: Dict[str, List[float]] = {}
+    outcomes: Dict[str, List[bool]] = {}
+
+    def measure(name: str, func, check):
+        samples = timings.setdefault(name, [])
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            samples.append((time.perf_counter() - start) * 1000)
+        outcomes.setdefault(name, []).append(check(result))
+
+    for template_name, expected in case.get("anchors", {}).items():
+        measure("find_image_on_screen",
+                lambda: screen_utils.find_image_on_screen(ASSETS_DIR / template_name, GLOBAL_CONFIDENCE),
+                lambda box: _box_matches(box, expected))
+
+    for entry in case.get("regions", []):
+        measure("find_image_in_region",
+                lambda: screen_utils.find_image_in_region(ASSETS_DIR / entry["template"], tuple(entry["region"]),
+                                                          GLOBAL_CONFIDENCE),
+                lambda box: _box_matches(box, entry["box"]))
+
+    for entry in case.get("grids", []):
+        window_config = getattr(config, entry["config"])
+        anchor = case["anchors"].get(window_config.base_image_path.name)
+        if not anchor:
+            continue
+        cells = _grid_cells(window_config, anchor)
+        measure("scan_grid_for_image",
+                lambda: scan_grid_for_image(ASSETS_DIR / entry["template"], cells, GLOBAL_CONFIDENCE),
+                lambda boxes: [i for i, box in enumerate(boxes) if box] == entry["occupied"])
+
+    if case.get("scroll"):
+        try:
+            from inven_util import is_scroll_at_limit
+        except Exception:
+            is_scroll_at_limit = None  # 입력 장치 라이브러리를 불러올 수 없는 환경
+        if is_scroll_at_limit:
+            for check, expected in case["scroll"].items():
+                measure("is_scroll_at_limit",
+                        lambda: is_scroll_at_limit(config.INVEN_SCROLL_CONFIG, check),
+                        lambda result: result == expected)
+
+    return {"case": case["file"], "state": case.get("state", ""), "timings": timings, "outcomes": outcomes}
+
+
+def summarize(results: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """함수별 지연 시간 백분위수와 정확도를 집계합니다."""
+    summary: Dict[str, Dict[str, float]] = {}
+    names = sorted({name for result in results for name in result["timings"]})
+    for name in names:
+        samples = np.array([t for r in results for t in r["timings"].get(name, [])])
+        outcomes = [o for r in results for o in r["outcomes"].get(name, [])]
+        summary[name] = {
+            "calls": len(samples),
+            "p50_ms": round(float(np.percentile(samples, 50)), 3),
+            "p90_ms": round(float(np.percentile(samples, 90)), 3),
+            "p99_ms": round(float(np.percentile(samples, 99)), 3),
+            "accuracy": round(sum(outcomes) / len(outcomes), 4) if outcomes else 0.0,
+        }
+    return summary
+
+
+def check_regressions(summary: Dict, baseline: Dict, tolerance: float, min_accuracy: float) -> List[str]:
+    """기준선 대비 p90 지연 증가나 정확도 하락을 찾아 메시지 목록으로 반환합니다."""
+    problems = []
+    for name, stats in summary.items():
+        if stats["accuracy"] < min_accuracy:
+            problems.append(f"{name}: 정확도 {stats['accuracy']:.2%} < {min_accuracy:.2%}")
+        base = baseline.get(name)
+        if base and stats["p90_ms"] > base["p90_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p90 {stats['p90_ms']:.2f} ms > 기준선 {base['p90_ms']:.2f} ms "
+                            f"(+{tolerance:.0%} 허용)")
+    return problems
+
+
+def _load_tasks(manifest: Path, synthetic: Optional[int], repeat: int) -> List[Tuple]:
+    """synthetic이 None이면 코퍼스를 쓰고, 코퍼스가 비어 있으면 DEFAULT_SYNTHETIC_CASES개의 합성 케이스로 대신합니다."""
+    if synthetic is None:
+        cases = json.loads(manifest.read_text(encoding="utf-8"))["cases"] if manifest.exists() else []
+        if cases:
+            return [(str(manifest.parent / case["file"]), None, case, repeat) for case in cases]
+        print(f"'{manifest}'에 라벨이 붙은 케이스가 없어 합성 케이스 {DEFAULT_SYNTHETIC_CASES}개로 실행합니다.")
+        synthetic = DEFAULT_SYNTHETIC_CASES
+    return [(None, seed, None, repeat) for seed in range(synthetic)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="화면 인식 벤치마크 및 회귀 테스트")
+    parser.add_argument("--manifest", type=Path, default=CORPUS_MANIFEST)
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="코퍼스 대신 합성 케이스 N개로 실행 (기본값: 코퍼스가 비어 있을 때만 합성 케이스 사용)")
+    parser.add_argument("--repeat", type=int, default=5, help="케이스/함수별 반복 측정 횟수")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 풀 크기 (기본값: CPU 수)")
+    parser.add_argument("--baseline", type=Path, help="비교할 기준선 JSON")
+    parser.add_argument("--save-baseline", type=Path, help="이번 결과를 기준선으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p90 지연 허용 증가율")
+    parser.add_argument("--min-accuracy", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tasks = _load_tasks(args.manifest, args.synthetic, args.repeat)
+    if not tasks:
+        print("실행할 케이스가 없습니다. --synthetic에 1 이상을 지정하세요.")
+        return 1
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(run_case, tasks))
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print(f"{len(results)}개 케이스, {elapsed:.1f}초")
+    print(f"{'function':<22} {'calls':>6} {'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9} {'accuracy':>9}")
+    for name, stats in summary.items():
+        print(f"{name:<22} {stats['calls']:>6} {stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['accuracy']:>9.2%}")
+    for result in results:
+        failed = [name for name, outcomes in result["outcomes"].items() if not all(outcomes)]
+        if failed:
+            print(f"  실패: {result['case']} ({result['state']}) -> {', '.join(failed)}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"기준선을 '{args.save_baseline}'에 저장했습니다.")
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else {}
+    problems = check_regressions(summary, baseline, args.tolerance, args.min_accuracy)
+    for problem in problems:
+        print(f"회귀: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
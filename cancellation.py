@@ -0,0 +1,155 @@
+# cancellation.py
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class CancellationToken:
+    """
+    threading.Event 기반 취소 토큰입니다. 취소되거나 마감 시각(deadline, time.monotonic 기준)이 지나면 취소된 것으로 봅니다.
+    sleep/wait는 Event를 기다리므로 대기 중에 CPU를 쓰지 않고, cancel()이 호출되는 즉시 깨어납니다.
+    토큰 자체를 호출하면 is_cancelled()와 같으므로 should_stop 인자로 그대로 넘길 수 있습니다.
+    """
+
+    def __init__(self, name: str = "", deadline: Optional[float] = None,
+                 parent: Optional["CancellationToken"] = None):
+        self.name = name
+        self.deadline = deadline
+        self.reason = ""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._children: "weakref.WeakSet[CancellationToken]" = weakref.WeakSet()
+        if parent:
+            if parent.deadline is not None:
+                self.deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+            parent._adopt(self)
+
+    def cancel(self, reason: str = "취소 요청"):
+        """토큰과 그 자식 토큰을 모두 취소하고, 기다리고 있는 스레드를 깨웁니다."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            children = list(self._children)
+        for child in children:
+            child.cancel(reason)
+
+    def is_cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    __call__ = is_cancelled
+
+    def remaining(self) -> Optional[float]:
+        """마감 시각까지 남은 시간(초). 마감이 없으면 None."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        최대 seconds초 잠듭니다. 취소되면 즉시 깨어나 False를, 끝까지 잤으면 True를 반환합니다.
+        마감 시각이 먼저 오면 마감 시각까지만 자고 False를 반환합니다.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._event.wait(remaining)
+            return False
+        return not self._event.wait(max(seconds, 0.0))
+
+    def child(self, timeout: Optional[float] = None, name: str = "") -> "CancellationToken":
+        """이 토큰이 취소되면 함께 취소되고, timeout초 뒤에는 스스로 만료되는 자식 토큰을 만듭니다."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        return CancellationToken(name or self.name, deadline, parent=self)
+
+    @contextmanager
+    def activate(self) -> Iterator["CancellationToken"]:
+        """with 블록 동안 현재 스레드의 current_token()을 이 토큰으로 바꿉니다."""
+        previous = getattr(_active, "token", None)
+        _active.token = self
+        try:
+            yield self
+        finally:
+            _active.token = previous
+
+    def _adopt(self, child: "CancellationToken"):
+        with self._lock:
+            self._children.add(child)
+            cancelled = self._event.is_set()
+        if cancelled:
+            child.cancel(self.reason)
+
+
+class JobSlot:
+    """
+    한 종류의 자동화 작업이 동시에 하나만 실행되도록 보장하고, 실행 중인 작업의 취소 토큰을 보관합니다.
+    시작 여부 확인과 표시를 잠금 안에서 한 번에 처리하므로 단축키 스레드와 작업 스레드 사이의 경쟁이 없습니다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._token: Optional[CancellationToken] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._token is not None
+
+    def try_start(self) -> Optional[CancellationToken]:
+        """실행 중인 작업이 없으면 새 토큰을 만들어 실행 중으로 표시하고 반환합니다. 이미 실행 중이면 None."""
+        with self._lock:
+            if self._token is not None:
+                return None
+            self._token = CancellationToken(self.name)
+            return self._token
+
+    def finish(self, token: CancellationToken):
+        """작업이 끝났음을 표시합니다. 다른 작업의 토큰이면 무시합니다."""
+        with self._lock:
+            if self._token is token:
+                self._token = None
+
+    def cancel(self, reason: str = "취소 요청") -> bool:
+        """실행 중이고 아직 취소되지 않은 작업을 취소하면 True를 반환합니다."""
+        with self._lock:
+            token = self._token
+        if token is None or token.is_cancelled():
+            return False
+        token.cancel(reason)
+        return True
+
+    def run(self, token: CancellationToken, job: Callable[[], None]):
+        """try_start로 받은 토큰을 현재 스레드에 적용해 job을 실행하고, 끝나면 작업 종료를 표시합니다."""
+        try:
+            with token.activate():
+                job()
+        finally:
+            self.finish(token)
+
+
+# 어떤 작업에도 속하지 않은 스레드가 사용하는, 취소되지 않는 토큰
+NEVER = CancellationToken("never")
+_active = threading.local()
+
+
+def current_token() -> CancellationToken:
+    """현재 스레드에서 실행 중인 작업의 취소 토큰입니다. 작업 밖이면 NEVER."""
+    return getattr(_active, "token", None) or NEVER
+
+
+def sleep(seconds: float, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    취소될 수 있는 sleep입니다. should_stop(기본값: current_token())이 토큰이면 그 Event를 기다리고,
+    일반 함수라면 그대로 잠든 뒤 확인합니다. 끝까지 잤으면 True, 취소되었으면 False를 반환합니다.
+    """
+    if should_stop is None:
+        should_stop = current_token()
+    if isinstance(should_stop, CancellationToken):
+        return should_stop.sleep(seconds)
+    time.sleep(seconds)
+    return not should_stop()
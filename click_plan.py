@@ -0,0 +1,91 @@
+# click_plan.py
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import input_dispatch
+import window_context
+from config import CLICK_PLAN_MIN_GAP
+from grid_cell_utils import random_point_in_cell
+from tracing import traced
+
+Cell = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class PlannedClick:
+    x: int
+    y: int
+    label: str = ""
+
+
+@dataclass
+class ClickPlanReport:
+    """클릭 계획 한 번 실행의 결과입니다."""
+    clicks: int = 0
+    planned: int = 0
+    seconds: float = 0.0
+    aborted: bool = False
+
+    @property
+    def clicks_per_second(self) -> float:
+        return self.clicks / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"clicks": self.clicks, "planned": self.planned, "seconds": round(self.seconds, 3),
+                "clicks_per_second": round(self.clicks_per_second, 1), "aborted": self.aborted}
+
+
+@dataclass
+class ClickPlan:
+    """미리 계산한 클릭 좌표 목록입니다. 좌표는 click_randomly_in_cell과 같은 규칙(셀 중앙 80%)으로 고릅니다."""
+    clicks: List[PlannedClick] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.clicks)
+
+    def add_cell(self, cell: Cell, label: str = ""):
+        x, y = random_point_in_cell(*cell)
+        self.clicks.append(PlannedClick(x, y, label))
+
+    @classmethod
+    def for_moves(cls, moves: Sequence[Tuple[Cell, Cell]]) -> "ClickPlan":
+        """(출발 셀, 도착 셀) 쌍 목록을 출발 → 도착 순서의 클릭 계획으로 만듭니다."""
+        plan = cls()
+        for index, (source, destination) in enumerate(moves):
+            plan.add_cell(source, f"move{index}:source")
+            plan.add_cell(destination, f"move{index}:destination")
+        return plan
+
+
+class ClickPlanExecutor:
+    """
+    클릭 계획을 클릭마다 sleep이나 로그 출력 없이 연속으로 실행합니다.
+    이벤트 사이에는 min_gap만큼의 최소 간격만 보장하고, 실행 후 초당 클릭 수를 보고합니다.
+    """
+
+    def __init__(self, min_gap: float = CLICK_PLAN_MIN_GAP):
+        self.min_gap = min_gap
+        self.last_report: Optional[ClickPlanReport] = None
+
+    @traced("click_plan", "input")
+    def run(self, plan: ClickPlan, should_stop: Optional[Callable[[], bool]] = None) -> ClickPlanReport:
+        report = ClickPlanReport(planned=len(plan))
+        start = time.perf_counter()
+        # 아이템을 집고 놓는 클릭 사이에 다른 창의 입력이 끼어들지 않도록 계획 전체 동안 입력 장치를 독점합니다.
+        with window_context.input_focus():
+            for click in plan.clicks:
+                if should_stop and should_stop():
+                    report.aborted = True
+                    break
+                # 입력 설정의 기본 클릭 지연 대신 min_gap만큼만 기다립니다.
+                input_dispatch.click(click.x, click.y, delay=self.min_gap)
+                report.clicks += 1
+        report.seconds = time.perf_counter() - start
+        self.last_report = report
+        print(f"클릭 계획 실행: {report.clicks}/{report.planned}회, "
+              f"{report.seconds * 1000:.0f} ms ({report.clicks_per_second:.1f} 클릭/초)")
+        return report
+
+
+EXECUTOR = ClickPlanExecutor()
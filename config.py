@@ -1,4 +1,5 @@
 # config.py
+import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
@@ -7,8 +8,30 @@ from pathlib import Path
 ASSETS_DIR = Path("assets")
 
 # --- Global Settings ---
+# 자동화 대상 게임 클라이언트 창 제목
+WINDOW_TITLE = 'MapleStory Worlds-Mapleland'
 GLOBAL_CONFIDENCE = 0.8
 CLICK_DELAY_SECONDS = 0.03
+# 발송 워크플로우가 실패했을 때 실패한 단계부터 이어서 다시 실행할 최대 횟수
+DELIVERY_RESUME_ATTEMPTS = 1
+# 배송 전 우편 창과 인벤토리 창의 좌측 좌표가 이보다 가까우면 인벤토리 창을 옮김 (픽셀)
+MIN_POST_INVEN_GAP = 845
+# 클릭 계획(click_plan)을 연속 실행할 때 이벤트 사이의 최소 간격 (초)
+CLICK_PLAN_MIN_GAP = 0.015
+# 게임 창 핸들/위치 캐시가 창이 그대로인지 다시 확인하는 최소 간격 (초)
+WINDOW_CHECK_INTERVAL = 0.5
+# 템플릿 캐시가 에셋 파일의 변경(mtime)을 확인하는 최소 간격 (초)
+TEMPLATE_MTIME_CHECK_INTERVAL = 5.0
+# 기준 이미지의 캐시된 위치를 재검증할 때 주변으로 더 살펴볼 여유 (픽셀)
+ANCHOR_SEARCH_MARGIN = 8
+# 독립적인 매칭 작업(그리드 행, 여러 템플릿)을 나눠 실행할 스레드 수
+MATCH_WORKERS = min(8, os.cpu_count() or 1)
+# 화면 대기(wait_for_image) 시 프레임을 확인하는 간격 (초). 약 30fps
+WAIT_POLL_INTERVAL = 1 / 30
+# 영역 없이 전체 화면을 기다릴 때의 확인 간격 (초). 큰 화면을 매번 캡처하므로 더 느리게 확인합니다.
+WAIT_FULL_SCREEN_POLL_INTERVAL = 0.1
+# 화면 변화 감지용 digest를 계산할 때 샘플링할 픽셀 간격
+WAIT_DIGEST_STEP = 4
 
 # --- Dataclass Definitions for Typed Configs ---
 @dataclass(frozen=True)
@@ -51,6 +74,134 @@ class ScrollCheckConfig:
     bottom_offset_x: int
     bottom_offset_y: int
 
+@dataclass(frozen=True)
+class OccupancyConfig:
+    """셀 점유 분류기(색상 히스토그램 시그니처) 설정"""
+    # 채널당 히스토그램 구간 수 1~32 (시그니처 길이는 bins^3)
+    histogram_bins: int = 4
+    # 셀 이미지를 몇 픽셀 간격으로 샘플링할지
+    sample_step: int = 2
+    # 가장 가까운 기준과의 L1 거리가 이 값을 넘으면 'unknown'으로 분류
+    max_distance: float = 0.6
+
+@dataclass(frozen=True)
+class FrameRecorderConfig:
+    """실패 분석용 캡처 프레임 링 버퍼 설정"""
+    enabled: bool = True
+    # 압축된 프레임이 차지할 수 있는 최대 메모리 (바이트)
+    max_bytes: int = 64 * 1024 * 1024
+    max_frames: int = 300
+    # 같은 영역을 이 간격(초)보다 자주 기록하지 않음 (폴링 루프의 기록 비용 제한)
+    min_interval: float = 0.2
+    # PNG 압축 레벨 (0~9). 낮을수록 빠르고 크기가 큼
+    png_compression: int = 1
+    dump_dir: Path = Path("logs") / "frame_dumps"
+
+@dataclass(frozen=True)
+class TraceConfig:
+    """작업 단계별 소요 시간 구간(span) 수집 설정"""
+    enabled: bool = True
+    # 메모리에 보관할 최대 구간 수. 넘으면 오래된 구간부터 버림
+    max_spans: int = 50000
+    # 단계별 지연 히스토그램 구간 경계 (ms)
+    histogram_edges_ms: tuple = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+    export_dir: Path = Path("logs") / "traces"
+
+@dataclass(frozen=True)
+class ScrollbarConfig:
+    """기준 이미지 기준 스크롤바 트랙 위치와 썸(thumb) 판별 설정"""
+    base_image_path: Path
+    # 트랙 영역 (기준 이미지 좌상단 기준 오프셋과 크기). 테두리를 피해 트랙 중앙의 좁은 띠만 읽음
+    track_offset_x: int
+    track_offset_y: int
+    track_width: int
+    track_height: int
+    # 썸이 트랙보다 밝으면 True
+    thumb_brighter: bool = True
+    # 트랙과 썸의 행 평균 밝기 차이가 이 값보다 작으면 썸을 읽을 수 없는 것으로 봄
+    min_contrast: float = 30.0
+    # 썸으로 인정할 최소 길이와, 썸 구간 밖에서 썸처럼 보이는 행의 허용 개수 (넘으면 트랙 위치가 어긋난 것으로 봄)
+    min_thumb_length: int = 8
+    max_stray_rows: int = 3
+    # 휠 이벤트를 보낼 위치 (기준 이미지 좌상단 기준). 스크롤은 마우스 아래의 목록으로 가므로 목록 위 한 점을 지정
+    wheel_offset_x: int = 0
+    wheel_offset_y: int = 0
+    # pyautogui.scroll 한 번에 넘길 양과, 스크롤 후 화면이 갱신될 때까지의 대기 시간
+    scroll_amount: int = 100
+    settle_seconds: float = 0.05
+    max_scroll_steps: int = 30
+
+@dataclass(frozen=True)
+class InputDelayConfig:
+    """입력 이벤트 종류별로 이벤트를 보낸 뒤 기다릴 시간 (초). pyautogui 전역 PAUSE 대신 사용"""
+    click: float = 0.03
+    press: float = 0.03
+    write: float = 0.03
+    # write()에서 글자 사이 간격
+    write_interval: float = 0.0
+    hotkey: float = 0.05
+    scroll: float = 0.02
+    move: float = 0.0
+    drag: float = 0.05
+
+@dataclass(frozen=True)
+class BuyConfig:
+    """상점 구매 버튼 연타 설정. 클릭 사이사이에 '더 이상 구매 불가' 창을 같은 캡처 흐름에서 확인"""
+    button_pos: tuple[int, int]
+    nomore_image_path: Path
+    nomore_region: tuple[int, int, int, int]
+    # 목표 클릭 속도 (초당 클릭 수)
+    target_rate: float = 25.0
+    # 확인 창을 검사하기 전에 보낼 클릭 수. 1이면 매 클릭 후 검사
+    burst_size: int = 2
+    timeout: float = 30.0
+
+@dataclass(frozen=True)
+class ReceiveConfig:
+    """F12 우편 받기 엔진 설정. 목록 영역은 우편 기준 이미지(post.png) 좌상단 기준"""
+    base_image_path: Path
+    payment_image_path: Path
+    receipt_image_path: Path
+    list_offset_x: int = 152
+    list_offset_y: int = 149
+    list_width: int = 129
+    list_height: int = 281
+    # 목록이 비어 있을 때 새 항목이 나타나길 기다리는 시간. 이 안에 나타나지 않으면 받기를 마침
+    empty_list_timeout: float = 5.0
+    # 항목을 누른 뒤 받기 버튼을 누르기 전 대기
+    select_settle: float = 0.1
+    receipt_timeout: float = 5.0
+    # 처음 찾은 영수증 창 위치 주변으로 좁혀 탐색할 여유 (픽셀)
+    receipt_search_margin: int = 40
+    # 영수증 창이 연속으로 이만큼 뜨지 않으면 받기를 멈춤
+    max_consecutive_misses: int = 3
+    # 받을 최대 개수. 0이면 목록이 빌 때까지
+    max_parcels: int = 0
+
+@dataclass(frozen=True)
+class ReadinessConfig:
+    """고정 대기 대신 화면/창 준비 상태를 확인하는 대기의 설정. 시간 제한은 기존 고정 대기 시간과 같음"""
+    # 화면이 이 시간(초) 동안 바뀌지 않으면 다 그려진 것으로 봄
+    stable_for: float = 0.15
+    activate_timeout: float = 0.2
+    shop_resize_timeout: float = 1.0
+    shop_dialog_timeout: float = 1.0
+    shop_select_timeout: float = 0.5
+    post_resize_timeout: float = 1.5
+    post_dialog_timeout: float = 1.5
+    receipt_close_timeout: float = 1.5
+
+@dataclass(frozen=True)
+class MultiWindowConfig:
+    """여러 게임 클라이언트 창을 동시에 조작하는 모드의 설정"""
+    max_clients: int = 4
+    # 캡처는 화면에 보이는 픽셀만 가져오므로, 발견한 창을 이 크기로 겹치지 않게 바둑판 배치함
+    arrange: bool = True
+    client_width: int = 1366
+    client_height: int = 768
+    # 다른 창에 입력하기 전 그 창이 맨 앞으로 올 때까지 기다리는 최대 시간
+    activate_timeout: float = 0.2
+
 @dataclass(frozen=True)
 class NpcConfig:
     """NPC의 상대 좌표 및 클릭 영역 설정"""
@@ -124,6 +275,9 @@ DELIVERY_BUTTONS: dict[str, ButtonConfig] = {
     "send": ButtonConfig(offset_x=343, offset_y=489, width=67, height=19),
     "receive": ButtonConfig(offset_x=681, offset_y=493, width=10, height=10),
 }
+# 보내기 확인 창, 영수증 창처럼 우편 창에서 띄우는 대화상자를 찾을 영역 (우편 기준 이미지 기준).
+# 우편 창(약 700x520)과 그 주변 여유를 포함합니다.
+POST_DIALOG_AREA = ButtonConfig(offset_x=-200, offset_y=-150, width=1100, height=820)
 INVEN_SCAN_TARGET_IMAGE_PATH = ASSETS_DIR / "cider.png"
 PAYMENT_IMAGE_PATH = ASSETS_DIR / "payment.png"
 RECEIPT_IMAGE_PATH = ASSETS_DIR / "receipt.png"
@@ -138,6 +292,33 @@ INVEN_SCROLL_CONFIG = ScrollCheckConfig(
     bottom_offset_x=50,
     bottom_offset_y=250,
 )
+# inventop.png / invenbot.png 탐색 영역(기준 x+155~355) 안, 인벤토리 그리드 오른쪽의 스크롤바 트랙
+INVEN_SCROLLBAR_CONFIG = ScrollbarConfig(
+    base_image_path=ASSETS_DIR / "inven.png",
+    track_offset_x=200,
+    track_offset_y=62,
+    track_width=8,
+    track_height=284,
+    # 인벤토리 그리드 중앙
+    wheel_offset_x=95,
+    wheel_offset_y=203,
+)
+GRID_OCCUPANCY_CONFIG = OccupancyConfig()
+FRAME_RECORDER_CONFIG = FrameRecorderConfig()
+TRACE_CONFIG = TraceConfig()
+INPUT_DELAY_CONFIG = InputDelayConfig()
+READINESS_CONFIG = ReadinessConfig()
+MULTI_WINDOW_CONFIG = MultiWindowConfig()
+RECEIVE_CONFIG = ReceiveConfig(
+    base_image_path=ASSETS_DIR / "post.png",
+    payment_image_path=ASSETS_DIR / "payment.png",
+    receipt_image_path=ASSETS_DIR / "receipt.png",
+)
+SHOP_BUY_CONFIG = BuyConfig(
+    button_pos=(603, 206),
+    nomore_image_path=ASSETS_DIR / "nomore.png",
+    nomore_region=(390, 90, 165, 62),
+)
 DEWEY_CONFIG = NpcConfig(name="Dewey", offset_x=1208, offset_y=209)
 DORAN_CONFIG = NpcConfig(name="Doran", offset_x=156, offset_y=199)
 
@@ -1,106 +1,265 @@
 # delivery.py
-import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
-import pyautogui
-
+from anchor_tracker import locate_anchor
+import input_dispatch
 import screen_utils
-# --- 신규/수정된 임포트 ---
-import shared_state
-from config import (CLICK_DELAY_SECONDS, GLOBAL_CONFIDENCE, INVEN_CONFIG,
+from cancellation import current_token
+from config import (CLICK_DELAY_SECONDS, DELIVERY_RESUME_ATTEMPTS, GLOBAL_CONFIDENCE, INVEN_CONFIG,
                     INVEN_SCAN_TARGET_IMAGE_PATH, OVERLAY_CONFIG, POST_CONFIG,
                     SEND_CHECK1_IMAGE_PATH, SEND_CHECK2_IMAGE_PATH)
+from click_plan import EXECUTOR as CLICK_EXECUTOR, ClickPlan
 from debug_overlay_util import draw_base_info_on_image, draw_rects_on_image
+from frame_recorder import dump_frames_on_failure
 from grid_cell_utils import click_randomly_in_cell, scan_grid_for_image
-from inven_util import (click_inven_grid_cell, find_item_by_scrolling,
-                        get_inven_grid_cells)
-from post_util import (click_delivery_button, click_post_grid_cell,
-                       get_delivery_button_rects, get_post_grid_cells)
-from screen_utils import paste_text
+from inven_map import InventoryMap, Slot
+from inven_util import find_item_by_scrolling, get_inven_grid_cells
+from match_executor import parallel_map
+from post_util import (click_delivery_button, get_delivery_button_rect_map, get_delivery_button_rects,
+                       get_post_dialog_region, get_post_grid_cells)
+from screen_utils import Box, WaitTarget, paste_text
+from tracing import traced, traced_sleep
+from window_context import WindowLocal
+from workflow import Step, Workflow, WorkflowResult
+
+Cell = Tuple[int, int, int, int]
+
+# 창마다 인벤토리 배치가 다르므로 여러 창을 동시에 조작할 때는 창별 지도를 사용합니다.
+INVEN_MAP: InventoryMap = WindowLocal(lambda: InventoryMap(INVEN_SCAN_TARGET_IMAGE_PATH))
+
+
+@dataclass
+class PreparedSet:
+    """
+    다음 세트를 기준 이미지 탐색이나 재계산 없이 바로 시작할 수 있도록 미리 계산해 둔 좌표와 클릭 계획입니다.
+    moves는 (인벤토리 칸, 우편 셀 인덱스) 목록이고, 발송 직후 비어 있는 우편 그리드를 기준으로 만듭니다.
+    """
+    post_base: Box
+    button_rects: Dict[str, Cell]
+    post_grid_cells: List[Cell]
+    inven_grid_cells: Optional[List[Cell]] = None
+    moves: List[Tuple[Slot, int]] = field(default_factory=list)
+    visible: Dict[Slot, int] = field(default_factory=dict)
+    plan: Optional[ClickPlan] = None
+
+
+@traced()
+def prepare_set(previous: Optional[PreparedSet] = None) -> Optional[PreparedSet]:
+    """
+    한 세트에 필요한 버튼/그리드 좌표와 인벤토리 → 우편 클릭 계획을 계산합니다.
+    previous가 주어지면 그 좌표를 그대로 쓰고 인벤토리 지도만 참고하므로 화면을 캡처하지 않습니다.
+    """
+    if previous:
+        post_base, button_rects = previous.post_base, previous.button_rects
+        post_grid_cells, inven_grid_cells = previous.post_grid_cells, previous.inven_grid_cells
+    else:
+        post_base = locate_anchor(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+        if not post_base: return None
+        button_rects = get_delivery_button_rect_map(post_base)
+        post_grid_cells = get_post_grid_cells(POST_CONFIG)
+        if not post_grid_cells: return None
+        inven_grid_cells = get_inven_grid_cells(INVEN_CONFIG)
+
+    prepared = PreparedSet(post_base, button_rects, post_grid_cells, inven_grid_cells)
+    if inven_grid_cells and INVEN_MAP.is_built():
+        sources = INVEN_MAP.sources(len(post_grid_cells))
+        prepared.visible = INVEN_MAP.visible_cells(sources)
+        # 지금 보이는 페이지에 있는 칸만 미리 계획하고, 나머지는 채우기 단계에서 스크롤해 옮깁니다.
+        prepared.moves = [(slot, post_index) for post_index, slot in enumerate(sources) if slot in prepared.visible]
+        if prepared.moves:
+            prepared.plan = ClickPlan.for_moves(
+                [(inven_grid_cells[prepared.visible[slot]], post_grid_cells[post_index])
+                 for slot, post_index in prepared.moves])
+    return prepared
 
 
-def _fill_post_with_items() -> bool:
+def _fill_post_with_items(prepared: Optional[PreparedSet] = None) -> bool:
     MAX_ATTEMPTS = 10
     for attempt in range(MAX_ATTEMPTS):
-        if shared_state.stop_action:
+        if current_token().is_cancelled():
             print("\n작업이 중단되었습니다.")
             return False
 
         print(f"\n--- 우편 채우기 시도 ({attempt + 1}/{MAX_ATTEMPTS}) ---")
-        post_grid_cells = get_post_grid_cells(POST_CONFIG)
+        post_grid_cells = prepared.post_grid_cells if prepared else get_post_grid_cells(POST_CONFIG)
         if not post_grid_cells: return False
         empty_post_indices = [i for i, loc in enumerate(
             scan_grid_for_image(INVEN_SCAN_TARGET_IMAGE_PATH, post_grid_cells, GLOBAL_CONFIDENCE)) if loc is None]
         if not empty_post_indices: return True
 
-        inven_grid_cells = get_inven_grid_cells(INVEN_CONFIG)
-        if not inven_grid_cells: return False
-        available_inven_indices = [i for i, loc in enumerate(
-            scan_grid_for_image(INVEN_SCAN_TARGET_IMAGE_PATH, inven_grid_cells, GLOBAL_CONFIDENCE)) if loc is not None]
-
-        if available_inven_indices:
-            num_to_move = min(len(empty_post_indices), len(available_inven_indices))
-            for i in range(num_to_move):
-                if shared_state.stop_action: return False
-                click_inven_grid_cell(available_inven_indices[i], inven_grid_cells)
-                click_post_grid_cell(empty_post_indices[i], post_grid_cells)
-            continue
+        # 미리 만든 클릭 계획은 계획한 우편 칸이 모두 비어 있을 때만 첫 시도에 그대로 사용합니다.
+        if prepared and prepared.plan and {index for _, index in prepared.moves} <= set(empty_post_indices):
+            moves, visible, plan = prepared.moves, prepared.visible, prepared.plan
+            inven_grid_cells = prepared.inven_grid_cells
+            prepared = None
         else:
-            if not find_item_by_scrolling(INVEN_SCAN_TARGET_IMAGE_PATH):
-                return False
-            continue
-    return False
+            prepared = None
+            # 인벤토리 지도는 처음 한 번만 전체 스캔하고, 이후 세트에서는 기록된 위치를 그대로 사용합니다.
+            if not INVEN_MAP.is_built() and not INVEN_MAP.build(): return False
+            sources = INVEN_MAP.sources(len(empty_post_indices))
+            if not sources:
+                if INVEN_MAP.is_complete():
+                    print(f"인벤토리에 '{INVEN_SCAN_TARGET_IMAGE_PATH.name}' 아이템이 더 없습니다.")
+                    return False
+                # 보이는 페이지만 기록된 지도라면 스크롤하며 아이템을 찾은 뒤 그 화면을 다시 기록합니다.
+                if not find_item_by_scrolling(INVEN_SCAN_TARGET_IMAGE_PATH):
+                    return False
+                INVEN_MAP.invalidate()
+                continue
 
+            shown = INVEN_MAP.show(sources)
+            if not shown:
+                print("경고: 기록된 아이템 위치를 화면에 표시하지 못해 인벤토리 지도를 다시 만듭니다.")
+                INVEN_MAP.invalidate()
+                continue
+            inven_grid_cells, visible = shown
+            # 다른 페이지에 있는 칸은 다음 시도에서 그 페이지로 스크롤해 옮깁니다.
+            moves = [(slot, post_index) for slot, post_index in zip(sources, empty_post_indices) if slot in visible]
+            plan = ClickPlan.for_moves([(inven_grid_cells[visible[slot]], post_grid_cells[post_index])
+                                        for slot, post_index in moves])
 
-def _wait_and_click_confirm(image_path: Path, timeout: int, description: str) -> bool:
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if shared_state.stop_action:
-            print("\n작업이 중단되었습니다.")
-            return False
-        location = screen_utils.find_image_on_screen(image_path, confidence=GLOBAL_CONFIDENCE)
-        if location:
-            click_randomly_in_cell(location.left, location.top, location.width, location.height)
-            time.sleep(0.2)
-            pyautogui.press('enter')
-            return True
-        time.sleep(0.2)
+        report = CLICK_EXECUTOR.run(plan, should_stop=current_token())
+        if report.aborted: return False
+
+        traced_sleep(CLICK_DELAY_SECONDS)  # 마지막 이동이 화면에 반영될 때까지 대기
+        remaining = INVEN_MAP.verify({slot: visible[slot] for slot, _ in moves}, inven_grid_cells)
+        if remaining:
+            print(f"경고: 인벤토리 셀 {[visible[slot] for slot in remaining]}의 아이템이 옮겨지지 않아 다시 스캔합니다.")
     return False
 
 
-def send_action(delivery_type: str, receiver_name: str, amount: str) -> bool:
-    if delivery_type not in ["standard", "express"]: return False
+def _wait_for_any_confirm(image_paths: List[Path], timeout: int, description: str) -> Optional[Tuple[int, Box]]:
+    """
+    여러 확인 창 중 먼저 나타난 것의 (인덱스, 위치)를 반환합니다. 시간 초과 또는 중단 시 None.
+    확인 창은 우편 창 주변(get_post_dialog_region)에서만 기다리고, 그 안에서 찾지 못하면 전체 화면을 한 번만 확인합니다.
+    """
+    region = get_post_dialog_region()
+    detection = screen_utils.wait_for_any([WaitTarget(path, region) for path in image_paths], timeout=timeout,
+                                          confidence=GLOBAL_CONFIDENCE)
+    if not detection and region and not current_token().is_cancelled():
+        detection = screen_utils.wait_for_any([WaitTarget(path) for path in image_paths], timeout=0,
+                                              confidence=GLOBAL_CONFIDENCE)
+    if current_token().is_cancelled():
+        print("\n작업이 중단되었습니다.")
+        return None
+    if not detection:
+        print(f"시간 초과: {timeout}초 내에 {description} 창을 찾지 못했습니다.")
+    return detection
+
+
+@traced("confirm_dialog", "input")
+def _click_confirm(location: Box):
+    click_randomly_in_cell(location.left, location.top, location.width, location.height)
+    traced_sleep(0.2)
+    input_dispatch.press('enter')
 
-    click_delivery_button(delivery_type)
-    if shared_state.stop_action: return False
 
-    click_delivery_button("receiver")
-    time.sleep(0.1)
-    paste_text(receiver_name)
-    if shared_state.stop_action: return False
+def is_out_of_stock() -> bool:
+    """인벤토리 지도가 모든 페이지를 기록했고 옮길 아이템이 더 없으면 True. 이때는 이어서 실행해도 소용이 없습니다."""
+    return INVEN_MAP.is_built() and INVEN_MAP.is_complete() and not INVEN_MAP.sources(1)
 
-    if not _fill_post_with_items(): return False
-    if shared_state.stop_action: return False
 
-    click_delivery_button("request")
-    time.sleep(CLICK_DELAY_SECONDS)
-    if shared_state.stop_action: return False
+def send_context(delivery_type: str, receiver_name: str, amount: str,
+                 prepared: Optional[PreparedSet] = None) -> Dict[str, object]:
+    """SEND_WORKFLOW 실행 하나가 공유하는 context를 만듭니다."""
+    return {"delivery_type": delivery_type, "receiver_name": receiver_name, "amount": amount,
+            "prepared": prepared, "button_rects": None}
 
-    click_delivery_button("value")
-    time.sleep(CLICK_DELAY_SECONDS)
-    pyautogui.write(amount)
-    pyautogui.press('enter')
-    if shared_state.stop_action: return False
 
-    click_delivery_button("send")
-    if not _wait_and_click_confirm(SEND_CHECK1_IMAGE_PATH, timeout=10, description="1차 확인"): return False
-    if not _wait_and_click_confirm(SEND_CHECK2_IMAGE_PATH, timeout=20, description="최종 확인"): return False
+def _check_prepared(context) -> bool:
+    """prepared의 좌표는 우편 창이 그 자리에 그대로 있을 때만 사용합니다."""
+    if context["delivery_type"] not in ["standard", "express"]: return False
+    prepared: Optional[PreparedSet] = context["prepared"]
+    if prepared and locate_anchor(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE) != prepared.post_base:
+        print("우편 창 위치가 바뀌어 미리 계산한 좌표를 버리고 다시 계산합니다.")
+        context["prepared"] = prepared = None
+    context["button_rects"] = prepared.button_rects if prepared else None
+    return True
+
+
+def _enter_receiver(context):
+    click_delivery_button("receiver", context["button_rects"])
+    traced_sleep(0.1)
+    paste_text(context["receiver_name"])
+
+
+def _request(context):
+    click_delivery_button("request", context["button_rects"])
+    traced_sleep(CLICK_DELAY_SECONDS)
+
+
+def _enter_amount(context):
+    click_delivery_button("value", context["button_rects"])
+    traced_sleep(CLICK_DELAY_SECONDS)
+    with input_dispatch.batch() as keys:
+        keys.write(context["amount"]).press('enter')
+
+
+def _send(context) -> bool:
+    """'보내기'를 누르고 확인 창(1차 또는 최종)이 뜨기를 기다립니다. 창이 뜨지 않았다면 보내기가 눌리지 않은 것입니다."""
+    click_delivery_button("send", context["button_rects"])
+    context["send_dialog"] = _wait_for_any_confirm([SEND_CHECK1_IMAGE_PATH, SEND_CHECK2_IMAGE_PATH], timeout=10,
+                                                   description="1차 확인")
+    return context["send_dialog"] is not None
+
 
+def _confirm_first(context):
+    index, location = context["send_dialog"]
+    _click_confirm(location)
+    # 1차 확인 없이 최종 확인 창이 바로 떴다면 최종 확인 단계는 건너뜁니다.
+    context["final_confirmed"] = index == 1
+
+
+def _confirm_final(context) -> bool:
+    detection = _wait_for_any_confirm([SEND_CHECK2_IMAGE_PATH], timeout=20, description="최종 확인")
+    if not detection: return False
+    _click_confirm(detection[1])
+    context["final_confirmed"] = True
     return True
 
 
+SEND_WORKFLOW = Workflow("send_action", [
+    Step("check_prepared", _check_prepared),
+    Step("select_type", lambda context: click_delivery_button(context["delivery_type"], context["button_rects"])),
+    Step("enter_receiver", _enter_receiver),
+    Step("fill_post", lambda context: _fill_post_with_items(context["prepared"])),
+    Step("request", _request),
+    Step("enter_amount", _enter_amount),
+    # '보내기'를 눌렀는데 확인 창이 뜨지 않으면 한 번 더 누릅니다.
+    Step("send", _send, retries=1),
+    Step("confirm_first", _confirm_first),
+    Step("confirm_final", _confirm_final, done=lambda context: context.get("final_confirmed", False)),
+])
+
+
+def run_send_workflow(context: Dict[str, object],
+                      on_step_done: Optional[Callable[[str, Dict[str, object]], None]] = None) -> WorkflowResult:
+    """
+    SEND_WORKFLOW를 실행하고, 실패하면 처음부터가 아니라 실패한 단계부터 최대 DELIVERY_RESUME_ATTEMPTS번 이어서 실행합니다.
+    재고가 떨어져 실패한 경우에는 이어서 실행하지 않습니다.
+    """
+    result = SEND_WORKFLOW.run(context, on_step_done=on_step_done)
+    for _ in range(DELIVERY_RESUME_ATTEMPTS):
+        if result.ok or result.cancelled or is_out_of_stock():
+            break
+        result = SEND_WORKFLOW.resume(result, on_step_done=on_step_done)
+    if not result.ok:
+        print(f"발송 워크플로우 결과: {result.as_dict()}")
+    return result
+
+
+@dump_frames_on_failure("send_action")
+def send_action(delivery_type: str, receiver_name: str, amount: str) -> bool:
+    return run_send_workflow(send_context(delivery_type, receiver_name, amount)).ok
+
+
 def show_all_overlays_for_debugging():
-    screenshot = pyautogui.screenshot()
+    screenshot = screen_utils.grab_screen_image()
+    # 두 기준 이미지 탐색은 서로 독립적이므로 병렬로 수행합니다.
+    inven_base_location, post_base_location = parallel_map(
+        locate_anchor, [INVEN_CONFIG.base_image_path, POST_CONFIG.base_image_path], name="overlay_anchors")
 
     a_grid_cells = get_inven_grid_cells(INVEN_CONFIG)
     if a_grid_cells:
@@ -110,12 +269,10 @@ def show_all_overlays_for_debugging():
         item_rects = [tuple(loc) for loc in item_locations_boxes if loc]
         screenshot = draw_rects_on_image(screenshot, item_rects, OVERLAY_CONFIG.color_inven_item,
                                          OVERLAY_CONFIG.thickness)
-    inven_base_location = screen_utils.find_image_on_screen(INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
     if inven_base_location:
         screenshot = draw_base_info_on_image(screenshot, inven_base_location, OVERLAY_CONFIG.color_base_image,
                                              OVERLAY_CONFIG.color_coord_text, OVERLAY_CONFIG.thickness)
 
-    post_base_location = screen_utils.find_image_on_screen(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
     if post_base_location:
         b_grid_cells = get_post_grid_cells(POST_CONFIG)
         if b_grid_cells:
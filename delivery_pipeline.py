@@ -0,0 +1,137 @@
+# delivery_pipeline.py
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import input_dispatch
+import screen_utils
+from anchor_tracker import invalidate_anchor, locate_anchor
+from cancellation import current_token
+from config import GLOBAL_CONFIDENCE, INVEN_CONFIG, MIN_POST_INVEN_GAP, POST_CONFIG
+from delivery import INVEN_MAP, PreparedSet, prepare_set, run_send_workflow, send_context
+from frame_recorder import dump_frames_on_failure
+import window_context
+from tracing import span
+from window_util import activate_maple_window
+from workflow import Step, Workflow
+
+
+@dataclass
+class PipelineReport:
+    """여러 세트 발송 한 번의 결과입니다."""
+    sets_requested: int = 0
+    sets_sent: int = 0
+    seconds: float = 0.0
+    set_seconds: List[float] = field(default_factory=list)
+    failed: bool = False
+    # 실패한 세트의 발송 워크플로우가 멈춘 단계 (예: 'fill_post'이면 재고 부족)
+    failed_step: Optional[str] = None
+
+    @property
+    def sets_per_minute(self) -> float:
+        return self.sets_sent / self.seconds * 60 if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"sets_requested": self.sets_requested, "sets_sent": self.sets_sent,
+                "seconds": round(self.seconds, 2), "sets_per_minute": round(self.sets_per_minute, 2),
+                "slowest_set_seconds": round(max(self.set_seconds, default=0.0), 2), "failed": self.failed,
+                "failed_step": self.failed_step}
+
+
+class DeliveryPipeline:
+    """
+    여러 세트를 연속으로 발송합니다. 한 세트의 확인 창을 기다리는 동안 다음 세트의 인벤토리 출발 칸,
+    클릭 계획, 버튼 좌표를 별도 스레드에서 미리 계산해 두어, 확인 창이 닫히는 즉시 다음 세트를 시작합니다.
+    """
+
+    def __init__(self, delivery_type: str, receiver_name: str, amount: str):
+        self.delivery_type = delivery_type
+        self.receiver_name = receiver_name
+        self.amount = amount
+        self.last_report: Optional[PipelineReport] = None
+        self._failed_step: Optional[str] = None
+
+    def run(self, num_sets: int, should_stop: Optional[Callable[[], bool]] = None) -> PipelineReport:
+        should_stop = should_stop or current_token()
+        report = PipelineReport(sets_requested=num_sets)
+        start = time.perf_counter()
+        prepared = prepare_set()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="delivery-prepare") as pool:
+            for i in range(num_sets):
+                if should_stop():
+                    print("\n사용자 요청에 의해 배송 작업을 중단합니다.")
+                    break
+                print(f"\n--- {i + 1}/{num_sets} 세트 발송 중 ---")
+                set_start = time.perf_counter()
+                with span("delivery_set", "workflow", index=i, prepared=prepared is not None):
+                    next_prepared = self._send_set(prepared, pool, is_last=i == num_sets - 1)
+                if next_prepared is False:
+                    report.failed = not should_stop()
+                    report.failed_step = self._failed_step
+                    break
+                report.sets_sent += 1
+                report.set_seconds.append(time.perf_counter() - set_start)
+                prepared = next_prepared
+
+        report.seconds = time.perf_counter() - start
+        self.last_report = report
+        print(f"배송 파이프라인 결과: {report.as_dict()}")
+        return report
+
+    @dump_frames_on_failure("send_action")
+    def _send_set(self, prepared: Optional[PreparedSet], pool: ThreadPoolExecutor, is_last: bool):
+        """한 세트를 발송하고 다음 세트용으로 미리 계산한 PreparedSet(또는 None)을 반환합니다. 실패 시 False."""
+        next_prepared: Optional[Future] = None
+
+        def on_step_done(step_name: str, context):
+            nonlocal next_prepared
+            # 이 세트의 인벤토리 이동은 끝났으므로, 나머지 입력과 확인 창을 처리하는 동안 다음 세트를 계산합니다.
+            if step_name == "fill_post" and not is_last and context["prepared"] and next_prepared is None:
+                next_prepared = pool.submit(window_context.bind(prepare_set), context["prepared"])
+
+        context = send_context(self.delivery_type, self.receiver_name, self.amount, prepared)
+        result = run_send_workflow(context, on_step_done)
+        self._failed_step = result.failed_step
+        if not result.ok:
+            return False
+        if next_prepared:
+            with span("await_prepared", "wait"):
+                return next_prepared.result()
+        # 미리 계산할 기준 좌표가 없었다면 확인 창이 닫힌 뒤 화면에서 새로 계산합니다.
+        return None if is_last else prepare_set()
+
+
+def _find_windows(context) -> bool:
+    context["post"] = locate_anchor(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+    context["inven"] = locate_anchor(INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+    return bool(context["post"] and context["inven"])
+
+
+def _separate_windows(context):
+    """인벤토리 창이 우편 창에 너무 가까우면 오른쪽으로 끌어 옮기고, 화면이 안정될 때까지 잠깐 기다립니다."""
+    post, inven = context["post"], context["inven"]
+    if abs(post.left - inven.left) >= MIN_POST_INVEN_GAP:
+        return
+    with input_dispatch.batch() as drag:
+        drag.move_to(inven.left + inven.width // 2, inven.top + inven.height // 2,
+                     duration=0.2).drag_rel(150, 0, duration=0.5)
+    invalidate_anchor(INVEN_CONFIG.base_image_path)
+    screen_utils.wait_until_stable(timeout=0.3)
+
+
+def _deliver(context) -> bool:
+    # 발송 사이에 인벤토리가 바뀌었을 수 있으므로 실행마다 지도를 새로 만듭니다.
+    INVEN_MAP.invalidate()
+    pipeline = DeliveryPipeline(context["delivery_type"], context["receiver_name"], context["amount"])
+    context["report"] = pipeline.run(context["num_sets"])
+    return not context["report"].failed
+
+
+# F1 배송 실행 전체. 'deliver' 단계의 결과 보고서는 context["report"]에 남습니다.
+DELIVERY_RUN_WORKFLOW = Workflow("run_delivery", [
+    Step("find_windows", _find_windows),
+    Step("separate_windows", _separate_windows),
+    Step("activate", lambda context: activate_maple_window()),
+    Step("deliver", _deliver),
+])
@@ -0,0 +1,162 @@
+# frame_recorder.py
+import functools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import screen_capture
+from cancellation import current_token
+from config import FRAME_RECORDER_CONFIG, FrameRecorderConfig
+from screen_capture import ReplayFrame
+
+Region = Tuple[int, int, int, int]
+METADATA_FILENAME = "frames.json"
+
+
+@dataclass(frozen=True)
+class RecordedFrame:
+    """PNG로 압축해 메모리에 보관하는 캡처 프레임입니다."""
+    timestamp: float
+    region: Region
+    encoded: bytes
+
+
+class FrameRingBuffer:
+    """
+    최근 캡처 프레임을 메모리 한도 안에서 보관하는 링 버퍼입니다.
+    캡처 스레드에서는 프레임 복사만 하고, PNG 압축은 별도 스레드에서 수행합니다.
+    작업이 실패하면 dump()로 보관 중인 프레임을 타임스탬프와 함께 디스크에 기록합니다.
+    """
+
+    def __init__(self, config: FrameRecorderConfig = FRAME_RECORDER_CONFIG):
+        self.config = config
+        self._frames: Deque[RecordedFrame] = deque()
+        self._total_bytes = 0
+        self._last_recorded: Dict[Region, float] = {}
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Tuple[float, Region, np.ndarray]]" = queue.Queue(maxsize=8)
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def record(self, frame: np.ndarray, region: Region):
+        """캡처 백엔드의 프레임 관찰자로 등록되어 매 캡처마다 호출됩니다."""
+        now = time.time()
+        with self._lock:
+            if now - self._last_recorded.get(region, 0.0) < self.config.min_interval:
+                return
+            self._last_recorded[region] = now
+        try:
+            # 캡처 버퍼는 재사용되므로 반드시 복사해서 넘깁니다.
+            self._pending.put_nowait((now, region, frame.copy()))
+        except queue.Full:
+            return
+        self._ensure_worker()
+
+    def frames(self) -> List[RecordedFrame]:
+        with self._lock:
+            return list(self._frames)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._total_bytes = 0
+            self._last_recorded.clear()
+
+    def dump(self, reason: str, directory: Optional[Path] = None) -> Optional[Path]:
+        """보관 중인 프레임을 PNG 파일과 메타데이터(frames.json)로 기록하고, 기록한 폴더를 반환합니다."""
+        self._pending.join()
+        frames = self.frames()
+        if not frames:
+            return None
+
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        dump_dir = (directory or self.config.dump_dir) / f"{stamp}_{reason}"
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        metadata = {"reason": reason, "screen_size": list(screen_capture.get_backend().screen_size()),
+                    "frames": []}
+        for index, recorded in enumerate(frames):
+            filename = f"{index:04d}_{recorded.timestamp:.3f}.png"
+            (dump_dir / filename).write_bytes(recorded.encoded)
+            metadata["frames"].append({"file": filename, "timestamp": recorded.timestamp,
+                                       "region": list(recorded.region)})
+        (dump_dir / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+        print(f"최근 화면 {len(frames)}장을 '{dump_dir}'에 저장했습니다.")
+        return dump_dir
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._encode_loop, name="frame-recorder", daemon=True)
+            self._worker.start()
+
+    def _encode_loop(self):
+        while True:
+            timestamp, region, frame = self._pending.get()
+            try:
+                ok, encoded = cv2.imencode(".png", frame,
+                                           [cv2.IMWRITE_PNG_COMPRESSION, self.config.png_compression])
+                if ok:
+                    self._append(RecordedFrame(timestamp, region, encoded.tobytes()))
+            finally:
+                self._pending.task_done()
+
+    def _append(self, recorded: RecordedFrame):
+        with self._lock:
+            self._frames.append(recorded)
+            self._total_bytes += len(recorded.encoded)
+            while self._frames and (self._total_bytes > self.config.max_bytes
+                                    or len(self._frames) > self.config.max_frames):
+                self._total_bytes -= len(self._frames.popleft().encoded)
+
+
+RECORDER = FrameRingBuffer()
+
+
+def install():
+    """공용 링 버퍼를 캡처 레이어에 연결합니다. 이후 모든 캡처가 자동으로 기록됩니다."""
+    if FRAME_RECORDER_CONFIG.enabled:
+        screen_capture.add_frame_observer(RECORDER.record)
+
+
+def dump_frames_on_failure(name: str) -> Callable:
+    """데코레이트한 작업이 False를 반환하면(사용자 중단 제외) 최근 프레임을 디스크에 기록합니다."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if result is False and not current_token().is_cancelled():
+                RECORDER.dump(name)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def load_dump(dump_dir: Path) -> Tuple[List[ReplayFrame], Optional[Tuple[int, int]]]:
+    """dump()로 기록한 폴더를 재생용 프레임 리스트와 당시 화면 크기로 읽어옵니다."""
+    metadata = json.loads((dump_dir / METADATA_FILENAME).read_text(encoding="utf-8"))
+    frames = []
+    for entry in metadata["frames"]:
+        image = cv2.imdecode(np.fromfile(str(dump_dir / entry["file"]), dtype=np.uint8), cv2.IMREAD_COLOR)
+        left, top, _, _ = entry["region"]
+        frames.append(ReplayFrame(image=image, origin=(left, top), timestamp=entry["timestamp"],
+                                  label=entry["file"]))
+    screen_size = tuple(metadata["screen_size"]) if metadata.get("screen_size") else None
+    return frames, screen_size
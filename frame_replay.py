@@ -0,0 +1,78 @@
+# frame_replay.py
+"""
+frame_recorder가 실패 시점에 저장한 프레임들에 대해 screen_utils 탐색을 오프라인으로 다시 실행합니다.
+게임 없이 (리눅스 헤드리스 포함) 실패 원인을 확인하고 탐색 시간을 측정할 수 있습니다.
+
+실행 (프로젝트 루트에서):
+    python frame_replay.py logs/frame_dumps/<폴더>
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import screen_capture
+import screen_utils
+from config import (GLOBAL_CONFIDENCE, INVEN_CONFIG, INVEN_SCAN_TARGET_IMAGE_PATH, PAYMENT_IMAGE_PATH,
+                    POST_CONFIG, RECEIPT_IMAGE_PATH, SEND_CHECK1_IMAGE_PATH, SEND_CHECK2_IMAGE_PATH, ASSETS_DIR)
+from frame_recorder import load_dump
+from grid_cell_utils import get_grid_cell_coords, scan_grid_for_image
+
+FULL_SCREEN_LOOKUPS = [
+    POST_CONFIG.base_image_path,
+    INVEN_CONFIG.base_image_path,
+    SEND_CHECK1_IMAGE_PATH,
+    SEND_CHECK2_IMAGE_PATH,
+    RECEIPT_IMAGE_PATH,
+    PAYMENT_IMAGE_PATH,
+    ASSETS_DIR / "nomore.png",
+]
+
+
+def _timed(func: Callable[[], object]) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def replay_frame() -> List[str]:
+    """현재 재생 중인 프레임 하나에 대해 표준 탐색들을 실행하고 결과 줄을 반환합니다."""
+    lines = []
+    for image_path in FULL_SCREEN_LOOKUPS:
+        location, elapsed = _timed(lambda: screen_utils.find_image_on_screen(image_path, GLOBAL_CONFIDENCE))
+        lines.append(f"    {image_path.name:<16} {elapsed:8.2f} ms  {location}")
+
+    inven_location: Optional[screen_utils.Box] = screen_utils.find_image_on_screen(
+        INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+    if inven_location:
+        left = inven_location.left + INVEN_CONFIG.grid_offset_x
+        top = inven_location.top + INVEN_CONFIG.grid_offset_y
+        cells = get_grid_cell_coords(left, top, left + INVEN_CONFIG.grid_width, top + INVEN_CONFIG.grid_height,
+                                     INVEN_CONFIG.grid_rows, INVEN_CONFIG.grid_cols)
+        found, elapsed = _timed(lambda: scan_grid_for_image(INVEN_SCAN_TARGET_IMAGE_PATH, cells, GLOBAL_CONFIDENCE))
+        hits = [i for i, loc in enumerate(found) if loc]
+        lines.append(f"    {'inven grid scan':<16} {elapsed:8.2f} ms  셀 {hits}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 실패 프레임 재생 및 탐색 재실행")
+    parser.add_argument("dump_dir", type=Path, help="frame_recorder가 저장한 폴더")
+    args = parser.parse_args()
+
+    frames, screen_size = load_dump(args.dump_dir)
+    backend = screen_capture.ReplayCaptureBackend(frames, screen_size=screen_size)
+    screen_capture.set_backend(backend)
+
+    print(f"'{args.dump_dir}'의 프레임 {len(frames)}장을 재생합니다.")
+    for index, frame in enumerate(frames):
+        backend.seek(index)
+        height, width = frame.image.shape[:2]
+        print(f"\n[{index}] {frame.label} 위치={frame.origin} 크기={width}x{height}")
+        for line in replay_frame():
+            print(line)
+    print(f"\n캡처 통계: {screen_capture.capture_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 # grid_cell_utils.py
 import random
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
 
-import pyautogui
-
-from screen_utils import Box, find_image_in_region
+import input_dispatch
+from screen_utils import Box, find_image_in_cells, iter_image_in_cells
+from tracing import traced
 
 Cell = Tuple[int, int, int, int]
 
@@ -35,19 +35,37 @@ def get_grid_cell_coords(top_left_x: int, top_left_y: int, bottom_right_x: int,
     return grid_cells
 
 
+@traced("grid_scan", "vision")
 def scan_grid_for_image(image_path: Path, grid_cells: List[Cell], confidence: float) -> List[Optional[Box]]:
-    """그리드의 각 셀에서 이미지를 스캔하고, 찾은 위치 또는 None의 리스트를 반환합니다."""
-    results = []
-    for i, (left, top, width, height) in enumerate(grid_cells):
-        region = (left, top, width, height)
-        location = find_image_in_region(image_path, region, confidence)
-        results.append(location)
+    """
+    그리드 전체를 한 번 캡처하여 모든 셀을 한 번에 스캔하고, 찾은 위치 또는 None의 리스트를 반환합니다.
+    """
+    return find_image_in_cells(image_path, grid_cells, confidence)
 
-    return results
 
+def likely_first_order(cell_count: int, likely_indices: Iterable[int] = ()) -> List[int]:
+    """likely_indices(예: 직전에 아이템이 있던 셀)를 먼저, 나머지 셀은 행 우선 순서로 나열한 스캔 순서를 반환합니다."""
+    order = [i for i in dict.fromkeys(likely_indices) if 0 <= i < cell_count]
+    seen = set(order)
+    order.extend(i for i in range(cell_count) if i not in seen)
+    return order
 
-def click_randomly_in_cell(left: int, top: int, width: int, height: int):
-    """지정된 사각형 영역의 중앙 80% 범위 내에서 랜덤한 위치를 클릭합니다."""
+
+def iter_grid_matches(image_path: Path, grid_cells: List[Cell], confidence: float,
+                      order: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, Box]]:
+    """그리드를 한 번 캡처하고 order 순서대로 셀을 매칭하며, 찾은 셀을 (인덱스, Box)로 하나씩 내보냅니다."""
+    return iter_image_in_cells(image_path, grid_cells, confidence, order)
+
+
+@traced("grid_scan", "vision")
+def find_first_in_grid(image_path: Path, grid_cells: List[Cell], confidence: float,
+                       order: Optional[Iterable[int]] = None) -> Optional[Tuple[int, Box]]:
+    """이미지가 있는 첫 번째 셀을 찾는 즉시 (인덱스, Box)를 반환합니다. 없으면 None."""
+    return next(iter_grid_matches(image_path, grid_cells, confidence, order), None)
+
+
+def random_point_in_cell(left: int, top: int, width: int, height: int) -> Tuple[int, int]:
+    """지정된 사각형 영역의 중앙 80% 범위 내에서 랜덤한 좌표를 고릅니다."""
     horizontal_margin = width * 0.2
     vertical_margin = height * 0.2
 
@@ -59,10 +77,13 @@ def click_randomly_in_cell(left: int, top: int, width: int, height: int):
     if x_min >= x_max or y_min >= y_max:
         raise ValueError(f"셀 크기({width}x{height})가 너무 작아 유효한 클릭 영역을 정의할 수 없습니다.")
 
-    click_x = random.randint(x_min, x_max)
-    click_y = random.randint(y_min, y_max)
+    return random.randint(x_min, x_max), random.randint(y_min, y_max)
+
 
-    pyautogui.click(click_x, click_y)
+def click_randomly_in_cell(left: int, top: int, width: int, height: int):
+    """지정된 사각형 영역의 중앙 80% 범위 내에서 랜덤한 위치를 클릭합니다."""
+    click_x, click_y = random_point_in_cell(left, top, width, height)
+    input_dispatch.click(click_x, click_y)
     print(f"클릭: ({click_x}, {click_y}) / 영역: ({left},{top}, {width}x{height}).")
 
 
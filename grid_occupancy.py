@@ -0,0 +1,127 @@
+# grid_occupancy.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import screen_utils
+from config import GRID_OCCUPANCY_CONFIG, OccupancyConfig, WindowConfig
+from image_match import bounding_rect
+
+Cell = Tuple[int, int, int, int]
+
+EMPTY_LABEL = "empty"
+UNKNOWN_LABEL = "unknown"
+
+
+def slice_cells(frame: np.ndarray, origin: Tuple[int, int], cells: Sequence[Cell]) -> np.ndarray:
+    """
+    한 프레임에서 모든 셀을 잘라 (N, H, W, 3) 스택으로 만듭니다.
+    정수 변환으로 셀 크기가 1px씩 다를 수 있으므로 가장 작은 셀 크기에 맞춰 자릅니다.
+    """
+    origin_x, origin_y = origin
+    cell_width = min(c[2] for c in cells)
+    cell_height = min(c[3] for c in cells)
+    return np.stack([
+        frame[top - origin_y:top - origin_y + cell_height, left - origin_x:left - origin_x + cell_width, :3]
+        for left, top, _, _ in cells
+    ])
+
+
+def compute_signatures(stack: np.ndarray, config: OccupancyConfig = GRID_OCCUPANCY_CONFIG) -> np.ndarray:
+    """
+    셀 스택 전체의 축소 색상 히스토그램을 한 번에 계산합니다.
+    반환값은 (N, bins^3) 크기의 정규화된 히스토그램입니다.
+    """
+    bins = config.histogram_bins
+    if not 1 <= bins <= 32:
+        raise ValueError(f"히스토그램 구간 수는 1~32여야 합니다: {bins}")
+    sampled = stack[:, ::config.sample_step, ::config.sample_step]
+    # 256이 bins로 나누어떨어지지 않아도 구간 번호가 bins-1을 넘지 않도록 (값 * bins) >> 8로 나눕니다.
+    # bins <= 32이면 구간 번호와 색 인덱스(최대 bins^3 - 1)가 모두 uint16 안에 들어갑니다.
+    quantized = (sampled.astype(np.uint16) * bins) >> 8
+    color_index = (quantized[..., 0] * bins + quantized[..., 1]) * bins + quantized[..., 2]
+
+    num_cells = stack.shape[0]
+    num_bins = bins ** 3
+    offsets = np.arange(num_cells, dtype=np.intp)[:, None] * num_bins
+    flat = (color_index.reshape(num_cells, -1) + offsets).ravel()
+    counts = np.bincount(flat, minlength=num_cells * num_bins).reshape(num_cells, num_bins)
+    return counts.astype(np.float32) / color_index[0].size
+
+
+class GridOccupancy:
+    """
+    WindowConfig로 정의된 그리드의 각 셀이 비어 있는지, 어떤 아이템이 있는지를 분류합니다.
+    템플릿 매칭 대신 셀별 색상 히스토그램을 기준 시그니처와 비교하므로 그리드 전체를 1ms 이내에 분류합니다.
+    """
+
+    def __init__(self, window_config: WindowConfig, config: OccupancyConfig = GRID_OCCUPANCY_CONFIG):
+        self.window_config = window_config
+        self.config = config
+        self._references: Dict[str, np.ndarray] = {}
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self._references)
+
+    def is_calibrated(self) -> bool:
+        """'비어 있음'과 아이템 기준이 모두 있어야 분류가 의미 있습니다."""
+        return EMPTY_LABEL in self._references and len(self._references) >= 2
+
+    def add_reference(self, label: str, signatures: np.ndarray):
+        """라벨의 기준 시그니처를 추가합니다. 기존 기준이 있으면 평균을 갱신합니다."""
+        mean_signature = signatures.reshape(-1, signatures.shape[-1]).mean(axis=0)
+        if label in self._references:
+            mean_signature = (self._references[label] + mean_signature) / 2
+        self._references[label] = mean_signature
+
+    def calibrate(self, frame: np.ndarray, origin: Tuple[int, int], cells: Sequence[Cell],
+                  labels: Sequence[str]):
+        """라벨이 알려진 프레임(예: 템플릿 매칭 결과)으로 기준 시그니처를 학습합니다."""
+        signatures = compute_signatures(slice_cells(frame, origin, cells), self.config)
+        for label in set(labels):
+            indices = [i for i, cell_label in enumerate(labels) if cell_label == label]
+            self.add_reference(label, signatures[indices])
+
+    def classify(self, frame: np.ndarray, origin: Tuple[int, int], cells: Sequence[Cell]) -> List[str]:
+        """모든 셀을 한 번에 분류하여 셀 순서대로 라벨 리스트를 반환합니다."""
+        if not self._references:
+            return [UNKNOWN_LABEL] * len(cells)
+
+        signatures = compute_signatures(slice_cells(frame, origin, cells), self.config)
+        reference_labels = list(self._references)
+        references = np.stack([self._references[label] for label in reference_labels])
+        distances = np.abs(signatures[:, None, :] - references[None, :, :]).sum(axis=2)
+        nearest = distances.argmin(axis=1)
+        nearest_distance = distances[np.arange(len(cells)), nearest]
+        return [reference_labels[index] if distance <= self.config.max_distance else UNKNOWN_LABEL
+                for index, distance in zip(nearest, nearest_distance)]
+
+    def capture_and_calibrate(self, cells: Sequence[Cell], labels: Sequence[str]) -> bool:
+        """그리드 영역을 한 번 캡처하여 기준 시그니처를 학습합니다."""
+        captured = _capture_cells(cells)
+        if not captured:
+            return False
+        frame, origin = captured
+        self.calibrate(frame, origin, cells, labels)
+        return True
+
+    def capture_and_classify(self, cells: Sequence[Cell]) -> Optional[List[str]]:
+        """그리드 영역을 한 번 캡처하여 모든 셀을 분류합니다. 캡처에 실패하면 None을 반환합니다."""
+        captured = _capture_cells(cells)
+        if not captured:
+            return None
+        frame, origin = captured
+        return self.classify(frame, origin, cells)
+
+
+def _capture_cells(cells: Sequence[Cell]) -> Optional[Tuple[np.ndarray, Tuple[int, int]]]:
+    region = bounding_rect(cells)
+    if screen_utils.clip_region_to_screen(region) != region:
+        print("오류: 그리드 영역 일부가 화면 밖에 있어 셀 분류를 할 수 없습니다.")
+        return None
+    try:
+        return screen_utils.grab_region(region), (region[0], region[1])
+    except Exception as e:
+        print(f"그리드 영역 캡처 중 오류 발생: {e}")
+        return None
@@ -0,0 +1,107 @@
+# image_match.py
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Rect = Tuple[int, int, int, int]
+
+def load_image_bgr(image_path: Path) -> Optional[np.ndarray]:
+    """이미지 파일을 OpenCV 매칭용 BGR 배열로 읽어옵니다. (한글 경로 대응)"""
+    try:
+        data = np.fromfile(str(image_path), dtype=np.uint8)
+    except FileNotFoundError:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def match_template(haystack: np.ndarray, needle: np.ndarray) -> Optional[np.ndarray]:
+    """
+    haystack 전체에 대해 needle의 정규화 상관계수 맵을 한 번에 계산합니다.
+    결과 맵의 (y, x) 값은 needle의 좌상단이 haystack의 (x, y)에 놓였을 때의 유사도입니다.
+    """
+    if haystack.shape[0] < needle.shape[0] or haystack.shape[1] < needle.shape[1]:
+        return None
+    return cv2.matchTemplate(as_bgr(haystack), needle, cv2.TM_CCOEFF_NORMED)
+
+
+def as_bgr(frame: np.ndarray) -> np.ndarray:
+    """캡처 백엔드가 BGRA 버퍼를 반환한 경우 알파 채널을 버린 BGR 배열로 변환합니다."""
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    return frame
+
+
+def best_match(result: np.ndarray, confidence: float) -> Optional[Tuple[int, int]]:
+    """상관계수 맵에서 confidence 이상인 최고점의 (x, y)를 반환합니다."""
+    if result is None or result.size == 0:
+        return None
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    if max_val < confidence:
+        return None
+    return max_loc
+
+
+def top_candidates(result: np.ndarray, threshold: float, max_candidates: int,
+                   suppress_size: Tuple[int, int]) -> List[Tuple[int, int, float]]:
+    """
+    상관계수 맵에서 threshold 이상인 상위 후보를 (x, y, score)로 반환합니다.
+    한 후보를 고르면 그 주변(suppress_size)을 지워 같은 위치가 중복 선택되지 않게 합니다.
+    """
+    scores = result.copy()
+    suppress_width, suppress_height = suppress_size
+    candidates: List[Tuple[int, int, float]] = []
+    for _ in range(max_candidates):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(scores)
+        if max_val < threshold:
+            break
+        candidates.append((x, y, float(max_val)))
+        scores[max(y - suppress_height, 0):y + suppress_height + 1,
+               max(x - suppress_width, 0):x + suppress_width + 1] = -1.0
+    return candidates
+
+
+def best_match_per_cell(result: np.ndarray, origin: Tuple[int, int], cells: Sequence[Rect],
+                        needle_size: Tuple[int, int], confidence: float) -> List[Optional[Rect]]:
+    """
+    그리드 전체 영역에 대해 한 번 계산한 상관계수 맵을 셀 단위로 나누어,
+    각 셀 안에 needle이 완전히 들어가는 위치 중 최고점을 찾습니다.
+    셀마다 따로 매칭한 것과 같은 결과를 (left, top, width, height) 또는 None의 리스트로 반환합니다.
+    """
+    origin_x, origin_y = origin
+    needle_width, needle_height = needle_size
+    results: List[Optional[Rect]] = []
+    for left, top, width, height in cells:
+        # 결과 맵 좌표계에서, needle 좌상단이 셀 안에 머무를 수 있는 범위
+        x0 = max(left - origin_x, 0)
+        y0 = max(top - origin_y, 0)
+        x1 = min(left + width - needle_width - origin_x, result.shape[1] - 1)
+        y1 = min(top + height - needle_height - origin_y, result.shape[0] - 1)
+        if x1 < x0 or y1 < y0:
+            results.append(None)
+            continue
+
+        window = result[y0:y1 + 1, x0:x1 + 1]
+        flat_index = int(np.argmax(window))
+        dy, dx = divmod(flat_index, window.shape[1])
+        if window[dy, dx] < confidence:
+            results.append(None)
+            continue
+        results.append((origin_x + x0 + dx, origin_y + y0 + dy, needle_width, needle_height))
+    return results
+
+
+def frame_digest(frame: np.ndarray, step: int) -> int:
+    """프레임을 step 간격으로 샘플링한 픽셀의 CRC32입니다. 화면 변화 감지용의 저렴한 지문입니다."""
+    return zlib.crc32(np.ascontiguousarray(frame[::step, ::step]).data)
+
+
+def bounding_rect(rects: Sequence[Rect]) -> Rect:
+    """여러 사각형을 모두 포함하는 최소 사각형을 계산합니다."""
+    left = min(r[0] for r in rects)
+    top = min(r[1] for r in rects)
+    right = max(r[0] + r[2] for r in rects)
+    bottom = max(r[1] + r[3] for r in rects)
+    return left, top, right - left, bottom - top
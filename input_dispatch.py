@@ -0,0 +1,323 @@
+# input_dispatch.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import window_context
+from config import INPUT_DELAY_CONFIG, InputDelayConfig
+
+# 화면 좌표를 인자로 받는 이벤트 종류. 조작할 창이 지정된 스레드에서는 창 좌상단 기준 좌표로 해석합니다.
+_POSITIONED_KINDS = ("click", "move", "drag_to")
+
+
+@dataclass(frozen=True)
+class InputEvent:
+    """
+    보낼 입력 이벤트 하나입니다. kind는 click, press, write, hotkey, scroll, move, drag_to, drag_rel 중 하나이며,
+    delay_after는 이 이벤트를 보낸 뒤 다음 이벤트까지 기다릴 시간입니다.
+    """
+    kind: str
+    args: tuple = ()
+    options: Tuple[Tuple[str, object], ...] = ()
+    delay_after: float = 0.0
+
+
+@dataclass
+class DispatchedEvent:
+    """실제로 보낸 이벤트와 그 시각(time.perf_counter 기준)입니다."""
+    event: InputEvent
+    timestamp: float
+    send_seconds: float
+
+
+@dataclass
+class InputKindStats:
+    count: int = 0
+    total_send_seconds: float = 0.0
+    max_send_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        mean = self.total_send_seconds / self.count if self.count else 0.0
+        return {"count": self.count, "mean_send_ms": round(mean * 1000, 3),
+                "max_send_ms": round(self.max_send_seconds * 1000, 3)}
+
+
+class InputBackend:
+    """
+    입력 이벤트를 운영체제로 보내는 백엔드의 공통 인터페이스입니다.
+    send()는 이벤트 목록을 순서대로 보내고, 이벤트마다 지정된 delay_after만큼만 기다립니다.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, InputKindStats] = {}
+        self._lock = threading.Lock()
+
+    def send(self, events: Sequence[InputEvent]):
+        for event in events:
+            start = time.perf_counter()
+            self._send(event)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.stats.setdefault(event.kind, InputKindStats())
+                stats.count += 1
+                stats.total_send_seconds += elapsed
+                stats.max_send_seconds = max(stats.max_send_seconds, elapsed)
+            self._on_sent(event, start, elapsed)
+            if event.delay_after > 0:
+                self._sleep(event.delay_after)
+
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def _send(self, event: InputEvent):
+        raise NotImplementedError
+
+    def _on_sent(self, event: InputEvent, timestamp: float, send_seconds: float):
+        pass
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class PyAutoGuiInputBackend(InputBackend):
+    """pyautogui로 이벤트를 보내되, 호출마다 붙는 전역 PAUSE는 끄고 이벤트별 지연만 적용합니다."""
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def position(self) -> Tuple[int, int]:
+        return tuple(self._pyautogui.position())
+
+    def _send(self, event: InputEvent):
+        pyautogui = self._pyautogui
+        options = dict(event.options)
+        options["_pause"] = False
+        if event.kind == "click":
+            pyautogui.click(*event.args, **options)
+        elif event.kind == "press":
+            pyautogui.press(*event.args, **options)
+        elif event.kind == "write":
+            pyautogui.write(*event.args, **options)
+        elif event.kind == "hotkey":
+            pyautogui.hotkey(*event.args, **options)
+        elif event.kind == "scroll":
+            pyautogui.scroll(*event.args, **options)
+        elif event.kind == "move":
+            pyautogui.moveTo(*event.args, **options)
+        elif event.kind == "drag_to":
+            pyautogui.dragTo(*event.args, **options)
+        elif event.kind == "drag_rel":
+            pyautogui.dragRel(*event.args, **options)
+        else:
+            raise ValueError(f"알 수 없는 입력 이벤트 종류: {event.kind}")
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    이벤트를 실제로 보내지 않고 시각과 함께 기록하는 백엔드입니다. 리눅스 헤드리스에서도 동작합니다.
+    realtime이 False이면 지연 시간을 실제로 기다리지 않고 가상 시계만 진행시켜, 워크플로우의 입력 시간을 빠르게 계산합니다.
+    """
+
+    def __init__(self, realtime: bool = True):
+        super().__init__()
+        self.realtime = realtime
+        self.events: List[DispatchedEvent] = []
+        self._position = (0, 0)
+        self._virtual_offset = 0.0
+        self._event_started = 0.0
+        self._finished = 0.0
+
+    def position(self) -> Tuple[int, int]:
+        return self._position
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._virtual_offset = 0.0
+
+    def kinds(self) -> List[str]:
+        return [dispatched.event.kind for dispatched in self.events]
+
+    def gaps(self) -> Dict[str, List[float]]:
+        """이벤트 종류별로, 그 이벤트와 다음 이벤트 사이의 실제 간격(초) 목록을 반환합니다."""
+        result: Dict[str, List[float]] = {}
+        for current, following in zip(self.events, self.events[1:]):
+            result.setdefault(current.event.kind, []).append(following.timestamp - current.timestamp)
+        return result
+
+    def total_seconds(self) -> float:
+        """첫 이벤트부터 마지막 이벤트의 지연이 끝날 때까지 걸린 (가상) 시간입니다."""
+        if not self.events:
+            return 0.0
+        return self._finished - self.events[0].timestamp
+
+    def send(self, events: Sequence[InputEvent]):
+        super().send(events)
+        self._finished = self._clock()
+
+    def _clock(self) -> float:
+        return time.perf_counter() + self._virtual_offset
+
+    def _send(self, event: InputEvent):
+        self._event_started = self._clock()
+        if event.kind in ("click", "move", "drag_to") and len(event.args) >= 2:
+            self._position = (int(event.args[0]), int(event.args[1]))
+        elif event.kind == "drag_rel" and len(event.args) >= 2:
+            self._position = (self._position[0] + int(event.args[0]), self._position[1] + int(event.args[1]))
+        # 실제 백엔드가 이벤트 안에서 소비하는 시간(키 반복 간격, 마우스 이동 시간)도 같은 방식으로 반영합니다.
+        options = dict(event.options)
+        busy = options.get("duration", 0.0) + options.get("interval", 0.0) * max(
+            options.get("presses", len(event.args[0]) if event.kind == "write" else 1) - 1, 0)
+        if busy > 0:
+            self._sleep(busy)
+
+    def _on_sent(self, event: InputEvent, timestamp: float, send_seconds: float):
+        with self._lock:
+            self.events.append(DispatchedEvent(event, self._event_started, send_seconds))
+
+    def _sleep(self, seconds: float):
+        if self.realtime:
+            time.sleep(seconds)
+        else:
+            self._virtual_offset += seconds
+
+
+class InputBatch:
+    """
+    입력 이벤트를 모았다가 flush()할 때 한 번에 보냅니다. with 블록으로 사용하면 블록이 끝날 때 보냅니다.
+    지연 시간을 생략하면 delays 설정의 종류별 값을 사용합니다.
+    """
+
+    def __init__(self, backend: Optional[InputBackend] = None, delays: InputDelayConfig = INPUT_DELAY_CONFIG):
+        self.backend = backend
+        self.delays = delays
+        self.events: List[InputEvent] = []
+
+    def __enter__(self) -> "InputBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.events.clear()
+
+    def click(self, x: int, y: int, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("click", (x, y), {}, delay, self.delays.click)
+
+    def press(self, key: str, presses: int = 1, interval: float = 0.0, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("press", (key,), {"presses": presses, "interval": interval}, delay, self.delays.press)
+
+    def write(self, text: str, interval: Optional[float] = None, delay: Optional[float] = None) -> "InputBatch":
+        interval = self.delays.write_interval if interval is None else interval
+        return self._add("write", (text,), {"interval": interval}, delay, self.delays.write)
+
+    def hotkey(self, *keys: str, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("hotkey", keys, {}, delay, self.delays.hotkey)
+
+    def scroll(self, amount: int, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("scroll", (amount,), {}, delay, self.delays.scroll)
+
+    def move_to(self, x: int, y: int, duration: float = 0.0, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("move", (x, y), {"duration": duration}, delay, self.delays.move)
+
+    def drag_to(self, x: int, y: int, duration: float = 0.0, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("drag_to", (x, y), {"duration": duration}, delay, self.delays.drag)
+
+    def drag_rel(self, dx: int, dy: int, duration: float = 0.0, delay: Optional[float] = None) -> "InputBatch":
+        return self._add("drag_rel", (dx, dy), {"duration": duration}, delay, self.delays.drag)
+
+    def flush(self):
+        """
+        모은 이벤트를 보냅니다. 여러 창을 동시에 조작할 때는 묶음 하나를 보내는 동안 입력 장치를 독점하고,
+        현재 스레드의 창을 맨 앞으로 가져온 뒤 좌표를 화면 좌표로 옮겨 보냅니다.
+        """
+        events, self.events = self.events, []
+        if not events:
+            return
+        with window_context.input_focus() as target:
+            if target is not None:
+                events = [_to_screen(event, target) for event in events]
+            (self.backend or get_backend()).send(events)
+
+    def _add(self, kind: str, args: tuple, options: dict, delay: Optional[float], default: float) -> "InputBatch":
+        self.events.append(InputEvent(kind, tuple(args), tuple(options.items()),
+                                      default if delay is None else delay))
+        return self
+
+
+def _to_screen(event: InputEvent, target: window_context.WindowTarget) -> InputEvent:
+    if event.kind not in _POSITIONED_KINDS or len(event.args) < 2:
+        return event
+    x, y = target.to_screen_point(event.args[0], event.args[1])
+    return InputEvent(event.kind, (x, y, *event.args[2:]), event.options, event.delay_after)
+
+
+_backend: Optional[InputBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> InputBackend:
+    """현재 입력 백엔드를 반환합니다. 설정되지 않았다면 pyautogui 백엔드를 만듭니다."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = PyAutoGuiInputBackend()
+        return _backend
+
+
+def set_backend(backend: InputBackend):
+    """입력 백엔드를 교체합니다. (예: 기록 백엔드로 헤드리스 실행)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def batch() -> InputBatch:
+    return InputBatch()
+
+
+def input_stats() -> Dict[str, Dict[str, float]]:
+    """현재 백엔드의 이벤트 종류별 전송 비용 통계를 반환합니다."""
+    return {kind: stats.as_dict() for kind, stats in get_backend().stats.items()}
+
+
+# 이벤트 하나를 바로 보내는 단축 함수들입니다.
+
+def click(x: int, y: int, delay: Optional[float] = None):
+    InputBatch().click(x, y, delay).flush()
+
+
+def press(key: str, presses: int = 1, interval: float = 0.0, delay: Optional[float] = None):
+    InputBatch().press(key, presses, interval, delay).flush()
+
+
+def write(text: str, interval: Optional[float] = None, delay: Optional[float] = None):
+    InputBatch().write(text, interval, delay).flush()
+
+
+def hotkey(*keys: str, delay: Optional[float] = None):
+    InputBatch().hotkey(*keys, delay=delay).flush()
+
+
+def scroll(amount: int, delay: Optional[float] = None):
+    InputBatch().scroll(amount, delay).flush()
+
+
+def move_to(x: int, y: int, duration: float = 0.0, delay: Optional[float] = None):
+    InputBatch().move_to(x, y, duration, delay).flush()
+
+
+def drag_to(x: int, y: int, duration: float = 0.0, delay: Optional[float] = None):
+    InputBatch().drag_to(x, y, duration, delay).flush()
+
+
+def drag_rel(dx: int, dy: int, duration: float = 0.0, delay: Optional[float] = None):
+    InputBatch().drag_rel(dx, dy, duration, delay).flush()
@@ -0,0 +1,171 @@
+# inven_map.py
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import GLOBAL_CONFIDENCE, INVEN_CONFIG, WindowConfig
+from grid_cell_utils import scan_grid_for_image
+from grid_occupancy import EMPTY_LABEL, GridOccupancy
+from inven_util import focus_inventory, get_inven_grid_cells, scroll_limit_agrees, scroll_to_top
+from scroll_tracker import INVEN_SCROLL, ScrollState, ScrollTracker
+from screen_utils import find_image_in_cells
+
+Cell = Tuple[int, int, int, int]
+# 인벤토리 전체 내용 기준의 (행, 열). 스크롤 위치와 무관하게 같은 칸을 가리킵니다.
+Slot = Tuple[int, int]
+
+
+class InventoryMap:
+    """
+    인벤토리의 모든 스크롤 페이지를 한 번 스캔해 아이템이 있는 칸을 기록해 두는 모델입니다.
+    칸은 스크롤 위치와 무관한 (행, 열)로 저장하므로 페이지가 겹쳐 보여도 같은 칸이 두 번 기록되지 않습니다.
+    아이템을 옮긴 뒤에는 옮긴 칸만 다시 확인해 갱신하므로, 이후 배송 세트는 스크롤이나 재스캔 없이 다음 아이템 위치를 압니다.
+    """
+
+    def __init__(self, item_image_path: Path, window_config: WindowConfig = INVEN_CONFIG,
+                 scroll: ScrollTracker = INVEN_SCROLL):
+        self.item_image_path = item_image_path
+        self.window_config = window_config
+        self.scroll = scroll
+        self.item_label = item_image_path.stem
+        self.occupancy = GridOccupancy(window_config)
+        self._slots: Dict[Slot, bool] = {}
+        self._built = False
+        # 스크롤 위치를 읽지 못해 보이는 페이지만 기록했다면 False
+        self._complete = False
+        # 마지막으로 확인한 화면 첫 줄의 행 번호 (스크롤 없이 보이는 칸을 계산할 때 사용)
+        self._visible_offset = 0
+
+    @property
+    def rows(self) -> int:
+        return self.window_config.grid_rows
+
+    @property
+    def cols(self) -> int:
+        return self.window_config.grid_cols
+
+    def is_built(self) -> bool:
+        return self._built
+
+    def is_complete(self) -> bool:
+        return self._complete
+
+    def item_count(self) -> int:
+        return sum(self._slots.values())
+
+    def invalidate(self):
+        """인벤토리가 외부에서 바뀌었을 수 있을 때 호출합니다. 다음 사용 시 전체를 다시 스캔합니다."""
+        self._slots.clear()
+        self._built = False
+        self._complete = False
+
+    def build(self) -> bool:
+        """최상단부터 최하단까지 페이지를 넘기며 모든 칸을 스캔합니다. 인벤토리를 찾지 못하면 False."""
+        self.invalidate()
+        state = self.scroll.read()
+        # 스크롤 위치를 읽을 수 있을 때만 최상단부터 기록하고, 아니면 지금 보이는 페이지만 기록합니다.
+        if state:
+            if not scroll_to_top():
+                return False
+            state = self.scroll.read()
+        while True:
+            grid_cells = get_inven_grid_cells(self.window_config)
+            if not grid_cells:
+                return False
+            offset = self._visible_offset = self._row_offset(state)
+            locations = scan_grid_for_image(self.item_image_path, grid_cells, GLOBAL_CONFIDENCE)
+            for index, location in enumerate(locations):
+                self._slots[self._slot(index, offset)] = location is not None
+            if not self.occupancy.is_calibrated():
+                # 템플릿 매칭 결과로 셀 분류기를 보정해 두고, 이동 후 검증은 분류기로 저렴하게 수행합니다.
+                self.occupancy.capture_and_calibrate(
+                    grid_cells, [self.item_label if loc else EMPTY_LABEL for loc in locations])
+
+            if not state or state.at_bottom:
+                break
+            state = self.scroll.scroll_to_page(state.page + 1)
+            if not state:
+                print("경고: 스크롤 위치를 읽을 수 없어 인벤토리 지도를 끝까지 만들지 못했습니다.")
+                break
+
+        self._built = True
+        # 스크롤바가 최하단이라고 읽었더라도 최하단 이미지로 확인되지 않으면 일부만 기록한 것으로 봅니다.
+        self._complete = state is not None and state.at_bottom and scroll_limit_agrees(state, "bottom")
+        print(f"인벤토리 지도: 아이템 {self.item_count()}칸 기록 (전체 {'완료' if self._complete else '일부'}).")
+        return True
+
+    def sources(self, limit: int) -> List[Slot]:
+        """아이템이 있는 칸을 앞에서부터 최대 limit개 반환합니다."""
+        return sorted(slot for slot, has_item in self._slots.items() if has_item)[:max(limit, 0)]
+
+    def show(self, slots: Sequence[Slot]) -> Optional[Tuple[List[Cell], Dict[Slot, int]]]:
+        """
+        slots 중 첫 칸이 보이도록 스크롤하고, (현재 그리드 셀 좌표, 지금 화면에 보이는 칸 → 셀 인덱스)를 반환합니다.
+        스크롤하거나 그리드를 찾지 못하면 None.
+        """
+        if not slots:
+            return None
+        first_row = min(row for row, _ in slots)
+        state = self.scroll.read()
+        if state and not self._is_row_visible(first_row, state):
+            # 스크롤 입력은 마우스 아래의 창으로 가므로, 우편 창을 조작한 뒤라면 인벤토리로 먼저 옮겨야 합니다.
+            if not focus_inventory():
+                return None
+            state = self.scroll.scroll_to_page(self._page_for_row(first_row, state))
+            if not state or not self._is_row_visible(first_row, state):
+                return None
+        grid_cells = get_inven_grid_cells(self.window_config)
+        if not grid_cells:
+            return None
+        self._visible_offset = self._row_offset(state)
+        return grid_cells, self.visible_cells(slots)
+
+    def visible_cells(self, slots: Sequence[Slot]) -> Dict[Slot, int]:
+        """스크롤하지 않고, 마지막으로 확인한 화면에 보이는 칸들을 현재 그리드 셀 인덱스로 변환합니다."""
+        offset = self._visible_offset
+        return {slot: (slot[0] - offset) * self.cols + slot[1] for slot in slots
+                if offset <= slot[0] < offset + self.rows}
+
+    def verify(self, touched: Dict[Slot, int], grid_cells: List[Cell]) -> List[Slot]:
+        """
+        옮긴 칸(touched: 칸 → 현재 셀 인덱스)만 다시 확인해 지도를 갱신하고, 아이템이 아직 남아 있는 칸을 반환합니다.
+        """
+        if not touched:
+            return []
+        indices = list(touched.values())
+        still_there = self._cells_with_item(indices, grid_cells)
+        remaining = []
+        for slot, index in touched.items():
+            has_item = index in still_there
+            self._slots[slot] = has_item
+            if has_item:
+                remaining.append(slot)
+        return remaining
+
+    def _cells_with_item(self, indices: List[int], grid_cells: List[Cell]) -> set:
+        if self.occupancy.is_calibrated():
+            labels = self.occupancy.capture_and_classify(grid_cells)
+            if labels is not None:
+                return {i for i in indices if labels[i] == self.item_label}
+        locations = find_image_in_cells(self.item_image_path, [grid_cells[i] for i in indices], GLOBAL_CONFIDENCE)
+        return {i for i, location in zip(indices, locations) if location is not None}
+
+    def _slot(self, cell_index: int, row_offset: int) -> Slot:
+        row, col = divmod(cell_index, self.cols)
+        return row_offset + row, col
+
+    def _total_rows(self, state: ScrollState) -> int:
+        # 썸 길이는 보이는 행 수가 전체 행 수에서 차지하는 비율입니다.
+        return max(self.rows, round(self.rows * state.track_length / max(state.thumb_length, 1)))
+
+    def _row_offset(self, state: Optional[ScrollState]) -> int:
+        """현재 화면 첫 줄이 전체 내용에서 몇 번째 행인지 계산합니다. 스크롤을 읽을 수 없으면 0으로 봅니다."""
+        if not state:
+            return 0
+        return round(state.fraction * (self._total_rows(state) - self.rows))
+
+    def _is_row_visible(self, row: int, state: ScrollState) -> bool:
+        offset = self._row_offset(state)
+        return offset <= row < offset + self.rows
+
+    def _page_for_row(self, row: int, state: ScrollState) -> int:
+        return min(row // self.rows, state.page_count - 1)
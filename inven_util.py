@@ -1,22 +1,56 @@
 # inven_util.py
-import time
 from typing import Optional, List, Tuple
 from pathlib import Path
 
-import pyautogui
+import cancellation
 import screen_utils
+from anchor_tracker import locate_anchor
 from config import (WindowConfig, ScrollCheckConfig, GLOBAL_CONFIDENCE, CLICK_DELAY_SECONDS, INVEN_SCROLL_CONFIG,
-                    ASSETS_DIR, INVEN_CONFIG)
-from grid_cell_utils import get_grid_cell_coords, click_randomly_in_grid_cell, scan_grid_for_image, \
-    click_randomly_in_cell
+                    ASSETS_DIR, INVEN_CONFIG, INVEN_SCROLLBAR_CONFIG)
+from grid_cell_utils import get_grid_cell_coords, click_randomly_in_grid_cell, click_randomly_in_cell, \
+    find_first_in_grid, likely_first_order
+from scroll_tracker import INVEN_SCROLL, ScrollState, scroll_at
+from window_context import WindowLocal
 
 Cell = Tuple[int, int, int, int]
 
 
+class _ScanStart:
+    """다음 인벤토리 스캔을 시작할 셀. 아이템은 앞에서부터 소모되므로 직전에 사용한 셀 뒤부터 확인합니다."""
+
+    def __init__(self):
+        self.cell = 0
+
+
+# 창마다 인벤토리 내용이 다르므로 시작 셀도 창별로 기억합니다.
+_SCAN_START: _ScanStart = WindowLocal(_ScanStart)
+
+
+def item_scan_order(cell_count: int) -> List[int]:
+    """마지막으로 기록한 시작 셀부터 행 우선으로 확인하고, 앞쪽 셀은 마지막에 확인하는 인벤토리 스캔 순서를 반환합니다."""
+    return likely_first_order(cell_count, range(_SCAN_START.cell, cell_count))
+
+
+def remember_scan_start(cell_index: int):
+    """현재 창의 다음 인벤토리 스캔을 cell_index부터 시작하도록 기록합니다."""
+    _SCAN_START.get().cell = max(cell_index, 0)
+
+
+def _view_has_item(item_image_path: Path) -> bool:
+    """현재 인벤토리 화면에 아이템이 하나라도 있는지, 첫 매칭에서 멈추며 확인합니다."""
+    grid_cells = get_inven_grid_cells(INVEN_CONFIG)
+    if not grid_cells:
+        return False
+    found = find_first_in_grid(item_image_path, grid_cells, GLOBAL_CONFIDENCE, item_scan_order(len(grid_cells)))
+    if found:
+        remember_scan_start(found[0])
+    return found is not None
+
+
 def get_inven_grid_cells(config: WindowConfig) -> Optional[List[Cell]]:
     """인벤토리 그리드 셀 좌표를 계산합니다."""
     print("\n--- 인벤토리(A 그리드) 셀 계산 중 ---")
-    base_location = screen_utils.find_image_on_screen(config.base_image_path, GLOBAL_CONFIDENCE)
+    base_location = locate_anchor(config.base_image_path, GLOBAL_CONFIDENCE)
     if not base_location:
         print("인벤토리 기준 이미지를 찾지 못해 A 그리드 셀을 계산할 수 없습니다.")
         return None
@@ -34,12 +68,12 @@ def get_inven_grid_cells(config: WindowConfig) -> Optional[List[Cell]]:
 def click_inven_grid_cell(cell_index: int, grid_cells: List[Cell]):
     """인벤토리 그리드의 특정 셀을 클릭합니다."""
     click_randomly_in_grid_cell(cell_index, grid_cells)
-    time.sleep(CLICK_DELAY_SECONDS)
+    cancellation.sleep(CLICK_DELAY_SECONDS)
 
 
 def is_scroll_at_limit(config: ScrollCheckConfig, check: str) -> bool:
     """[수정됨] 인벤토리 스크롤이 최상단 또는 최하단에 있는지 확인합니다."""
-    base_location = screen_utils.find_image_on_screen(config.base_image_path, GLOBAL_CONFIDENCE)
+    base_location = locate_anchor(config.base_image_path, GLOBAL_CONFIDENCE)
     if not base_location:
         print(f"스크롤 확인 실패: 기준 이미지 '{config.base_image_path.name}'를 찾을 수 없습니다.")
         return False
@@ -78,52 +112,89 @@ def is_scroll_on_bottom() -> bool:
     return is_scroll_at_limit(INVEN_SCROLL_CONFIG, "bottom")
 
 
+def scroll_limit_agrees(state: ScrollState, check: str) -> bool:
+    """스크롤바로 읽은 끝 여부가 inventop/invenbot 이미지 탐색 결과와 같은지 교차 확인합니다."""
+    claimed = state.at_top if check == "top" else state.at_bottom
+    probed = is_scroll_at_limit(INVEN_SCROLL_CONFIG, check)
+    if claimed != probed:
+        print(f"경고: 스크롤바({claimed})와 '{check}' 이미지 탐색({probed}) 결과가 다릅니다. 스크롤바를 믿지 않습니다.")
+    return claimed == probed
+
+
+def focus_inventory() -> bool:
+    """스크롤 입력이 인벤토리로 가도록 인벤토리 기준 이미지를 클릭합니다. 인벤토리를 찾지 못하면 False."""
+    inven_loc = locate_anchor(INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+    if not inven_loc:
+        print("오류: 인벤토리 창을 찾을 수 없어 스크롤할 수 없습니다.")
+        return False
+    click_randomly_in_cell(inven_loc.left, inven_loc.top, inven_loc.width, inven_loc.height)
+    return True
+
+
 def scroll_to_top() -> bool:
     """인벤토리 스크롤을 최상단으로 올립니다. 성공 시 True, 실패 시 False를 반환합니다."""
     print("인벤토리 스크롤을 최상단으로 이동합니다...")
-    inven_loc = screen_utils.find_image_on_screen(INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-    if not inven_loc:
-        print("오류: 인벤토리 창을 찾을 수 없어 스크롤할 수 없습니다.")
+    if not focus_inventory():
         return False
 
-    click_randomly_in_cell(inven_loc.left, inven_loc.top, inven_loc.width, inven_loc.height)
+    state = INVEN_SCROLL.scroll_to_top()
+    if state and scroll_limit_agrees(state, "top"):
+        print("인벤토리 최상단에 도달했습니다.")
+        return True
 
+    # 스크롤바를 읽을 수 없을 때는 최상단 이미지 탐색으로 확인합니다.
     for _ in range(30):
-        if is_scroll_on_top():
+        if is_scroll_at_limit(INVEN_SCROLL_CONFIG, "top"):
             print("인벤토리 최상단에 도달했습니다.")
             return True
-        pyautogui.scroll(200)
-        time.sleep(0.1)
+        if not scroll_at(INVEN_SCROLLBAR_CONFIG, 200):
+            return False
+        if not cancellation.sleep(0.1):
+            return False
 
     print("경고: 최상단으로 스크롤하지 못했습니다.")
     return False
 
 
 def find_item_by_scrolling(item_image_path: Path) -> bool:
-    """인벤토리를 스크롤하며 특정 아이템을 찾습니다. 찾으면 True, 끝까지 못찾으면 False를 반환합니다."""
+    """인벤토리를 한 페이지씩 넘기며 특정 아이템을 찾습니다. 찾으면 True, 끝까지 못찾으면 False를 반환합니다."""
     if not scroll_to_top():
         return False
 
+    state = INVEN_SCROLL.read()
+    if not state:
+        return _find_item_by_probing(item_image_path)
+
+    page = 0
+    while True:
+        if _view_has_item(item_image_path):
+            print(f"{page + 1}/{state.page_count} 페이지에서 '{item_image_path.name}' 아이템을 발견했습니다.")
+            return True
+        if not scroll_limit_agrees(state, "bottom"):
+            return _find_item_by_probing(item_image_path)
+        if state.at_bottom:
+            print(f"최종적으로 '{item_image_path.name}'을(를) 인벤토리에서 찾지 못했습니다.")
+            return False
+
+        page += 1
+        print(f"아이템 미발견, {page + 1}/{state.page_count} 페이지로 스크롤합니다...")
+        state = INVEN_SCROLL.scroll_to_page(page)
+        if not state:
+            print("경고: 스크롤 위치를 읽을 수 없어 이미지 탐색 방식으로 계속합니다.")
+            return _find_item_by_probing(item_image_path)
+
+
+def _find_item_by_probing(item_image_path: Path) -> bool:
+    """스크롤바를 읽을 수 없을 때, 최하단 이미지 탐색으로 끝을 확인하며 아래로 스크롤해 아이템을 찾습니다."""
     max_scroll_attempts = 30  # 무한 루프 방지
     for i in range(max_scroll_attempts):
-        # 1. 현재 뷰에서 아이템 스캔
-        grid_cells = get_inven_grid_cells(INVEN_CONFIG)
-        if grid_cells:
-            locations = scan_grid_for_image(item_image_path, grid_cells, GLOBAL_CONFIDENCE)
-            if any(loc is not None for loc in locations):
-                print(f"스크롤 중 '{item_image_path.name}' 아이템을 발견했습니다.")
-                return True  # 아이템 찾음, 성공
+        # 1. 현재 뷰에서 아이템 스캔 (하나라도 찾으면 즉시 중단)
+        if _view_has_item(item_image_path):
+            print(f"스크롤 중 '{item_image_path.name}' 아이템을 발견했습니다.")
+            return True  # 아이템 찾음, 성공
 
         # 2. 스크롤하기 전, 최하단인지 먼저 확인
-        if is_scroll_on_bottom():
-            print("인벤토리 최하단입니다. 더 이상 스크롤할 수 없습니다.")
-            # 혹시 모르니 마지막으로 한 번 더 스캔
-            grid_cells = get_inven_grid_cells(INVEN_CONFIG)
-            if grid_cells and any(
-                    loc is not None for loc in scan_grid_for_image(item_image_path, grid_cells, GLOBAL_CONFIDENCE)):
-                print(f"최하단에서 '{item_image_path.name}' 아이템을 발견했습니다.")
-                return True
-
+        if is_scroll_at_limit(INVEN_SCROLL_CONFIG, "bottom"):
             print(f"최종적으로 '{item_image_path.name}'을(를) 인벤토리에서 찾지 못했습니다.")
             return False  # 최하단 도달, 아이템 없음
 
@@ -131,13 +202,14 @@ def find_item_by_scrolling(item_image_path: Path) -> bool:
         print(f"아이템 미발견, 아래로 스크롤합니다... (시도 {i + 1}/{max_scroll_attempts})")
         for _ in range(6):
             # 매 스크롤마다 최하단에 도달했는지 다시 확인하여 불필요한 스크롤 방지
-            if is_scroll_on_bottom():
-                print("스크롤 중 최하단에 도달하여 중단합니다.")
+            if is_scroll_at_limit(INVEN_SCROLL_CONFIG, "bottom"):
                 break
-            pyautogui.scroll(-100)  # 아래로 스크롤
-            time.sleep(0.05)
-
-        time.sleep(0.05)  # 스크롤 후 UI가 안정될 때까지 대기
+            if not scroll_at(INVEN_SCROLLBAR_CONFIG, -100):
+                return False
+            if not cancellation.sleep(0.05):
+                return False
+        if not cancellation.sleep(0.05):  # 스크롤 후 UI가 안정될 때까지 대기
+            return False
 
     print("경고: 최대 스크롤 시도 횟수에 도달했습니다.")
-    return False
\ No newline at end of file
+    return False
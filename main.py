@@ -10,19 +10,22 @@ import tkinter.scrolledtext as scrolledtext
 from tkinter import messagebox
 from tkinter import ttk
 
-import pyautogui
 from pynput import keyboard as pynput_keyboard
 
 # --- 신규/수정된 임포트 ---
 import shared_state
-from config import (GUI_CONFIG, INVEN_CONFIG, PAYMENT_IMAGE_PATH,
-                    POST_CONFIG, RECEIPT_IMAGE_PATH, GLOBAL_CONFIDENCE)
-from delivery import send_action, show_all_overlays_for_debugging
+from config import GUI_CONFIG
+from anchor_tracker import TRACKER
+from cancellation import current_token
+from delivery import show_all_overlays_for_debugging
+from delivery_pipeline import DELIVERY_RUN_WORKFLOW
 from firestore_service import FirestoreService, FirestoreConnectionError
-from grid_cell_utils import click_randomly_in_cell
 from map_util import open_post, open_shop, prepare_and_activate_window
-from post_util import click_receive_button
-import screen_utils
+from multi_window import ORCHESTRATOR
+import frame_recorder
+from receive_engine import RECEIVER
+from template_registry import preload_assets
+from tracing import TRACER
 from window_util import activate_maple_window, remove_window_border, resize_window
 from whisper_service import Whisper, WhisperService
 
@@ -69,8 +72,10 @@ class AutomationApp:
         self.root = root
         app_logger.info("Initializing AutomationApp UI...")
 
-        self.is_f5_loop_running = False
-        self.automation_running = False
+        # 탐색 루프에서 PNG를 다시 읽지 않도록 모든 에셋을 미리 디코딩해 둡니다.
+        preload_assets()
+        # 실패 시 직전 화면을 남길 수 있도록 캡처 프레임 기록을 시작합니다.
+        frame_recorder.install()
 
         self.root.title(GUI_CONFIG.title)
         geometry_string = f"{GUI_CONFIG.initial_width}x{GUI_CONFIG.initial_height}+{GUI_CONFIG.initial_pos_x}+{GUI_CONFIG.initial_pos_y}"
@@ -95,6 +100,7 @@ class AutomationApp:
         self.standard_amount_var = tk.StringVar(value="45000")
         self.express_amount_var = tk.StringVar(value="60000")
         self.run_open_post_after_shop_var = tk.BooleanVar(value=True)
+        self.multi_window_var = tk.BooleanVar(value=False)
 
         self._setup_ui_layout()
         app_logger.info("UI layout setup complete.")
@@ -155,6 +161,8 @@ class AutomationApp:
         self.express_amount_entry = ttk.Entry(amount_frame, textvariable=self.express_amount_var)
         self.express_amount_entry.grid(row=1, column=1, sticky="ew", padx=5)
         amount_frame.columnconfigure(1, weight=1)
+        ttk.Checkbutton(delivery_frame, text="여러 창 동시 실행 (F1 배송 / F12 받기)", variable=self.multi_window_var,
+                        onvalue=True, offvalue=False).pack(fill=tk.X)
 
         quick_copy_frame = ttk.LabelFrame(left_frame, text="빠른 응답 복사", padding=10)
         quick_copy_frame.pack(fill=tk.X, pady=(10, 0), anchor='n')
@@ -194,82 +202,39 @@ class AutomationApp:
             messagebox.showerror("저장 실패", f"DB에 저장하는 중 오류가 발생했습니다:\n{e}")
 
     def _toggle_f5_loop(self):
-        if self.is_f5_loop_running:
+        if shared_state.RECEIVE_JOB.cancel("F12"):
             print("\n[단축키 F12] 아이템 받기 루프 중단 신호를 보냅니다...")
-            self.is_f5_loop_running = False
-        else:
-            print("\n[단축키 F12] 아이템 받기 루프를 시작합니다 (최대 100회)...")
-            self.is_f5_loop_running = True
-            threading.Thread(target=self._run_receive_sequence, daemon=True).start()
-
-    def _run_receive_sequence(self):
-        if not activate_maple_window():
-            self.is_f5_loop_running = False
             return
+        token = shared_state.RECEIVE_JOB.try_start()
+        if token is None:
+            print("\n[단축키 F12] 이전 아이템 받기 루프가 종료되는 중입니다. 잠시 후 다시 시도해주세요.")
+            return
+        print("\n[단축키 F12] 아이템 받기 루프를 시작합니다 (목록이 빌 때까지)...")
+        multi_window = self.multi_window_var.get()
+        threading.Thread(target=shared_state.RECEIVE_JOB.run,
+                         args=(token, lambda: self._run_receive_sequence(multi_window)),
+                         name="receive-loop", daemon=True).start()
+
+    def _run_receive_sequence(self, multi_window: bool = False):
+        if not multi_window and not activate_maple_window():
+            return
+        TRACER.clear()
         try:
-            for i in range(100):
-                if not self.is_f5_loop_running:
-                    print("사용자 요청에 의해 아이템 받기 루프를 중단했습니다.")
-                    break
-                print(f"\n--- 아이템 받기 시작 ({i + 1}/100) ---")
-
-                payment_location = None
-                search_start_time = time.time()
-                post_base_location = screen_utils.find_image_on_screen(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-                if not post_base_location:
-                    print("오류: 우편 창을 찾을 수 없어 루프를 중단합니다.")
-                    break
-
-                search_region = (
-                    post_base_location.left + 152, post_base_location.top + 149,
-                    281 - 152, 430 - 149
-                )
-
-                print(f"'{PAYMENT_IMAGE_PATH.name}' 이미지를 탐색합니다...")
-                while time.time() - search_start_time < 5:
-                    if not self.is_f5_loop_running: break
-                    payment_location = screen_utils.find_image_in_region(PAYMENT_IMAGE_PATH, search_region,
-                                                                         GLOBAL_CONFIDENCE)
-                    if payment_location:
-                        print(f"'{PAYMENT_IMAGE_PATH.name}' 이미지 발견.")
-                        break
-                    time.sleep(0.2)
-
-                if not self.is_f5_loop_running: break
-                if not payment_location:
-                    print("시간 초과: 5초 내에 다음 받을 아이템을 찾지 못해 루프를 종료합니다.")
-                    break
-
-                click_randomly_in_cell(
-                    payment_location.left, payment_location.top,
-                    payment_location.width, payment_location.height
-                )
-                time.sleep(0.1)
-                click_receive_button()
-
-                receipt_found = False
-                receipt_start_time = time.time()
-                print(f"'{RECEIPT_IMAGE_PATH.name}' 이미지를 탐색합니다...")
-                while time.time() - receipt_start_time < 5:
-                    if not self.is_f5_loop_running: break
-                    if screen_utils.find_image_on_screen(RECEIPT_IMAGE_PATH, confidence=GLOBAL_CONFIDENCE):
-                        print(f"'{RECEIPT_IMAGE_PATH.name}' 이미지 발견.")
-                        receipt_found = True
-                        break
-                    time.sleep(0.2)
-
-                if not self.is_f5_loop_running: break
-                if receipt_found:
-                    pyautogui.press('enter')
-                    time.sleep(1.5)
-                else:
-                    print(f"경고: 5초 내에 '{RECEIPT_IMAGE_PATH.name}' 이미지를 찾지 못했습니다.")
+            if multi_window:
+                ORCHESTRATOR.run_receives()
             else:
-                print("\n--- 아이템 받기 100회 루프가 모두 완료되었습니다. ---")
-
+                RECEIVER.run()
         finally:
             print("아이템 받기 작업을 종료합니다.")
-            self.is_f5_loop_running = False
+            self._report_trace("receive")
+
+    @staticmethod
+    def _report_trace(name: str):
+        """작업 하나의 단계별 소요 시간 요약을 출력하고, Chrome trace-event JSON으로 기록합니다."""
+        if not TRACER.spans():
+            return
+        print(f"단계별 소요 시간 ({name}):\n{TRACER.summary()}")
+        TRACER.export_chrome_trace(name)
 
     def _setup_window_preset_f5(self):
         if activate_maple_window():
@@ -277,43 +242,46 @@ class AutomationApp:
             resize_window(1366, 768)
 
     def _handle_hotkey(self, key):
-        if shared_state.ignore_hotkeys:
+        if shared_state.ignore_hotkeys.is_set():
             return
 
         if key == pynput_keyboard.Key.esc:
-            if self.automation_running:
+            # 토큰을 취소하면 진행 중인 모든 대기가 즉시 깨어납니다.
+            if shared_state.AUTOMATION_JOB.cancel("ESC") | shared_state.RECEIVE_JOB.cancel("ESC"):
                 print("\n[중단 신호] ESC 키가 감지되었습니다. 진행 중인 작업을 중단합니다.")
-                shared_state.stop_action = True
             return
 
-        if self.automation_running:
-            print("경고: 다른 자동화 작업이 이미 실행 중입니다. 잠시 후 다시 시도해주세요.")
+        if key == pynput_keyboard.Key.f12:
+            self._toggle_f5_loop()
             return
 
+        jobs = {pynput_keyboard.Key.f1: self._run_delivery,
+                pynput_keyboard.Key.f2: self._run_f2_sequence,
+                pynput_keyboard.Key.f3: lambda: resize_window(1366, 768),
+                pynput_keyboard.Key.f4: lambda: resize_window(1900, 300),
+                pynput_keyboard.Key.f5: self._setup_window_preset_f5}
+        job = jobs.get(key)
+        if job is None:
+            return
+
+        # 실행 중 확인과 실행 표시를 한 번에 처리하므로, 단축키를 연달아 눌러도 작업이 겹쳐 시작되지 않습니다.
+        token = shared_state.AUTOMATION_JOB.try_start()
+        if token is None:
+            print("경고: 다른 자동화 작업이 이미 실행 중입니다. 잠시 후 다시 시도해주세요.")
+            return
         try:
-            if key == pynput_keyboard.Key.f1:
-                self.root.after(0, self._run_delivery)
-            elif key == pynput_keyboard.Key.f2:
-                self.root.after(0, self._run_f2_sequence)
-            elif key == pynput_keyboard.Key.f3:
-                self.root.after(0, lambda: resize_window(1366, 768))
-            elif key == pynput_keyboard.Key.f4:
-                self.root.after(0, lambda: resize_window(1900, 300))
-            elif key == pynput_keyboard.Key.f5:
-                self.root.after(0, self._setup_window_preset_f5)
-            elif key == pynput_keyboard.Key.f12:
-                self._toggle_f5_loop()
+            self.root.after(0, shared_state.AUTOMATION_JOB.run, token, job)
         except Exception as e:
             print(f"단축키 처리 중 오류 발생: {e}")
-            self.automation_running = False
+            shared_state.AUTOMATION_JOB.finish(token)
 
     def _run_f2_sequence(self):
-        self.automation_running = True
-        shared_state.stop_action = False
+        token = current_token()
+        TRACER.clear()
         try:
             print("\n[단축키 F2] 상점/우체통 열기 동작을 실행합니다.")
             open_shop()
-            if shared_state.stop_action:
+            if token.is_cancelled():
                 print("\n사용자 요청에 의해 작업이 중단되었습니다.")
                 return
 
@@ -324,12 +292,11 @@ class AutomationApp:
                 print("\n'우체통 자동 열기' 옵션이 비활성화되어, 창 초기화를 추가로 수행합니다.")
                 prepare_and_activate_window("창 초기화")
 
-            if not shared_state.stop_action:
+            if not token.is_cancelled():
                 print("\n[단축키 F2] 동작이 완료되었습니다.")
 
         finally:
-            self.automation_running = False
-            shared_state.stop_action = False
+            self._report_trace("open_shop_post")
 
     def _setup_hotkeys(self):
         self.hotkey_listener = pynput_keyboard.Listener(on_press=self._handle_hotkey)
@@ -367,25 +334,8 @@ class AutomationApp:
         self.receiver_var.set(nickname)
 
     def _run_delivery(self):
-        self.automation_running = True
-        shared_state.stop_action = False
+        TRACER.clear()
         try:
-            print("F1 조건 확인: post.png와 inven.png를 찾습니다...")
-            post_loc = screen_utils.find_image_on_screen(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-            inven_loc = screen_utils.find_image_on_screen(INVEN_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-            if not post_loc or not inven_loc:
-                messagebox.showwarning("이미지 없음", "'post.png' 또는 'inven.png'를 화면에서 찾을 수 없습니다.")
-                return
-
-            x_diff = abs(post_loc.left - inven_loc.left)
-            if x_diff < 845:
-                pyautogui.moveTo(inven_loc.left + inven_loc.width / 2, inven_loc.top + inven_loc.height / 2,
-                                 duration=0.2)
-                pyautogui.dragRel(150, 0, duration=0.5)
-                time.sleep(0.3)
-
-            if not activate_maple_window(): return
-
             num_sets = self.set_count_var.get()
             delivery_type = self.delivery_type_var.get()
             receiver_name = self.receiver_var.get()
@@ -395,28 +345,50 @@ class AutomationApp:
                 messagebox.showwarning("입력 오류", "수신인과 금액을 올바르게 입력해주세요.")
                 return
 
-            print(f"총 {num_sets}세트 발송을 시작합니다. 수신인: {receiver_name}")
-
-            for i in range(num_sets):
-                if shared_state.stop_action:
-                    print("\n사용자 요청에 의해 배송 작업을 중단합니다.")
-                    break
-                print(f"\n--- {i + 1}/{num_sets} 세트 발송 중 ---")
-                success = send_action(delivery_type, receiver_name, amount)
-                if not success:
-                    if not shared_state.stop_action:
-                        print("배송 실패(재고 부족 또는 오류 발생). F2(상점 열기) 동작을 실행하고 모든 발송을 중단합니다.")
-                        open_shop()
-                    return
-                if i < num_sets - 1:
-                    time.sleep(0.5)
-
-            if not shared_state.stop_action:
+            if self.multi_window_var.get():
+                self._run_multi_window_delivery(num_sets, delivery_type, receiver_name, amount)
+                return
+
+            print(f"F1 조건 확인 후 총 {num_sets}세트 발송을 시작합니다. 수신인: {receiver_name}")
+            result = DELIVERY_RUN_WORKFLOW.run({"num_sets": num_sets, "delivery_type": delivery_type,
+                                                "receiver_name": receiver_name, "amount": amount})
+            if result.failed_step == "find_windows":
+                messagebox.showwarning("이미지 없음", "'post.png' 또는 'inven.png'를 화면에서 찾을 수 없습니다.")
+                return
+            if result.failed_step == "deliver":
+                if result.context["report"].failed_step == "fill_post":
+                    print("배송 실패(재고 부족). F2(상점 열기) 동작을 실행하고 모든 발송을 중단합니다.")
+                    open_shop()
+                else:
+                    print("배송 실패: 실패한 단계부터 이어서 실행했지만 복구하지 못해 모든 발송을 중단합니다.")
+                return
+
+            if result.ok and not current_token().is_cancelled():
                 print(f"\n--- 총 {num_sets}세트 발송 작업이 모두 완료되었습니다. ---")
+                print(f"기준 이미지 위치 추적 통계: {TRACKER.stats()}")
 
         finally:
-            self.automation_running = False
-            shared_state.stop_action = False
+            self._report_trace("delivery")
+
+    @staticmethod
+    def _run_multi_window_delivery(num_sets: int, delivery_type: str, receiver_name: str, amount: str):
+        print(f"F1 여러 창 동시 발송: 총 {num_sets}세트를 창마다 나눠 보냅니다. 수신인: {receiver_name}")
+        report = ORCHESTRATOR.run_deliveries(num_sets, delivery_type, receiver_name, amount)
+        if not report.results:
+            messagebox.showwarning("창 없음", "게임 창을 찾을 수 없습니다.")
+            return
+        for client in report.results:
+            result = client.value
+            if client.error or result is None or result.ok:
+                continue
+            if result.failed_step == "find_windows":
+                print(f"[{client.client}] 'post.png' 또는 'inven.png'를 찾을 수 없어 발송하지 않았습니다.")
+            elif result.failed_step == "deliver" and result.context["report"].failed_step == "fill_post":
+                print(f"[{client.client}] 재고 부족으로 발송을 중단했습니다. 이 창에서 상점을 열어 보충해주세요.")
+            else:
+                print(f"[{client.client}] '{result.failed_step}' 단계에서 실패해 발송을 중단했습니다.")
+        if not current_token().is_cancelled():
+            print(f"\n--- 여러 창 발송 완료: {report.units}/{num_sets}세트 ({report.units_per_minute:.1f}세트/분) ---")
 
     def _run_overlay_debug(self):
         if activate_maple_window():
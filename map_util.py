@@ -1,84 +1,53 @@
 # map_util.py
 import random
-import threading
-import time
-from typing import Callable, Optional
+from pathlib import Path
+from typing import Optional
 
-import pyautogui
-import pygetwindow as gw
 from pynput import keyboard as pynput_keyboard
 
+import input_dispatch
 import screen_utils
+from anchor_tracker import invalidate_anchor, locate_anchor
+from cancellation import current_token
+from frame_recorder import dump_frames_on_failure
 # --- 신규/수정된 임포트 ---
 import shared_state
 from config import (ASSETS_DIR, DEWEY_CONFIG, DORAN_CONFIG, GLOBAL_CONFIDENCE,
-                    INVEN_SCAN_TARGET_IMAGE_PATH)
+                    INVEN_SCAN_TARGET_IMAGE_PATH, READINESS_CONFIG)
 from grid_cell_utils import click_randomly_in_cell
-from window_util import activate_maple_window, resize_window
+from shop_buyer import SHOP_BUYER, STOP_ERROR
+from tracing import traced, traced_sleep
+from window_backend import WindowInfo
+from window_util import activate_maple_window, get_window_info, resize_window
+from workflow import Step, Workflow
 
-
-def _interruptible_sleep(duration: float):
-    """shared_state.stop_action 플래그에 의해 중단될 수 있는 time.sleep 버전"""
-    end_time = time.time() + duration
-    while time.time() < end_time:
-        if shared_state.stop_action:
-            break
-        time.sleep(0.1)
-
-
-class ClickBot:
-    def __init__(self, button_pos: tuple[int, int]):
-        self.button_pos = button_pos
-        self._is_running = False
-        self.click_count = 0
-        self._thread = None
-
-    @property
-    def is_running(self) -> bool:
-        return self._is_running
-
-    def _click_worker(self):
-        while self._is_running and not shared_state.stop_action:
-            pyautogui.click(self.button_pos)
-            self.click_count += 1
-        self._is_running = False
-
-    def start(self):
-        if self._thread and self._thread.is_alive(): return
-        self._is_running = True
-        self._thread = threading.Thread(target=self._click_worker, daemon=True)
-        self._thread.start()
-
-    def stop(self) -> int:
-        if not self._is_running: return self.click_count
-        self._is_running = False
-        if self._thread:
-            self._thread.join(timeout=1.0)
-        return self.click_count
+MARKET_IMAGE_PATH = ASSETS_DIR / "market.png"
+VILLAGE_IMAGE_PATH = ASSETS_DIR / "maul.png"
+INVEN_IMAGE_PATH = ASSETS_DIR / "inven.png"
 
 
+@traced()
 def prepare_and_activate_window(sequence_name: str) -> bool:
     if not activate_maple_window(): return False
     print(f"\n--- {sequence_name} 시퀀스 시작 ---")
 
     # [수정] 자동화된 키 입력을 하는 동안 단축키 감지를 비활성화
-    shared_state.ignore_hotkeys = True
+    shared_state.ignore_hotkeys.set()
     try:
-        pyautogui.press('esc', presses=5, interval=0.1)
+        input_dispatch.press('esc', presses=5, interval=0.1)
     finally:
         # 작업이 끝나면 반드시 플래그를 원상 복구
-        shared_state.ignore_hotkeys = False
+        shared_state.ignore_hotkeys.clear()
 
-    _interruptible_sleep(0.2)
+    traced_sleep(0.2)
     return True
 
 
-def _get_target_window_and_check_size(expected_width: int, expected_height: int) -> Optional[gw.Win32Window]:
+def _get_target_window_and_check_size(expected_width: int, expected_height: int) -> Optional[WindowInfo]:
+    # 창 목록을 매번 훑지 않고 window_util의 창 캐시에서 위치/크기를 읽습니다.
     try:
-        window_list = gw.getWindowsWithTitle('MapleStory Worlds-Mapleland')
-        if not window_list: return None
-        window = window_list[0]
-        if window.size == (expected_width, expected_height):
+        window = get_window_info()
+        if window and (window.width, window.height) == (expected_width, expected_height):
             return window
         return None
     except Exception:
@@ -88,14 +57,14 @@ def _get_target_window_and_check_size(expected_width: int, expected_height: int)
 def is_market() -> bool:
     window = _get_target_window_and_check_size(1366, 768)
     if not window: return False
-    return screen_utils.find_image_in_region(ASSETS_DIR / "market.png", region=window.box,
+    return screen_utils.find_image_in_region(MARKET_IMAGE_PATH, region=window.region,
                                              confidence=GLOBAL_CONFIDENCE) is not None
 
 
 def is_village() -> bool:
     window = _get_target_window_and_check_size(1366, 768)
     if not window: return False
-    return screen_utils.find_image_in_region(ASSETS_DIR / "maul.png", region=window.box,
+    return screen_utils.find_image_in_region(VILLAGE_IMAGE_PATH, region=window.region,
                                              confidence=GLOBAL_CONFIDENCE) is not None
 
 
@@ -117,103 +86,126 @@ def click_doran():
     click_npc(DORAN_CONFIG)
 
 
-def _wait_for_map_change(check_function: Callable[[], bool], timeout: int = 30) -> bool:
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if shared_state.stop_action:
-            print("\n작업이 중단되었습니다.")
-            return False
-        if check_function():
-            return True
-        time.sleep(1)
-    return False
+@traced()
+def _click_npc_and_wait(npc_config, timeout: float):
+    """NPC를 클릭하고, 대화창이 그려져 창 화면이 바뀐 뒤 안정될 때까지 최대 timeout초 기다립니다."""
+    window = _get_target_window_and_check_size(1900, 300)
+    region = window.region if window else None
+    before = screen_utils.region_digest(region)
+    click_npc(npc_config)
+    screen_utils.wait_until_stable(region, timeout=timeout, changed_from=before)
+
+
+def _wait_for_map_change(map_image_path: Path, timeout: int = 30) -> bool:
+    """맵 표식 이미지가 게임 창 안에 나타날 때까지, 화면이 바뀔 때만 매칭하며 기다립니다."""
+    window = _get_target_window_and_check_size(1366, 768)
+    if not window: return False
+    location = screen_utils.wait_for_image(map_image_path, region=window.region, timeout=timeout,
+                                           confidence=GLOBAL_CONFIDENCE)
+    if current_token().is_cancelled():
+        print("\n작업이 중단되었습니다.")
+        return False
+    return location is not None
 
 
 def _move_map():
-    pyautogui.press('up')
-    _interruptible_sleep(0.2)
+    input_dispatch.press('up')
+    traced_sleep(0.2)
 
 
+@traced()
 def goto_village():
     if is_village(): return
-    _move_map()
-    _wait_for_map_change(is_village)
+    _goto_map(VILLAGE_IMAGE_PATH)
 
 
+@traced()
 def goto_market():
     if is_market(): return
+    _goto_map(MARKET_IMAGE_PATH)
+
+
+def _resize_and_settle(width: int, height: int, timeout: float) -> bool:
+    """창 크기를 바꾸고 화면이 안정되길 기다립니다. 화면이 계속 움직여 안정 대기가 시간 초과되더라도 크기만 맞으면 성공입니다."""
+    resize_window(width, height, ready_timeout=timeout)
+    return _get_target_window_and_check_size(width, height) is not None
+
+
+def _goto_map(map_image_path: Path) -> bool:
     _move_map()
-    _wait_for_map_change(is_market)
-
-
-def open_shop():
-    if not prepare_and_activate_window("상점 열기"): return
-    if shared_state.stop_action: return
-    goto_market()
-    if shared_state.stop_action: return
-    resize_window(1900, 300)
-    _interruptible_sleep(1)
-    if shared_state.stop_action: return
-    click_doran()
-    _interruptible_sleep(1)
-    if shared_state.stop_action: return
-    resize_window(1366, 768)
-    _interruptible_sleep(1)
-    if shared_state.stop_action: return
+    return _wait_for_map_change(map_image_path)
+
 
+def _select_shop_item(context) -> bool:
+    """상점 목록에서 구매할 아이템을 눌러 선택하고, 선택 표시가 그려질 때까지 잠깐 기다립니다."""
     search_region = (350, 300, 250, 300)
     cider_location = screen_utils.find_image_in_region(INVEN_SCAN_TARGET_IMAGE_PATH, region=search_region,
                                                        confidence=GLOBAL_CONFIDENCE)
-    if not cider_location: return
+    if not cider_location: return False
+    before = screen_utils.region_digest(search_region)
     click_randomly_in_cell(cider_location.left, cider_location.top, cider_location.width, cider_location.height)
-    _interruptible_sleep(0.5)
-
-    buy_button_pos = (603, 206)
-    nomore_image_path = ASSETS_DIR / "nomore.png"
-    click_bot = ClickBot(button_pos=buy_button_pos)
-    click_bot.start()
-
-    nomore_search_region = (390, 90, 165, 62)
-    start_time = time.time()
-    while time.time() - start_time < 30:
-        if shared_state.stop_action: break
-        if screen_utils.find_image_in_region(nomore_image_path, region=nomore_search_region,
-                                             confidence=GLOBAL_CONFIDENCE): break
-        time.sleep(0.1)
-
-    click_bot.stop()
-
-
-def open_post():
-    if not prepare_and_activate_window("우체통 열기"): return
-    if shared_state.stop_action: return
-    goto_village()
-    if shared_state.stop_action: return
-    resize_window(1900, 300)
-    _interruptible_sleep(1.5)
-    if shared_state.stop_action: return
-    click_dewey()
-    _interruptible_sleep(1.5)
-    if shared_state.stop_action: return
-    resize_window(1366, 768)
-    _interruptible_sleep(1.5)
-
-    inven_image_path = ASSETS_DIR / "inven.png"
-    start_time = time.time()
-    inventory_opened = False
-    while time.time() - start_time < 10:
-        if shared_state.stop_action: break
-        inven_location = screen_utils.find_image_on_screen(inven_image_path, confidence=GLOBAL_CONFIDENCE)
-        if inven_location:
-            inventory_opened = True
-            break
-        pyautogui.press('i')
-        _interruptible_sleep(1)
-
-    if not inventory_opened or shared_state.stop_action: return
-
-    if inven_location:
-        start_x = random.randint(inven_location.left, inven_location.left + inven_location.width)
-        start_y = random.randint(inven_location.top, inven_location.top + inven_location.height)
-        pyautogui.moveTo(start_x, start_y)
-        pyautogui.dragTo(start_x + 200, start_y, duration=0.5)
\ No newline at end of file
+    screen_utils.wait_until_stable(search_region, timeout=READINESS_CONFIG.shop_select_timeout, changed_from=before)
+    return True
+
+
+def _buy(context) -> bool:
+    context["buy_report"] = SHOP_BUYER.run()
+    return context["buy_report"].stopped_by != STOP_ERROR
+
+
+def _open_inventory(context) -> bool:
+    input_dispatch.press('i')
+    # 인벤토리 창이 뜨는 즉시 다음 확인으로 넘어갑니다.
+    return screen_utils.wait_for_image(INVEN_IMAGE_PATH, timeout=1, confidence=GLOBAL_CONFIDENCE) is not None
+
+
+def _move_inventory_aside(context):
+    """우편 창과 겹치지 않도록 인벤토리 창을 오른쪽으로 끌어 옮깁니다."""
+    inven_location = locate_anchor(INVEN_IMAGE_PATH, confidence=GLOBAL_CONFIDENCE)
+    if not inven_location: return False
+    start_x = random.randint(inven_location.left, inven_location.left + inven_location.width)
+    start_y = random.randint(inven_location.top, inven_location.top + inven_location.height)
+    with input_dispatch.batch() as drag:
+        drag.move_to(start_x, start_y).drag_to(start_x + 200, start_y, duration=0.5)
+    invalidate_anchor(INVEN_IMAGE_PATH)
+    return True
+
+
+OPEN_SHOP_WORKFLOW = Workflow("open_shop", [
+    Step("activate", lambda context: prepare_and_activate_window("상점 열기")),
+    Step("goto_market", lambda context: _goto_map(MARKET_IMAGE_PATH), done=lambda context: is_market()),
+    Step("shrink_window", lambda context: _resize_and_settle(1900, 300, READINESS_CONFIG.shop_resize_timeout),
+         retries=1),
+    Step("talk_to_npc", lambda context: _click_npc_and_wait(DORAN_CONFIG, READINESS_CONFIG.shop_dialog_timeout)),
+    Step("restore_window", lambda context: _resize_and_settle(1366, 768, READINESS_CONFIG.shop_resize_timeout),
+         retries=1),
+    Step("select_item", _select_shop_item, retries=2),
+    Step("buy", _buy),
+])
+
+OPEN_POST_WORKFLOW = Workflow("open_post", [
+    Step("activate", lambda context: prepare_and_activate_window("우체통 열기")),
+    Step("goto_village", lambda context: _goto_map(VILLAGE_IMAGE_PATH), done=lambda context: is_village()),
+    Step("shrink_window", lambda context: _resize_and_settle(1900, 300, READINESS_CONFIG.post_resize_timeout),
+         retries=1),
+    Step("talk_to_npc", lambda context: _click_npc_and_wait(DEWEY_CONFIG, READINESS_CONFIG.post_dialog_timeout)),
+    Step("restore_window", lambda context: _resize_and_settle(1366, 768, READINESS_CONFIG.post_resize_timeout),
+         retries=1),
+    # 10초 동안 'i'를 눌러 가며 인벤토리 창을 엽니다. (시도마다 최대 1초 대기)
+    Step("open_inventory", _open_inventory,
+         done=lambda context: locate_anchor(INVEN_IMAGE_PATH, confidence=GLOBAL_CONFIDENCE) is not None, retries=9),
+    Step("move_inventory", _move_inventory_aside),
+])
+
+
+def open_shop() -> bool:
+    result = OPEN_SHOP_WORKFLOW.run()
+    print(f"상점 열기 결과: {result.as_dict()}")
+    return result.ok
+
+
+@dump_frames_on_failure("open_post")
+def open_post() -> bool:
+    result = OPEN_POST_WORKFLOW.run()
+    print(f"우체통 열기 결과: {result.as_dict()}")
+    return result.ok
@@ -0,0 +1,96 @@
+# match_executor.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+import window_context
+from config import MATCH_WORKERS
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class MatchTimingReport:
+    """한 번의 map() 호출에 대한 작업별 소요 시간 보고서입니다."""
+    name: str
+    task_seconds: List[float] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        total = sum(self.task_seconds)
+        return {
+            "tasks": len(self.task_seconds),
+            "wall_ms": round(self.wall_seconds * 1000, 3),
+            "task_total_ms": round(total * 1000, 3),
+            "task_max_ms": round(max(self.task_seconds, default=0.0) * 1000, 3),
+            # 작업 시간 합 / 실제 경과 시간: 병렬화로 얻은 배율
+            "parallelism": round(total / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+        }
+
+
+class MatchExecutor:
+    """
+    서로 독립적인 매칭 작업(그리드 행, 여러 템플릿 등)을 제한된 스레드 풀로 나눠 실행합니다.
+    OpenCV 매칭은 GIL을 놓기 때문에 여러 코어에서 동시에 수행됩니다. 결과는 입력 순서대로 모읍니다.
+    """
+
+    def __init__(self, max_workers: int = MATCH_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reports: Dict[str, MatchTimingReport] = {}
+
+    def map(self, func: Callable[[T], R], items: Iterable[T], name: str = "match") -> List[R]:
+        """items 각각에 func를 병렬로 적용하고 결과를 입력 순서대로 반환합니다."""
+        items = list(items)
+        # 작업 안에서 캡처하더라도 호출한 스레드와 같은 창을 기준으로 하도록 창 정보를 넘깁니다.
+        func = window_context.bind(func)
+        report = MatchTimingReport(name=name, task_seconds=[0.0] * len(items))
+
+        def timed(index_and_item):
+            index, item = index_and_item
+            start = time.perf_counter()
+            try:
+                return func(item)
+            finally:
+                report.task_seconds[index] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self.max_workers == 1 or len(items) <= 1:
+            results = [timed(pair) for pair in enumerate(items)]
+        else:
+            results = list(self._get_pool().map(timed, enumerate(items)))
+        report.wall_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.reports[name] = report
+        return results
+
+    def report(self, name: str) -> Optional[Dict[str, float]]:
+        """이름별 마지막 실행의 작업 시간 보고서를 반환합니다."""
+        with self._lock:
+            report = self.reports.get(name)
+        return report.as_dict() if report else None
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="match")
+            return self._pool
+
+
+EXECUTOR = MatchExecutor()
+
+
+def parallel_map(func: Callable[[T], R], items: Iterable[T], name: str = "match") -> List[R]:
+    """공용 실행기로 매칭 작업을 병렬 실행합니다."""
+    return EXECUTOR.map(func, items, name)
@@ -0,0 +1,221 @@
+# multi_window.py
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import screen_capture
+import screen_utils
+import window_backend
+import window_context
+from cancellation import CancellationToken, current_token
+from config import MULTI_WINDOW_CONFIG, READINESS_CONFIG, WINDOW_TITLE, MultiWindowConfig
+from delivery_pipeline import DELIVERY_RUN_WORKFLOW
+from receive_engine import RECEIVER
+from tracing import span
+from window_backend import WindowInfo
+from window_context import WindowTarget
+from workflow import WorkflowResult
+
+
+@dataclass
+class ClientResult:
+    """창 하나에서 실행한 작업의 결과입니다. units는 처리한 작업 단위 수(발송 세트, 받은 우편 등)입니다."""
+    client: str
+    value: object = None
+    units: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class MultiRunReport:
+    """여러 창에서 동시에 실행한 작업 한 번의 결과입니다."""
+    name: str
+    results: List[ClientResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def units(self) -> int:
+        return sum(result.units for result in self.results)
+
+    @property
+    def units_per_minute(self) -> float:
+        return self.units / self.seconds * 60 if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"name": self.name, "clients": len(self.results), "units": self.units,
+                "seconds": round(self.seconds, 2), "units_per_minute": round(self.units_per_minute, 1),
+                "per_client": {result.client: result.units for result in self.results},
+                "errors": {result.client: result.error for result in self.results if result.error}}
+
+
+class GameClient:
+    """
+    게임 창 하나와 그 창 전용 작업 스레드입니다. 제출한 작업은 이 창을 current_target()으로 둔 채 실행되므로,
+    캡처 영역과 입력 좌표는 창 좌상단 기준으로 해석되고 기준 이미지 위치, 인벤토리 지도, 받기 엔진은 창별 인스턴스를 씁니다.
+    """
+
+    def __init__(self, name: str, info: WindowInfo, activate_timeout: float):
+        self.name = name
+        self.target = WindowTarget(name, info.handle, info.region, activate_timeout)
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    @property
+    def handle(self) -> int:
+        return self.target.handle
+
+    def submit(self, job: Callable[[], object], token: CancellationToken) -> "Future[Tuple[object, float]]":
+        """job을 이 창의 작업 스레드에서 실행하고 (결과, 소요 시간)을 돌려줄 Future를 반환합니다."""
+
+        def run():
+            start = time.perf_counter()
+            with token.activate(), self.target.activate(), span("client_job", "workflow", client=self.name):
+                return job(), time.perf_counter() - start
+
+        return self._worker.submit(run)
+
+    def close(self):
+        self._worker.shutdown(wait=False)
+
+
+class MultiWindowOrchestrator:
+    """
+    제목이 같은 게임 창을 모두 찾아 창마다 작업 스레드를 두고, 배송과 우편 받기를 여러 창에 나눠 동시에 실행합니다.
+    마우스/키보드는 하나이므로 입력 묶음은 창 사이에서 차례로 보내지만(window_context.input_focus),
+    확인 창이나 영수증 창을 기다리는 동안 다른 창이 입력을 보낼 수 있어 대기 시간이 창 수만큼 겹칩니다.
+    """
+
+    def __init__(self, config: MultiWindowConfig = MULTI_WINDOW_CONFIG, title: str = WINDOW_TITLE):
+        self.config = config
+        self.title = title
+        self.clients: List[GameClient] = []
+        self._next_index = 1
+        self._lock = threading.Lock()
+
+    def discover(self) -> List[GameClient]:
+        """
+        창 목록을 새로 읽어 창마다 GameClient를 준비합니다. 이미 알던 창은 창별 상태를 그대로 유지하고,
+        닫힌 창의 작업 스레드와 창별 상태는 정리합니다. config.arrange가 켜져 있으면 창을 바둑판으로 배치하고,
+        화면에 겹치지 않게 놓을 수 있는 수보다 창이 많으면 나머지 창은 사용하지 않습니다.
+        """
+        windows = sorted(window_backend.get_backend().list_windows(self.title), key=lambda window: window.handle)
+        limit = self.config.max_clients
+        if self.config.arrange:
+            columns, rows = self._grid()
+            if len(windows) > columns * rows:
+                print(f"경고: 창 {len(windows)}개 중 화면에 겹치지 않게 놓을 수 있는 {columns * rows}개만 사용합니다.")
+            limit = min(limit, columns * rows)
+        windows = windows[:limit]
+        with self._lock:
+            known = {client.handle: client for client in self.clients}
+            clients = []
+            for info in windows:
+                client = known.pop(info.handle, None)
+                if client is None:
+                    client = GameClient(f"client-{self._next_index}", info, self.config.activate_timeout)
+                    self._next_index += 1
+                else:
+                    client.target.move(info.region)
+                clients.append(client)
+            for closed in known.values():
+                closed.close()
+                window_context.discard_window(closed.handle)
+            self.clients = clients
+
+        print(f"'{self.title}' 창 {len(clients)}개를 찾았습니다: {[client.name for client in clients]}")
+        if self.config.arrange and clients:
+            self.arrange()
+        return clients
+
+    def _grid(self) -> Tuple[int, int]:
+        """화면에 client_width x client_height 창을 겹치지 않게 놓을 수 있는 (열 수, 행 수)입니다."""
+        screen_width, screen_height = screen_capture.get_backend().screen_size()
+        return (max(1, screen_width // self.config.client_width),
+                max(1, screen_height // self.config.client_height))
+
+    def arrange(self):
+        """
+        창을 화면 좌상단부터 client_width x client_height 크기의 바둑판으로 겹치지 않게 배치합니다.
+        가려진 창은 화면을 올바르게 읽지 못하므로, 바둑판에 들어가지 않는 창이 있으면 배치하지 않고 ValueError를 냅니다.
+        """
+        width, height = self.config.client_width, self.config.client_height
+        columns, rows = self._grid()
+        if len(self.clients) > columns * rows:
+            raise ValueError(f"화면에 {width}x{height} 창은 {columns * rows}개까지만 겹치지 않게 놓을 수 있습니다: "
+                             f"{len(self.clients)}개")
+        backend = window_backend.get_backend()
+        for index, client in enumerate(self.clients):
+            left, top = (index % columns) * width, (index // columns) * height
+            if client.target.region == (left, top, width, height):
+                continue
+            if backend.move_resize(client.handle, left, top, width, height):
+                client.target.move((left, top, width, height))
+                # 기준 이미지 위치는 창 기준 좌표로 기억하므로 창을 옮겨도 버릴 필요가 없습니다.
+                with client.target.activate():
+                    screen_utils.wait_until_stable(timeout=READINESS_CONFIG.post_resize_timeout)
+
+    def run_all(self, name: str, jobs: Dict[GameClient, Callable[[], object]],
+                count: Callable[[object], int] = lambda value: 0) -> MultiRunReport:
+        """
+        창마다 주어진 작업을 그 창의 작업 스레드에서 동시에 실행하고 모두 끝날 때까지 기다립니다.
+        각 작업은 현재 작업 토큰의 자식 토큰으로 실행되므로 ESC 한 번으로 모든 창의 작업이 멈춥니다.
+        """
+        parent = current_token()
+        report = MultiRunReport(name)
+        start = time.perf_counter()
+        with span(f"multi_{name}", "workflow", clients=len(jobs)):
+            futures = {client: client.submit(job, parent.child(name=client.name)) for client, job in jobs.items()}
+            for client, future in futures.items():
+                result = ClientResult(client.name)
+                try:
+                    result.value, result.seconds = future.result()
+                    result.units = count(result.value)
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                    print(f"[{client.name}] 작업 중 오류 발생: {e}")
+                report.results.append(result)
+        report.seconds = time.perf_counter() - start
+        print(f"여러 창 {name} 결과: {report.as_dict()}")
+        return report
+
+    def run_deliveries(self, num_sets: int, delivery_type: str, receiver_name: str, amount: str) -> MultiRunReport:
+        """num_sets 세트를 창 수에 맞게 고르게 나눠, 창마다 F1 배송 워크플로우를 동시에 실행합니다."""
+        clients = self.discover()
+        jobs = {}
+        for client, share in zip(clients, _split_evenly(num_sets, len(clients))):
+            if share:
+                context = {"num_sets": share, "delivery_type": delivery_type,
+                           "receiver_name": receiver_name, "amount": amount}
+                jobs[client] = functools.partial(DELIVERY_RUN_WORKFLOW.run, context)
+        return self.run_all("delivery", jobs, _sets_sent)
+
+    def run_receives(self) -> MultiRunReport:
+        """모든 창에서 우편 받기 엔진을 동시에 실행합니다. 창마다 영수증 창 위치를 따로 기억합니다."""
+        clients = self.discover()
+        # RECEIVER는 실행하는 스레드의 창에 따라 인스턴스가 정해지므로, 작업 스레드 안에서 꺼내야 합니다.
+        return self.run_all("receive", {client: lambda: RECEIVER.run() for client in clients},
+                            lambda report: report.parcels)
+
+    def close(self):
+        with self._lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+
+
+def _split_evenly(total: int, parts: int) -> List[int]:
+    if parts <= 0:
+        return []
+    quotient, remainder = divmod(total, parts)
+    return [quotient + (1 if index < remainder else 0) for index in range(parts)]
+
+
+def _sets_sent(result: WorkflowResult) -> int:
+    report = result.context.get("report")
+    return report.sets_sent if report else 0
+
+
+ORCHESTRATOR = MultiWindowOrchestrator()
@@ -1,10 +1,12 @@
 # post_util.py
-import time
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
-import screen_utils
-from config import CLICK_DELAY_SECONDS, DELIVERY_BUTTONS, POST_CONFIG, WindowConfig, GLOBAL_CONFIDENCE
+import cancellation
+from anchor_tracker import locate_anchor
+from config import (CLICK_DELAY_SECONDS, DELIVERY_BUTTONS, POST_CONFIG, POST_DIALOG_AREA, WindowConfig,
+                    GLOBAL_CONFIDENCE)
 from grid_cell_utils import click_randomly_in_cell, get_grid_cell_coords, click_randomly_in_grid_cell
+from screen_utils import Box
 
 Cell = Tuple[int, int, int, int]
 
@@ -12,7 +14,7 @@ Cell = Tuple[int, int, int, int]
 def get_post_grid_cells(config: WindowConfig) -> Optional[List[Cell]]:
     """우편 그리드 셀 좌표를 계산합니다."""
     print(f"\n--- 우편(B 그리드) 셀 계산 중 ---")
-    base_location = screen_utils.find_image_on_screen(config.base_image_path, GLOBAL_CONFIDENCE)
+    base_location = locate_anchor(config.base_image_path, GLOBAL_CONFIDENCE)
     if not base_location:
         print("우편 기준 이미지를 찾지 못해 B 그리드 셀을 계산할 수 없습니다.")
         return None
@@ -30,49 +32,60 @@ def get_post_grid_cells(config: WindowConfig) -> Optional[List[Cell]]:
 def click_post_grid_cell(cell_index: int, b_grid_cells: List[Cell]):
     """우편 그리드의 특정 셀을 클릭합니다."""
     click_randomly_in_grid_cell(cell_index, b_grid_cells)
-    time.sleep(CLICK_DELAY_SECONDS)
+    cancellation.sleep(CLICK_DELAY_SECONDS)
 
 
-def click_delivery_button(button_name: str):
-    """지정된 배송 관련 버튼을 클릭합니다."""
+def click_delivery_button(button_name: str, button_rects: Optional[Dict[str, Cell]] = None):
+    """
+    지정된 배송 관련 버튼을 클릭합니다.
+    button_rects(get_delivery_button_rect_map의 결과)가 주어지면 기준 이미지를 다시 찾지 않고 그 영역을 클릭합니다.
+    """
     if button_name not in DELIVERY_BUTTONS:
         print(f"오류: '{button_name}' 버튼이 config에 정의되지 않았습니다.")
         return
 
-    post_base_location = screen_utils.find_image_on_screen(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-    if not post_base_location:
-        print(f"오류: 우편 창 기준 이미지('{POST_CONFIG.base_image_path.name}')를 찾지 못했습니다.")
-        return
-
-    button_info = DELIVERY_BUTTONS[button_name]
-    btn_x = post_base_location.left + button_info.offset_x
-    btn_y = post_base_location.top + button_info.offset_y
+    if button_rects is None:
+        button_rects = get_delivery_button_rect_map()
+        if not button_rects:
+            print(f"오류: 우편 창 기준 이미지('{POST_CONFIG.base_image_path.name}')를 찾지 못했습니다.")
+            return
 
     print(f"배송 버튼 클릭 시도: '{button_name}'...")
-    click_randomly_in_cell(btn_x, btn_y, button_info.width, button_info.height)
-    time.sleep(CLICK_DELAY_SECONDS)
+    click_randomly_in_cell(*button_rects[button_name])
+    cancellation.sleep(CLICK_DELAY_SECONDS)
+
+
+def get_delivery_button_rect_map(base_location: Optional[Box] = None) -> Optional[Dict[str, Cell]]:
+    """우편 기준 이미지 위치로부터 모든 배송 관련 버튼의 화면 영역을 이름별로 계산합니다."""
+    if base_location is None:
+        base_location = locate_anchor(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+        if not base_location:
+            return None
+    return {name: (base_location.left + info.offset_x, base_location.top + info.offset_y, info.width, info.height)
+            for name, info in DELIVERY_BUTTONS.items()}
+
+
+def get_post_dialog_region(base_location: Optional[Box] = None) -> Optional[Cell]:
+    """우편 창에서 띄우는 확인 창/영수증 창을 찾을 영역을 계산합니다. 우편 창을 찾지 못하면 None(전체 화면)."""
+    if base_location is None:
+        base_location = locate_anchor(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
+        if not base_location:
+            return None
+    return (base_location.left + POST_DIALOG_AREA.offset_x, base_location.top + POST_DIALOG_AREA.offset_y,
+            POST_DIALOG_AREA.width, POST_DIALOG_AREA.height)
 
 
 def get_delivery_button_rects() -> Optional[List[Cell]]:
     """모든 배송 관련 버튼들의 화면 좌표를 계산합니다."""
     print("\n--- 배송 버튼 사각 영역 계산 중 ---")
-    base_location = screen_utils.find_image_on_screen(POST_CONFIG.base_image_path, GLOBAL_CONFIDENCE)
-    if not base_location:
+    button_rect_map = get_delivery_button_rect_map()
+    if not button_rect_map:
         print(f"우편 기준 이미지 ('{POST_CONFIG.base_image_path.name}')를 찾지 못했습니다.")
         return None
 
-    button_rects = []
-    for name, info in DELIVERY_BUTTONS.items():
-        rect = (
-            base_location.left + info.offset_x,
-            base_location.top + info.offset_y,
-            info.width,
-            info.height
-        )
-        button_rects.append(rect)
+    for name, rect in button_rect_map.items():
         print(f"  - 버튼 '{name}' 영역: {rect}")
-
-    return button_rects
+    return list(button_rect_map.values())
 
 
 def click_receive_button():
@@ -0,0 +1,164 @@
+# receive_engine.py
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import input_dispatch
+import screen_utils
+from anchor_tracker import locate_anchor
+from cancellation import current_token
+from config import GLOBAL_CONFIDENCE, READINESS_CONFIG, RECEIVE_CONFIG, ReceiveConfig
+from grid_cell_utils import click_randomly_in_cell
+from post_util import click_delivery_button, get_delivery_button_rect_map, get_post_dialog_region
+from screen_utils import Box
+from tracing import span, traced, traced_sleep
+from window_context import WindowLocal
+
+STOP_EMPTY = "empty"
+STOP_LIMIT = "limit"
+STOP_CANCELLED = "cancelled"
+STOP_NO_POST = "no_post"
+STOP_NO_RECEIPT = "no_receipt"
+
+
+@dataclass
+class ReceiveReport:
+    """우편 받기 한 번의 결과입니다. scans는 목록 전체를 한 프레임으로 훑은 횟수입니다."""
+    parcels: int = 0
+    scans: int = 0
+    receipts_missed: int = 0
+    seconds: float = 0.0
+    stopped_by: str = ""
+
+    @property
+    def parcels_per_minute(self) -> float:
+        return self.parcels / self.seconds * 60 if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"parcels": self.parcels, "scans": self.scans, "receipts_missed": self.receipts_missed,
+                "seconds": round(self.seconds, 2), "parcels_per_minute": round(self.parcels_per_minute, 1),
+                "stopped_by": self.stopped_by}
+
+
+class ReceiveEngine:
+    """
+    우편 목록을 한 번 캡처해 받을 항목(payment.png)을 모두 찾고, 항목마다 선택 → 받기 → 영수증 확인을 쉬지 않고 이어서 처리합니다.
+    받은 항목이 목록에서 빠지며 아래 항목이 올라오더라도 남은 좌표가 어긋나지 않도록 아래 항목부터 처리하고,
+    처리 직전에 그 항목이 아직 있는지 작은 영역만 다시 확인합니다. 영수증 창은 처음 찾은 위치 주변에서만 찾습니다.
+    """
+
+    def __init__(self, config: ReceiveConfig = RECEIVE_CONFIG):
+        self.config = config
+        self.last_report: Optional[ReceiveReport] = None
+        self._receipt_box: Optional[Box] = None
+        self._dialog_region: Optional[Tuple[int, int, int, int]] = None
+
+    @traced("receive", "workflow")
+    def run(self, should_stop: Optional[Callable[[], bool]] = None) -> ReceiveReport:
+        should_stop = should_stop or current_token()
+        report = ReceiveReport()
+        start = time.perf_counter()
+        post_base = locate_anchor(self.config.base_image_path, GLOBAL_CONFIDENCE)
+        if not post_base:
+            print("오류: 우편 창을 찾을 수 없어 받기를 시작하지 않습니다.")
+            report.stopped_by = STOP_NO_POST
+            return self._finish(report, start)
+
+        list_region = (post_base.left + self.config.list_offset_x, post_base.top + self.config.list_offset_y,
+                       self.config.list_width, self.config.list_height)
+        button_rects = get_delivery_button_rect_map(post_base)
+        self._dialog_region = get_post_dialog_region(post_base)
+        misses = 0
+        while not report.stopped_by:
+            if should_stop():
+                report.stopped_by = STOP_CANCELLED
+                break
+            report.scans += 1
+            entries = screen_utils.find_all_in_region(self.config.payment_image_path, list_region, GLOBAL_CONFIDENCE)
+            if not entries:
+                # 목록이 비었으면 새 항목이 들어오길 잠깐 기다립니다.
+                if not screen_utils.wait_for_image(self.config.payment_image_path, list_region,
+                                                   timeout=self.config.empty_list_timeout,
+                                                   confidence=GLOBAL_CONFIDENCE, should_stop=should_stop):
+                    report.stopped_by = STOP_CANCELLED if should_stop() else STOP_EMPTY
+                continue
+
+            print(f"받을 항목 {len(entries)}개를 발견했습니다.")
+            for index, entry in enumerate(reversed(entries)):
+                if should_stop():
+                    report.stopped_by = STOP_CANCELLED
+                    break
+                if self.config.max_parcels and report.parcels >= self.config.max_parcels:
+                    report.stopped_by = STOP_LIMIT
+                    break
+                # 방금 캡처한 프레임의 첫 항목이 아니면, 목록이 바뀌지 않았는지 그 항목 자리만 확인합니다.
+                if index and not self._still_listed(entry):
+                    break
+                if self._receive_one(entry, button_rects, should_stop):
+                    report.parcels += 1
+                    misses = 0
+                    continue
+                if should_stop():
+                    continue
+                report.receipts_missed += 1
+                misses += 1
+                if misses >= self.config.max_consecutive_misses:
+                    print(f"영수증 창이 {misses}회 연속 나타나지 않아 받기를 멈춥니다.")
+                    report.stopped_by = STOP_NO_RECEIPT
+                # 받기가 처리되지 않았을 수 있으므로 목록을 다시 훑습니다.
+                break
+
+        return self._finish(report, start)
+
+    def _receive_one(self, entry: Box, button_rects, should_stop: Callable[[], bool]) -> bool:
+        """항목 하나를 받고 영수증 창을 닫습니다. 영수증 창이 뜨지 않았으면 False."""
+        with span("receive_parcel", "workflow"):
+            click_randomly_in_cell(*entry)
+            traced_sleep(self.config.select_settle)
+            click_delivery_button("receive", button_rects)
+
+            receipt = self._wait_for_receipt(should_stop)
+            if not receipt:
+                if not should_stop():
+                    print(f"경고: {self.config.receipt_timeout}초 내에 "
+                          f"'{self.config.receipt_image_path.name}' 이미지를 찾지 못했습니다.")
+                return False
+            input_dispatch.press('enter')
+            # 고정 대기 대신 영수증 창이 닫히는 즉시 다음 항목으로 넘어갑니다.
+            screen_utils.wait_for_image_to_vanish(self.config.receipt_image_path, tuple(receipt),
+                                                  timeout=READINESS_CONFIG.receipt_close_timeout,
+                                                  should_stop=should_stop)
+            return True
+
+    def _still_listed(self, entry: Box) -> bool:
+        region = (entry.left - 2, entry.top - 2, entry.width + 4, entry.height + 4)
+        return screen_utils.find_image_in_region(self.config.payment_image_path, region, GLOBAL_CONFIDENCE) is not None
+
+    def _wait_for_receipt(self, should_stop: Callable[[], bool]) -> Optional[Box]:
+        """
+        영수증 창을 기다립니다. 처음에는 우편 창 주변만, 위치를 한 번 찾은 뒤로는 그 주변 영역만 캡처해 확인합니다.
+        """
+        region = self._dialog_region
+        if self._receipt_box:
+            margin = self.config.receipt_search_margin
+            box = self._receipt_box
+            region = (box.left - margin, box.top - margin, box.width + 2 * margin, box.height + 2 * margin)
+        location = screen_utils.wait_for_image(self.config.receipt_image_path, region,
+                                               timeout=self.config.receipt_timeout,
+                                               confidence=GLOBAL_CONFIDENCE, should_stop=should_stop)
+        if not location and region and not should_stop():
+            # 창 위치가 바뀌었을 수 있으므로 전체 화면에서 한 번 더 찾습니다.
+            location = screen_utils.find_image_on_screen(self.config.receipt_image_path, GLOBAL_CONFIDENCE)
+        if location:
+            self._receipt_box = location
+        return location
+
+    def _finish(self, report: ReceiveReport, start: float) -> ReceiveReport:
+        report.seconds = time.perf_counter() - start
+        self.last_report = report
+        print(f"우편 받기 종료({report.stopped_by}): {report.as_dict()}")
+        return report
+
+
+# 영수증 창 위치는 창마다 다르므로 창별 엔진을 사용합니다.
+RECEIVER: ReceiveEngine = WindowLocal(ReceiveEngine)
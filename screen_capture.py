@@ -0,0 +1,335 @@
+# screen_capture.py
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from image_match import load_image_bgr
+
+Region = Tuple[int, int, int, int]
+FrameObserver = Callable[[np.ndarray, Region], None]
+
+
+@dataclass
+class CaptureStats:
+    """캡처 비용만 따로 측정하기 위한 누적 통계입니다."""
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    total_pixels: int = 0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_seconds / self.count * 1000 if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean_ms": round(self.mean_ms, 3),
+                "max_ms": round(self.max_seconds * 1000, 3), "total_pixels": self.total_pixels}
+
+
+class CaptureBackend:
+    """
+    화면 영역을 NumPy 배열(BGR 또는 BGRA)로 가져오는 백엔드의 공통 인터페이스입니다.
+    grab()이 반환하는 배열은 미리 할당해 재사용하는 버퍼의 view일 수 있으므로,
+    같은 스레드에서 다음 grab()을 호출하기 전까지만 유효합니다. 보관하려면 copy() 하세요.
+    """
+
+    def __init__(self):
+        self.stats = CaptureStats()
+        self._stats_lock = threading.Lock()
+
+    def grab(self, region: Region) -> np.ndarray:
+        """화면 좌표 region(left, top, width, height)을 캡처합니다. region은 화면 안으로 보정된 값이어야 합니다."""
+        start = time.perf_counter()
+        frame = self._grab(region)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.stats.count += 1
+            self.stats.total_seconds += elapsed
+            self.stats.max_seconds = max(self.stats.max_seconds, elapsed)
+            self.stats.total_pixels += region[2] * region[3]
+        for observer in list(_observers):
+            observer(frame, region)
+        return frame
+
+    def screen_size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = CaptureStats()
+
+    def _grab(self, region: Region) -> np.ndarray:
+        raise NotImplementedError
+
+
+class _ThreadBuffers(threading.local):
+    buffer: Optional[np.ndarray] = None
+
+
+class PilCaptureBackend(CaptureBackend):
+    """PIL.ImageGrab을 사용하는 범용 백엔드입니다. 결과는 스레드별로 재사용하는 BGR 버퍼에 복사됩니다."""
+
+    def __init__(self):
+        super().__init__()
+        self._local = _ThreadBuffers()
+        self._size: Optional[Tuple[int, int]] = None
+
+    def screen_size(self) -> Tuple[int, int]:
+        if self._size is None:
+            from PIL import ImageGrab
+            self._size = ImageGrab.grab().size
+        return self._size
+
+    def _grab(self, region: Region) -> np.ndarray:
+        from PIL import ImageGrab
+        left, top, width, height = region
+        rgb = np.asarray(ImageGrab.grab(bbox=(left, top, left + width, top + height)))
+        buffer = self._local.buffer
+        if buffer is None or buffer.shape[0] < height or buffer.shape[1] < width:
+            screen_width, screen_height = self.screen_size()
+            buffer = np.empty((max(screen_height, height), max(screen_width, width), 3), dtype=np.uint8)
+            self._local.buffer = buffer
+        view = buffer[:height, :width]
+        np.copyto(view, rgb[:, :, 2::-1])
+        return view
+
+
+class _GdiSurface:
+    """
+    스레드 하나가 쓰는 화면 DC, 메모리 DC, DIB 섹션과 그 메모리를 감싼 버퍼입니다.
+    GDI 핸들의 해제는 DIB 메모리를 감싼 ctypes 배열(raw)의 수명에 묶습니다. 캡처 결과 view는 모두 raw를 base로 잡고 있으므로,
+    스레드가 끝나거나 해상도가 바뀌어 이 객체가 버려져도 호출자가 쥔 view가 남아 있는 동안에는 메모리가 해제되지 않습니다.
+    """
+
+    def __init__(self, user32, gdi32, size: Tuple[int, int], screen_dc, memory_dc, bitmap, raw):
+        width, height = size
+        self.size = size
+        self.screen_dc = screen_dc
+        self.memory_dc = memory_dc
+        self.buffer = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        weakref.finalize(raw, _GdiSurface._release, user32, gdi32, screen_dc, memory_dc, bitmap)
+
+    @staticmethod
+    def _release(user32, gdi32, screen_dc, memory_dc, bitmap):
+        gdi32.DeleteDC(memory_dc)
+        gdi32.DeleteObject(bitmap)
+        user32.ReleaseDC(None, screen_dc)
+
+
+class GdiCaptureBackend(CaptureBackend):
+    """
+    Windows GDI BitBlt로 스레드별 DIB 섹션에 직접 캡처하는 빠른 백엔드입니다.
+    DIB 메모리를 그대로 감싼 BGRA 버퍼의 view를 반환하므로 캡처 후 추가 복사가 없습니다.
+    스레드별 GDI 핸들은 스레드가 끝나면 해제되고, 화면 해상도가 바뀌면 새 크기로 다시 만듭니다.
+    """
+    _SRCCOPY = 0x00CC0020
+    _CAPTUREBLT = 0x40000000
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._gdi32 = ctypes.windll.gdi32
+
+        self._user32.GetDC.restype = wintypes.HDC
+        self._user32.GetDC.argtypes = [wintypes.HWND]
+        self._gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        self._gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        self._gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        self._gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.c_void_p, wintypes.UINT,
+                                                 ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD]
+        self._gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        self._gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        self._gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                       wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        self._gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        self._gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        self._user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+
+        self._local = threading.local()
+
+    def screen_size(self) -> Tuple[int, int]:
+        # 해상도 변경(모니터 설정 변경 등)을 반영하도록 매번 읽습니다. GetSystemMetrics는 캡처에 비해 매우 쌉니다.
+        return self._user32.GetSystemMetrics(0), self._user32.GetSystemMetrics(1)
+
+    def _thread_surface(self) -> _GdiSurface:
+        size = self.screen_size()
+        surface: Optional[_GdiSurface] = getattr(self._local, "surface", None)
+        if surface is not None:
+            if surface.size == size:
+                return surface
+            # 해상도가 바뀌었으면 이전 크기의 DIB를 버리고 새로 만듭니다.
+            # 핸들은 이전 프레임의 view가 모두 사라진 뒤 raw의 finalizer가 해제합니다.
+            self._local.surface = None
+
+        ctypes = self._ctypes
+        from ctypes import wintypes
+
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+                        ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD),
+                        ("biCompression", wintypes.DWORD), ("biSizeImage", wintypes.DWORD),
+                        ("biXPelsPerMeter", wintypes.LONG), ("biYPelsPerMeter", wintypes.LONG),
+                        ("biClrUsed", wintypes.DWORD), ("biClrImportant", wintypes.DWORD)]
+
+        width, height = size
+        header = BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        header.biWidth = width
+        header.biHeight = -height  # 음수 높이: 위에서 아래로 저장되는 DIB
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = 0  # BI_RGB
+
+        screen_dc = self._user32.GetDC(None)
+        memory_dc = self._gdi32.CreateCompatibleDC(screen_dc)
+        bits = ctypes.c_void_p()
+        bitmap = self._gdi32.CreateDIBSection(memory_dc, ctypes.byref(header), 0, ctypes.byref(bits), None, 0)
+        if not bitmap or not bits.value:
+            self._gdi32.DeleteDC(memory_dc)
+            self._user32.ReleaseDC(None, screen_dc)
+            raise OSError("캡처용 DIB 섹션을 만들지 못했습니다.")
+        self._gdi32.SelectObject(memory_dc, bitmap)
+
+        raw = (ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)
+        surface = _GdiSurface(self._user32, self._gdi32, size, screen_dc, memory_dc, bitmap, raw)
+        self._local.surface = surface
+        return surface
+
+    def _grab(self, region: Region) -> np.ndarray:
+        surface = self._thread_surface()
+        left, top, width, height = region
+        if not self._gdi32.BitBlt(surface.memory_dc, 0, 0, width, height, surface.screen_dc, left, top,
+                                  self._SRCCOPY | self._CAPTUREBLT):
+            raise OSError(f"BitBlt 캡처 실패: {region}")
+        self._gdi32.GdiFlush()
+        return surface.buffer[:height, :width]
+
+
+@dataclass
+class ReplayFrame:
+    """재생용 프레임입니다. origin은 이 이미지의 좌상단이 놓였던 화면 좌표입니다."""
+    image: np.ndarray
+    origin: Tuple[int, int] = (0, 0)
+    timestamp: Optional[float] = None
+    label: str = ""
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """
+    PNG 파일이나 기록된 프레임 시퀀스를 화면 대신 제공하는 백엔드입니다.
+    게임 화면 없이 (리눅스 헤드리스 포함) 인식 로직을 실행하고 재현하는 데 사용합니다.
+    advance_on_grab이 True이면 grab()할 때마다 다음 프레임으로 넘어갑니다.
+    """
+
+    def __init__(self, frames: Sequence[Union[ReplayFrame, np.ndarray, Path, str]],
+                 screen_size: Optional[Tuple[int, int]] = None, loop: bool = False, advance_on_grab: bool = False):
+        super().__init__()
+        self.frames: List[ReplayFrame] = [self._to_frame(frame) for frame in frames]
+        if not self.frames:
+            raise ValueError("재생할 프레임이 없습니다.")
+        self.loop = loop
+        self.advance_on_grab = advance_on_grab
+        self.index = 0
+        if screen_size is None:
+            screen_size = (max(f.origin[0] + f.image.shape[1] for f in self.frames),
+                           max(f.origin[1] + f.image.shape[0] for f in self.frames))
+        self._size = screen_size
+        self._canvas = np.zeros((screen_size[1], screen_size[0], 3), dtype=np.uint8)
+        self._canvas_index: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> ReplayFrame:
+        return self.frames[self.index]
+
+    def screen_size(self) -> Tuple[int, int]:
+        return self._size
+
+    def advance(self) -> bool:
+        """다음 프레임으로 넘어갑니다. 더 이상 프레임이 없으면 False를 반환합니다."""
+        with self._lock:
+            if self.index + 1 < len(self.frames):
+                self.index += 1
+                return True
+            if self.loop:
+                self.index = 0
+                return True
+            return False
+
+    def seek(self, index: int):
+        with self._lock:
+            self.index = index % len(self.frames)
+
+    def _grab(self, region: Region) -> np.ndarray:
+        with self._lock:
+            if self._canvas_index != self.index:
+                # 영역 프레임은 화면 크기 캔버스의 원래 위치에 그려서 좌표계를 맞춥니다.
+                frame = self.frames[self.index]
+                x, y = frame.origin
+                height, width = frame.image.shape[:2]
+                if frame.image.shape[:2] != self._canvas.shape[:2] or (x, y) != (0, 0):
+                    self._canvas[:] = 0
+                self._canvas[y:y + height, x:x + width] = frame.image[:, :, :3]
+                self._canvas_index = self.index
+            left, top, width, height = region
+            view = self._canvas[top:top + height, left:left + width]
+        if self.advance_on_grab:
+            self.advance()
+        return view
+
+    @staticmethod
+    def _to_frame(frame: Union[ReplayFrame, np.ndarray, Path, str]) -> ReplayFrame:
+        if isinstance(frame, ReplayFrame):
+            return frame
+        if isinstance(frame, np.ndarray):
+            return ReplayFrame(image=frame)
+        image = load_image_bgr(Path(frame))
+        if image is None:
+            raise FileNotFoundError(f"재생용 프레임을 읽을 수 없습니다: {frame}")
+        return ReplayFrame(image=image, label=Path(frame).name)
+
+
+_backend: Optional[CaptureBackend] = None
+_backend_lock = threading.Lock()
+_observers: List[FrameObserver] = []
+
+
+def get_backend() -> CaptureBackend:
+    """현재 캡처 백엔드를 반환합니다. 설정되지 않았다면 플랫폼에 맞는 기본 백엔드를 만듭니다."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = GdiCaptureBackend() if sys.platform == "win32" else PilCaptureBackend()
+        return _backend
+
+
+def set_backend(backend: CaptureBackend):
+    """캡처 백엔드를 교체합니다. (예: 재생 백엔드로 오프라인 실행)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def add_frame_observer(observer: FrameObserver):
+    """캡처된 모든 프레임을 (frame, region)으로 전달받을 콜백을 등록합니다. (예: 프레임 기록기)"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_frame_observer(observer: FrameObserver):
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def capture_stats() -> Dict[str, float]:
+    """현재 백엔드의 캡처 비용 통계를 반환합니다."""
+    return get_backend().stats.as_dict()
@@ -1,10 +1,20 @@
 # screen_utils.py
 import time
 from pathlib import Path
-from typing import Optional, NamedTuple
+from typing import Callable, Iterable, Iterator, List, Optional, NamedTuple, Sequence, Union
 
-import pyautogui
-import pyperclip
+import numpy as np
+
+import image_match
+import input_dispatch
+import screen_capture
+import window_context
+from match_executor import parallel_map
+import cancellation
+from config import (GLOBAL_CONFIDENCE, READINESS_CONFIG, WAIT_DIGEST_STEP, WAIT_FULL_SCREEN_POLL_INTERVAL,
+                    WAIT_POLL_INTERVAL)
+from template_registry import Template, get_template
+from tracing import traced
 
 
 class Box(NamedTuple):
@@ -14,94 +24,398 @@ class Box(NamedTuple):
     height: int
 
 
-def find_image_on_screen(image_path: Path, confidence: float) -> Optional[Box]:
+# 탐색 함수들은 파일 경로와 템플릿 레지스트리 핸들을 모두 받습니다.
+ImageSource = Union[Path, Template]
+
+
+class WaitTarget(NamedTuple):
+    """wait_for_any의 대기 대상입니다. region이 None이면 전체 화면에서 찾습니다."""
+    image: ImageSource
+    region: Optional[tuple[int, int, int, int]] = None
+
+
+def find_image_on_screen(image: ImageSource, confidence: float) -> Optional[Box]:
     """화면에서 이미지를 찾아 위치를 Box 객체로 반환합니다."""
+    template = _resolve_template(image)
+    if not template:
+        return None
+
     try:
-        location = pyautogui.locateOnScreen(str(image_path), confidence=confidence)
+        frame = grab_region((0, 0, *screen_size()))
+        location = _locate_in_frame(frame, template, confidence)
         if location:
-            box_location = Box(location[0], location[1], location[2], location[3])
-            print(f"이미지 '{image_path.name}' 찾음: {box_location}")
+            box_location = Box(location[0], location[1], template.width, template.height)
+            print(f"이미지 '{template.name}' 찾음: {box_location}")
             return box_location
         return None
-    except FileNotFoundError:
-        print(f"오류: 이미지 파일 없음 '{image_path}'")
-        return None
     except Exception as e:
-        print(f"이미지 탐색 중 오류 발생 '{image_path.name}': {e}")
+        print(f"이미지 탐색 중 오류 발생 '{template.name}': {e}")
         return None
 
 
-def find_image_in_region(image_path: Path, region: tuple[int, int, int, int], confidence: float) -> Optional[Box]:
+def find_image_in_region(image: ImageSource, region: tuple[int, int, int, int], confidence: float) -> Optional[Box]:
     """
     [수정됨] 지정된 영역에서 이미지를 찾되, 영역이 화면을 벗어나면 자동으로 보정합니다.
     """
-    needle_dims = get_image_dimensions(image_path)
-    if not needle_dims:
-        print(f"오류: '{image_path.name}'의 크기를 읽을 수 없어 탐색을 중단합니다.")
+    template = _resolve_template(image)
+    if not template:
+        print(f"오류: '{image.name}'의 크기를 읽을 수 없어 탐색을 중단합니다.")
         return None
-    needle_width, needle_height = needle_dims
-
-    # --- 화면 좌표 보정 로직 (신규) ---
-    screen_width, screen_height = pyautogui.size()
-    left, top, width, height = region
-
-    # 1. 음수 좌표를 0으로 보정
-    s_left = max(0, left)
-    s_top = max(0, top)
+    needle_width, needle_height = template.width, template.height
 
-    # 2. 화면 경계를 벗어나는 영역을 잘라냄
-    s_right = min(left + width, screen_width)
-    s_bottom = min(top + height, screen_height)
-
-    # 3. 보정된 너비와 높이 계산
-    s_width = s_right - s_left
-    s_height = s_bottom - s_top
+    sanitized_region = clip_region_to_screen(region)
+    if not sanitized_region:
+        print(f"오류: 탐색 영역 {region}이(가) 화면 밖에 있습니다.")
+        return None
+    s_left, s_top, s_width, s_height = sanitized_region
 
-    # 4. 보정된 영역이 찾으려는 이미지보다 작은지 최종 확인
+    # 보정된 영역이 찾으려는 이미지보다 작은지 최종 확인
     if s_width < needle_width or s_height < needle_height:
         print(f"오류: 보정된 탐색 영역({s_width}x{s_height})이 이미지 크기({needle_width}x{needle_height})보다 작습니다.")
         return None
 
-    sanitized_region = (s_left, s_top, s_width, s_height)
-    # --- 좌표 보정 로직 끝 ---
-
     try:
-        # 보정된 영역(sanitized_region)을 사용하여 이미지 탐색
-        location = pyautogui.locateOnScreen(str(image_path), region=sanitized_region, confidence=confidence)
+        # 보정된 영역(sanitized_region)만 캡처하여 이미지 탐색
+        frame = grab_region(sanitized_region)
+        location = image_match.best_match(image_match.match_template(frame, template.image), confidence)
         if location:
-            return Box(location[0], location[1], location[2], location[3])
-        return None
-    except FileNotFoundError:
-        print(f"오류: 이미지 파일 없음 '{image_path}'")
+            return Box(s_left + location[0], s_top + location[1], needle_width, needle_height)
         return None
     except Exception as e:
-        print(f"영역 내 이미지 탐색 중 오류 발생 '{image_path.name}': {e}")
+        print(f"영역 내 이미지 탐색 중 오류 발생 '{template.name}': {e}")
         return None
 
 
-def get_image_dimensions(image_path: Path) -> Optional[tuple[int, int]]:
-    """이미지 파일의 (너비, 높이)를 가져옵니다."""
-    from PIL import Image
+def find_all_in_region(image: ImageSource, region: tuple[int, int, int, int], confidence: float,
+                       max_matches: int = 32) -> List[Box]:
+    """
+    영역을 한 번 캡처해 이미지가 나타난 모든 위치를 위에서 아래 순서로 반환합니다.
+    같은 위치가 두 번 잡히지 않도록 찾은 위치 주변(이미지 크기만큼)은 다음 후보에서 제외합니다.
+    """
+    template = _resolve_template(image)
+    sanitized_region = clip_region_to_screen(region)
+    if not template or not sanitized_region:
+        return []
+    s_left, s_top, _, _ = sanitized_region
     try:
-        with Image.open(image_path) as img:
-            return img.width, img.height
-    except FileNotFoundError:
-        print(f"오류: '{image_path}' 파일이 없어 크기를 확인할 수 없습니다.")
-        return None
+        frame = grab_region(sanitized_region)
+        result = image_match.match_template(frame, template.image)
+    except Exception as e:
+        print(f"영역 내 이미지 탐색 중 오류 발생 '{template.name}': {e}")
+        return []
+    if result is None:
+        return []
+    candidates = image_match.top_candidates(result, confidence, max_matches, (template.width, template.height))
+    return sorted((Box(s_left + x, s_top + y, template.width, template.height) for x, y, _ in candidates),
+                  key=lambda box: (box.top, box.left))
+
+
+def find_image_in_cells(image: ImageSource, cells: Sequence[tuple[int, int, int, int]],
+                        confidence: float) -> List[Optional[Box]]:
+    """
+    여러 셀을 감싸는 영역을 한 번만 캡처하고 한 번의 상관계수 계산으로 모든 셀을 매칭합니다.
+    각 셀에 대해 find_image_in_region과 같은 의미의 Box 또는 None을 순서대로 반환합니다.
+    """
+    if not cells:
+        return []
+
+    template = _resolve_template(image)
+    if not template:
+        return [None] * len(cells)
+
+    capture_region = clip_region_to_screen(image_match.bounding_rect(cells))
+    if not capture_region:
+        print("오류: 그리드 영역이 화면 밖에 있습니다.")
+        return [None] * len(cells)
+
+    try:
+        frame = grab_region(capture_region)
     except Exception as e:
-        print(f"이미지 크기 확인 중 오류 발생 '{image_path}': {e}")
+        print(f"그리드 영역 캡처 중 오류 발생 '{template.name}': {e}")
+        return [None] * len(cells)
+
+    # 같은 행의 셀들을 하나의 띠로 묶어, 띠마다 상관계수를 병렬로 계산합니다.
+    bands: dict[int, list[int]] = {}
+    for index, cell in enumerate(cells):
+        bands.setdefault(cell[1], []).append(index)
+
+    def match_band(indices: list[int]) -> list[Optional[tuple[int, int, int, int]]]:
+        band_cells = [cells[i] for i in indices]
+        left, top, width, height = image_match.bounding_rect(band_cells)
+        x0, y0 = max(left, capture_region[0]) - capture_region[0], max(top, capture_region[1]) - capture_region[1]
+        band_frame = frame[y0:top + height - capture_region[1], x0:left + width - capture_region[0]]
+        result = image_match.match_template(band_frame, template.image)
+        if result is None:
+            return [None] * len(indices)
+        return image_match.best_match_per_cell(result, (capture_region[0] + x0, capture_region[1] + y0), band_cells,
+                                               (template.width, template.height), confidence)
+
+    band_indices = list(bands.values())
+    results: List[Optional[Box]] = [None] * len(cells)
+    for indices, rects in zip(band_indices, parallel_map(match_band, band_indices, name="grid_scan")):
+        for index, rect in zip(indices, rects):
+            results[index] = Box(*rect) if rect else None
+    return results
+
+
+def iter_image_in_cells(image: ImageSource, cells: Sequence[tuple[int, int, int, int]], confidence: float,
+                        order: Optional[Iterable[int]] = None) -> Iterator[tuple[int, Box]]:
+    """
+    여러 셀을 감싸는 영역을 한 번만 캡처한 뒤, order 순서대로 셀을 하나씩 매칭하며 찾은 셀을 (인덱스, Box)로 내보냅니다.
+    필요한 만큼 찾으면 소비하는 쪽에서 순회를 멈추면 되고, 남은 셀은 매칭하지 않습니다.
+    """
+    if not cells:
+        return
+
+    template = _resolve_template(image)
+    if not template:
+        return
+
+    capture_region = clip_region_to_screen(image_match.bounding_rect(cells))
+    if not capture_region:
+        print("오류: 그리드 영역이 화면 밖에 있습니다.")
+        return
+
+    try:
+        # 순회 도중 다른 캡처가 일어나도 같은 프레임을 보도록 복사해 둡니다.
+        frame = grab_region(capture_region).copy()
+    except Exception as e:
+        print(f"그리드 영역 캡처 중 오류 발생 '{template.name}': {e}")
+        return
+
+    c_left, c_top = capture_region[0], capture_region[1]
+    for index in (range(len(cells)) if order is None else order):
+        left, top, width, height = cells[index]
+        x0, y0 = max(left - c_left, 0), max(top - c_top, 0)
+        cell_frame = frame[y0:top + height - c_top, x0:left + width - c_left]
+        location = image_match.best_match(image_match.match_template(cell_frame, template.image), confidence)
+        if location:
+            yield index, Box(c_left + x0 + location[0], c_top + y0 + location[1], template.width, template.height)
+
+
+def wait_for_image(image: ImageSource, region: Optional[tuple[int, int, int, int]] = None, timeout: float = 10.0,
+                   confidence: float = GLOBAL_CONFIDENCE,
+                   should_stop: Optional[Callable[[], bool]] = None) -> Optional[Box]:
+    """
+    지정된 영역(기본값: 전체 화면)에 이미지가 나타날 때까지 기다립니다.
+    매 프레임 영역의 간단한 픽셀 digest만 계산하고, digest가 바뀐 프레임에서만 템플릿 매칭을 수행합니다.
+    시간 초과 또는 중단 요청(should_stop, 기본값: 현재 작업의 취소 토큰) 시 None을 반환합니다.
+    """
+    detection = wait_for_any([WaitTarget(image, region)], timeout, confidence, should_stop)
+    return detection[1] if detection else None
+
+
+@traced("wait_for_any", "wait")
+def wait_for_any(targets: Sequence[WaitTarget], timeout: float = 10.0, confidence: float = GLOBAL_CONFIDENCE,
+                 should_stop: Optional[Callable[[], bool]] = None) -> Optional[tuple[int, Box]]:
+    """
+    여러 이미지(각각 선택적 영역 포함) 중 가장 먼저 나타나는 것을 기다립니다.
+    매 틱마다 모든 영역을 감싸는 프레임을 한 번만 캡처해 함께 평가하고,
+    (targets 내 인덱스, Box)를 반환합니다. 같은 프레임에서 여럿이 보이면 앞선 항목이 우선합니다.
+    영역 없이 전체 화면을 기다리는 항목이 있으면 WAIT_FULL_SCREEN_POLL_INTERVAL 간격으로 더 느리게 확인합니다.
+    시간 초과 또는 중단 요청(should_stop, 기본값: 현재 작업의 취소 토큰) 시 None을 반환합니다.
+    """
+    if should_stop is None:
+        should_stop = cancellation.current_token()
+
+    prepared = []
+    poll_interval = WAIT_POLL_INTERVAL
+    for index, target in enumerate(targets):
+        template = _resolve_template(target.image)
+        if not template:
+            continue
+        region = target.region
+        if region is None:
+            region = (0, 0, *screen_size())
+            poll_interval = WAIT_FULL_SCREEN_POLL_INTERVAL
+        clipped = clip_region_to_screen(region)
+        if not clipped:
+            print(f"오류: 탐색 영역 {region}이(가) 화면 밖에 있습니다.")
+            continue
+        prepared.append((index, template, clipped))
+    if not prepared:
+        return None
+
+    capture_region = image_match.bounding_rect([region for _, _, region in prepared])
+    origin_x, origin_y = capture_region[0], capture_region[1]
+    deadline = time.monotonic() + timeout
+    last_digest = None
+    while not should_stop():
+        try:
+            frame = grab_region(capture_region)
+        except Exception as e:
+            print(f"대기 중 화면 캡처 오류 발생: {e}")
+            return None
+
+        digest = image_match.frame_digest(frame, WAIT_DIGEST_STEP)
+        if digest != last_digest:
+            last_digest = digest
+            def match_target(target) -> Optional[tuple[int, int]]:
+                _, template, (left, top, width, height) = target
+                sub_frame = frame[top - origin_y:top - origin_y + height, left - origin_x:left - origin_x + width]
+                return _locate_in_frame(sub_frame, template, confidence)
+
+            locations = parallel_map(match_target, prepared, name="wait_for_any")
+            for (index, template, (left, top, _, _)), location in zip(prepared, locations):
+                if location:
+                    return index, Box(left + location[0], top + location[1], template.width, template.height)
+
+        if time.monotonic() >= deadline:
+            return None
+        cancellation.sleep(poll_interval, should_stop)
+    return None
+
+
+@traced("wait_until", "wait")
+def wait_until(condition: Callable[[], bool], timeout: float, poll_interval: float = WAIT_POLL_INTERVAL,
+               should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """condition()이 참이 되는 즉시 True를 반환합니다. 시간 초과 또는 중단 요청 시 False."""
+    if should_stop is None:
+        should_stop = cancellation.current_token()
+    deadline = time.monotonic() + timeout
+    while not should_stop():
+        if condition():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        cancellation.sleep(poll_interval, should_stop)
+    return False
+
+
+@traced("wait_until_stable", "wait")
+def wait_until_stable(region: Optional[tuple[int, int, int, int]] = None, timeout: float = 2.0,
+                      stable_for: float = READINESS_CONFIG.stable_for, changed_from: Optional[int] = None,
+                      should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    영역(기본값: 전체 화면)의 픽셀 digest가 stable_for초 동안 바뀌지 않으면 True를 반환합니다.
+    changed_from(동작 전에 region_digest로 구한 값)이 주어지면, 화면이 그 값과 달라진 뒤부터 안정 여부를 봅니다.
+    시간 초과 또는 중단 요청 시 False를 반환합니다.
+    """
+    if should_stop is None:
+        should_stop = cancellation.current_token()
+    capture_region = clip_region_to_screen(region or (0, 0, *screen_size()))
+    if not capture_region:
+        print(f"오류: 대기 영역 {region}이(가) 화면 밖에 있습니다.")
+        return False
+
+    deadline = time.monotonic() + timeout
+    last_digest = stable_since = None
+    changed = changed_from is None
+    while not should_stop():
+        try:
+            digest = image_match.frame_digest(grab_region(capture_region), WAIT_DIGEST_STEP)
+        except Exception as e:
+            print(f"대기 중 화면 캡처 오류 발생: {e}")
+            return False
+        now = time.monotonic()
+        if not changed and digest != changed_from:
+            changed = True
+
+        if digest != last_digest:
+            last_digest, stable_since = digest, now
+        elif changed and now - stable_since >= stable_for:
+            return True
+
+        if now >= deadline:
+            return False
+        cancellation.sleep(WAIT_POLL_INTERVAL, should_stop)
+    return False
+
+
+def region_digest(region: Optional[tuple[int, int, int, int]] = None) -> Optional[int]:
+    """영역(기본값: 전체 화면)의 현재 픽셀 digest입니다. 동작 전 화면을 기억해 wait_until_stable에 넘길 때 사용합니다."""
+    capture_region = clip_region_to_screen(region or (0, 0, *screen_size()))
+    if not capture_region:
+        return None
+    return image_match.frame_digest(grab_region(capture_region), WAIT_DIGEST_STEP)
+
+
+def wait_for_image_to_vanish(image: ImageSource, region: tuple[int, int, int, int], timeout: float,
+                             confidence: float = GLOBAL_CONFIDENCE,
+                             should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """영역에서 이미지가 사라지는 즉시 True를 반환합니다. (예: 확인 창이 닫힘) 시간 초과 또는 중단 요청 시 False."""
+    return wait_until(lambda: find_image_in_region(image, region, confidence) is None, timeout,
+                      should_stop=should_stop)
+
+
+def _locate_in_frame(frame: np.ndarray, template: Template, confidence: float) -> Optional[tuple[int, int]]:
+    """캡처된 프레임 안에서 템플릿의 (x, y)를 찾습니다. 좌표는 프레임 기준입니다."""
+    return image_match.best_match(image_match.match_template(frame, template.image), confidence)
+
+
+def _resolve_template(image: ImageSource) -> Optional[Template]:
+    """Path 또는 레지스트리 템플릿 핸들을 매칭 가능한 Template으로 변환합니다."""
+    if isinstance(image, Template):
+        return image
+    template = get_template(image)
+    if not template:
+        print(f"오류: 이미지 파일 없음 '{image}'")
+    return template
+
+
+def clip_region_to_screen(region: tuple[int, int, int, int]) -> Optional[tuple[int, int, int, int]]:
+    """영역을 화면 경계 안으로 잘라냅니다. 화면과 겹치지 않으면 None을 반환합니다."""
+    screen_width, screen_height = screen_size()
+    left, top, width, height = region
+
+    # 음수 좌표를 0으로 보정하고, 화면 경계를 벗어나는 영역을 잘라냄
+    s_left = max(0, left)
+    s_top = max(0, top)
+    s_right = min(left + width, screen_width)
+    s_bottom = min(top + height, screen_height)
+
+    if s_right <= s_left or s_bottom <= s_top:
+        return None
+    return s_left, s_top, s_right - s_left, s_bottom - s_top
+
+
+def grab_region(region: tuple[int, int, int, int]) -> np.ndarray:
+    """
+    화면의 지정된 영역을 현재 캡처 백엔드로 가져옵니다. (BGR 또는 BGRA 배열)
+    반환값은 재사용 버퍼의 view일 수 있으므로 다음 캡처 전까지만 유효합니다.
+    현재 스레드에 조작할 창(window_context)이 지정되어 있으면 region은 그 창 좌상단 기준 좌표입니다.
+    """
+    target = window_context.current_target()
+    if target is not None:
+        region = target.to_screen(region)
+    return screen_capture.get_backend().grab(region)
+
+
+def screen_size() -> tuple[int, int]:
+    """현재 캡처 백엔드 기준의 화면 (너비, 높이)를 반환합니다. 조작할 창이 지정되어 있으면 그 창의 크기입니다."""
+    target = window_context.current_target()
+    if target is not None:
+        return target.size
+    return screen_capture.get_backend().screen_size()
+
+
+def grab_screen_image():
+    """전체 화면을 캡처하여 디버그 오버레이용 PIL 이미지(RGB)로 반환합니다."""
+    from PIL import Image
+    frame = image_match.as_bgr(grab_region((0, 0, *screen_size())))
+    return Image.fromarray(np.ascontiguousarray(frame[:, :, ::-1]))
+
+
+def get_image_dimensions(image: ImageSource) -> Optional[tuple[int, int]]:
+    """이미지의 (너비, 높이)를 가져옵니다. 파일을 다시 열지 않고 템플릿 캐시를 사용합니다."""
+    template = _resolve_template(image)
+    if not template:
         return None
+    return template.width, template.height
 
 
 def paste_text(text: str):
     """클립보드를 사용하여 텍스트를 붙여넣습니다."""
+    import pyperclip
     try:
-        original_clipboard = pyperclip.paste()
-        pyperclip.copy(text)
-        time.sleep(0.1)
-        pyautogui.hotkey('ctrl', 'v')
-        time.sleep(0.1)
-        pyperclip.copy(original_clipboard)
+        # 클립보드는 모든 창이 함께 쓰므로, 복원할 때까지 다른 창의 입력이 끼어들지 않게 합니다.
+        with window_context.input_focus():
+            original_clipboard = pyperclip.paste()
+            pyperclip.copy(text)
+            time.sleep(0.1)
+            input_dispatch.hotkey('ctrl', 'v')
+            time.sleep(0.1)
+            pyperclip.copy(original_clipboard)
         print(f"붙여넣기 완료: '{text}'")
     except Exception as e:
         print(f"텍스트 붙여넣기 중 오류 발생: {e}")
\ No newline at end of file
@@ -0,0 +1,174 @@
+# scroll_tracker.py
+import math
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import input_dispatch
+import screen_utils
+from anchor_tracker import locate_anchor
+from config import GLOBAL_CONFIDENCE, INVEN_SCROLLBAR_CONFIG, ScrollbarConfig
+from tracing import traced
+from window_context import WindowLocal
+
+
+class ScrollState(NamedTuple):
+    """스크롤바 썸 위치로 읽은 스크롤 상태입니다. fraction은 0.0(최상단) ~ 1.0(최하단)입니다."""
+    fraction: float
+    page: int
+    page_count: int
+    thumb_top: int
+    thumb_length: int
+    track_length: int
+
+    @property
+    def at_top(self) -> bool:
+        return self.thumb_top <= 0
+
+    @property
+    def at_bottom(self) -> bool:
+        return self.thumb_top + self.thumb_length >= self.track_length
+
+
+def measure_thumb(strip: np.ndarray, config: ScrollbarConfig) -> Optional[Tuple[int, int]]:
+    """
+    트랙 영역 이미지에서 썸이 차지하는 행 범위를 (시작 행, 길이)로 반환합니다.
+    행마다 평균 밝기를 구해 트랙과 썸을 나누고, 가장 긴 연속 구간을 썸으로 봅니다.
+    썸 모양이 아니면(너무 짧음, 구간 밖에 썸 같은 행이 많음, 띠의 일부 열만 밝음) 트랙 위치가 어긋났거나
+    다른 UI가 겹친 것으로 보고 None을 반환합니다.
+    """
+    if strip is None or strip.size == 0:
+        return None
+    profile = strip[:, :, :3].mean(axis=(1, 2))
+    low, high = float(profile.min()), float(profile.max())
+    if high - low < config.min_contrast:
+        return None
+
+    threshold = (low + high) / 2
+    thumb_rows = profile >= threshold if config.thumb_brighter else profile <= threshold
+    # 연속 구간의 경계를 찾아 가장 긴 구간을 고릅니다.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], thumb_rows.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    longest = int(np.argmax(ends - starts))
+    start, length = int(starts[longest]), int(ends[longest] - starts[longest])
+    if length < config.min_thumb_length:
+        return None
+    if int(thumb_rows.sum()) - length > config.max_stray_rows:
+        return None
+    # 썸은 트랙 폭 전체를 채우므로, 구간 안에서는 모든 열이 썸 쪽으로 판별되어야 합니다.
+    columns = strip[start:start + length, :, :3].mean(axis=(0, 2))
+    on_thumb = columns >= threshold if config.thumb_brighter else columns <= threshold
+    if not on_thumb.all():
+        return None
+    return start, length
+
+
+def scroll_at(config: ScrollbarConfig, amount: int, delay: Optional[float] = None) -> bool:
+    """
+    마우스를 스크롤할 목록 위(기준 이미지 + wheel_offset)로 옮기고 휠을 굴립니다. 두 이벤트를 한 입력 묶음으로 보내므로,
+    여러 창을 동시에 조작할 때도 다른 창의 입력이 끼어들어 휠이 엉뚱한 창으로 가지 않습니다. 기준 이미지가 없으면 False.
+    """
+    base_location = locate_anchor(config.base_image_path, GLOBAL_CONFIDENCE)
+    if not base_location:
+        return False
+    with input_dispatch.batch() as wheel:
+        wheel.move_to(base_location.left + config.wheel_offset_x, base_location.top + config.wheel_offset_y)
+        wheel.scroll(amount, delay=delay)
+    return True
+
+
+def state_from_thumb(thumb_top: int, thumb_length: int, track_length: int) -> ScrollState:
+    """썸 위치와 길이로부터 비율 위치와 페이지 번호를 계산합니다. 썸 길이는 한 화면이 전체에서 차지하는 비율입니다."""
+    travel = max(track_length - thumb_length, 0)
+    fraction = min(max(thumb_top / travel, 0.0), 1.0) if travel else 0.0
+    # 측정 오차로 페이지 수가 하나 늘지 않도록 약간의 여유를 둡니다.
+    page_count = max(1, math.ceil(track_length / max(thumb_length, 1) - 0.1))
+    page = int(round(fraction * (page_count - 1)))
+    return ScrollState(fraction, page, page_count, thumb_top, thumb_length, track_length)
+
+
+class ScrollTracker:
+    """
+    기준 이미지 근처의 스크롤바 트랙을 한 번 캡처해 현재 스크롤 위치를 읽고,
+    목표 페이지까지 바로 스크롤합니다. 한 번의 스크롤이 움직이는 양은 실행 중에 측정해 다음 이동에 사용합니다.
+    """
+
+    def __init__(self, config: ScrollbarConfig = INVEN_SCROLLBAR_CONFIG):
+        self.config = config
+        # 스크롤 1회(config.scroll_amount)당 fraction 변화량. 처음 한 번 움직여 보기 전까지는 모름
+        self._fraction_per_step: Optional[float] = None
+
+    def read(self) -> Optional[ScrollState]:
+        """현재 스크롤 상태를 반환합니다. 기준 이미지나 썸을 찾지 못하면 None."""
+        base_location = locate_anchor(self.config.base_image_path, GLOBAL_CONFIDENCE)
+        if not base_location:
+            return None
+        region = screen_utils.clip_region_to_screen((base_location.left + self.config.track_offset_x,
+                                                     base_location.top + self.config.track_offset_y,
+                                                     self.config.track_width, self.config.track_height))
+        if not region:
+            return None
+        thumb = measure_thumb(screen_utils.grab_region(region), self.config)
+        if not thumb:
+            return None
+        return state_from_thumb(thumb[0], thumb[1], region[3])
+
+    @traced("scroll_to_page", "input")
+    def scroll_to_page(self, page: int) -> Optional[ScrollState]:
+        """
+        page 번째 화면으로 스크롤하고 도착한 상태를 반환합니다. 마지막 페이지를 넘는 값은 최하단으로 봅니다.
+        스크롤 상태를 읽을 수 없으면 None을 반환합니다.
+        """
+        state = self.read()
+        for _ in range(self.config.max_scroll_steps):
+            if not state:
+                return None
+            target = min(max(page, 0), state.page_count - 1)
+            if self._is_at_page(state, target):
+                return state
+
+            direction = self._direction(state, target)
+            steps = self._estimate_steps(state, target)
+            if not scroll_at(self.config, direction * self.config.scroll_amount * steps, self.config.settle_seconds):
+                return None
+
+            new_state = self.read()
+            if new_state and new_state.fraction != state.fraction:
+                self._fraction_per_step = abs(new_state.fraction - state.fraction) / steps
+            state = new_state
+        return state if state and self._is_at_page(state, min(max(page, 0), state.page_count - 1)) else None
+
+    def scroll_to_top(self) -> Optional[ScrollState]:
+        return self.scroll_to_page(0)
+
+    def scroll_to_bottom(self) -> Optional[ScrollState]:
+        return self.scroll_to_page(1 << 30)
+
+    @staticmethod
+    def _is_at_page(state: ScrollState, target: int) -> bool:
+        if target == 0:
+            return state.at_top
+        if target == state.page_count - 1:
+            return state.at_bottom
+        return state.page == target
+
+    @staticmethod
+    def _target_fraction(state: ScrollState, target: int) -> float:
+        return target / (state.page_count - 1) if state.page_count > 1 else 0.0
+
+    @classmethod
+    def _direction(cls, state: ScrollState, target: int) -> int:
+        """스크롤 방향(위: 1, 아래: -1)입니다. 반올림된 page가 target과 같아도 썸이 끝에 닿지 않았으면 끝 쪽으로 움직입니다."""
+        if target == 0:
+            return 1
+        if target == state.page_count - 1:
+            return -1
+        return 1 if cls._target_fraction(state, target) < state.fraction else -1
+
+    def _estimate_steps(self, state: ScrollState, target: int) -> int:
+        if not self._fraction_per_step:
+            return 1
+        return max(1, round(abs(self._target_fraction(state, target) - state.fraction) / self._fraction_per_step))
+
+
+INVEN_SCROLL: ScrollTracker = WindowLocal(ScrollTracker)
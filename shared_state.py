@@ -1,8 +1,13 @@
 # shared_state.py
 # 이 모듈은 애플리케이션의 여러 부분에서 공유되는 전역 상태를 보유합니다.
+import threading
 
-# 이 값이 True가 되면, 실행 중인 장기 작업이 정상적으로 중단되어야 합니다.
-stop_action = False
+from cancellation import JobSlot
 
-# 이 값이 True가 되면, 단축키 리스너가 일시적으로 동작하지 않습니다.
-ignore_hotkeys = False
\ No newline at end of file
+# 상점/우체통/배송 등 단축키로 시작하는 자동화 작업. 한 번에 하나만 실행되며, ESC로 취소합니다.
+AUTOMATION_JOB = JobSlot("automation")
+# F12 아이템 받기 루프. 자동화 작업과 별도로 실행되며, F12를 다시 누르거나 ESC로 취소합니다.
+RECEIVE_JOB = JobSlot("receive")
+
+# 이 이벤트가 설정된 동안, 단축키 리스너가 일시적으로 동작하지 않습니다.
+ignore_hotkeys = threading.Event()
@@ -0,0 +1,120 @@
+# shop_buyer.py
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import image_match
+import input_dispatch
+import screen_utils
+from cancellation import CancellationToken, current_token
+from config import GLOBAL_CONFIDENCE, SHOP_BUY_CONFIG, WAIT_DIGEST_STEP, BuyConfig
+from template_registry import get_template
+from tracing import traced
+
+STOP_NOMORE = "nomore"
+STOP_TIMEOUT = "timeout"
+STOP_CANCELLED = "cancelled"
+STOP_ERROR = "error"
+
+
+@dataclass
+class BuyReport:
+    """
+    구매 연타 한 번의 결과입니다.
+    purchases_confirmed는 그 뒤의 검사에서 확인 창이 보이지 않은 클릭 수(구매가 막히기 전에 보낸 클릭)이고,
+    wasted_clicks는 확인 창이 처음 보인 검사 직전 묶음의 클릭 수(구매가 막힌 뒤 보냈을 수 있는 클릭의 상한)입니다.
+    """
+    clicks_issued: int = 0
+    purchases_confirmed: int = 0
+    wasted_clicks: int = 0
+    checks: int = 0
+    seconds: float = 0.0
+    stopped_by: str = ""
+
+    @property
+    def clicks_per_second(self) -> float:
+        return self.clicks_issued / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"clicks_issued": self.clicks_issued, "purchases_confirmed": self.purchases_confirmed,
+                "wasted_clicks": self.wasted_clicks, "checks": self.checks, "seconds": round(self.seconds, 3),
+                "clicks_per_second": round(self.clicks_per_second, 1), "stopped_by": self.stopped_by}
+
+
+class BuyEngine:
+    """
+    구매 버튼을 목표 속도로 클릭하고, burst_size 클릭마다 '더 이상 구매 불가' 영역을 한 번 캡처해 확인합니다.
+    클릭과 확인을 한 스레드에서 번갈아 수행하므로 확인 창이 보인 첫 프레임에서 바로 멈춥니다.
+    영역이 이전 캡처와 같으면 매칭을 생략해 확인 비용을 캡처 한 번으로 줄입니다.
+    """
+
+    def __init__(self, config: BuyConfig = SHOP_BUY_CONFIG):
+        self.config = config
+        self.last_report: Optional[BuyReport] = None
+
+    @traced("shop_buy", "input")
+    def run(self, should_stop: Optional[Callable[[], bool]] = None) -> BuyReport:
+        should_stop = should_stop or current_token()
+        report = BuyReport()
+        template = get_template(self.config.nomore_image_path)
+        region = screen_utils.clip_region_to_screen(self.config.nomore_region)
+        if not template or not region:
+            print("오류: 구매 불가 확인 창 이미지나 탐색 영역을 사용할 수 없어 구매를 시작하지 않습니다.")
+            report.stopped_by = STOP_ERROR
+            self.last_report = report
+            return report
+
+        interval = 1.0 / self.config.target_rate
+        x, y = self.config.button_pos
+        start = time.perf_counter()
+        # 취소되거나 시간 제한이 지나면 클릭 사이의 대기에서도 즉시 깨어납니다.
+        if isinstance(should_stop, CancellationToken):
+            budget = should_stop.child(self.config.timeout)
+        else:
+            budget = CancellationToken("shop_buy", deadline=time.monotonic() + self.config.timeout)
+        next_click = start
+        unchecked = 0
+        last_digest = None
+        while True:
+            if should_stop():
+                report.stopped_by = STOP_CANCELLED
+                break
+            if budget.is_cancelled():
+                report.stopped_by = STOP_TIMEOUT
+                break
+
+            for _ in range(self.config.burst_size):
+                delay = next_click - time.perf_counter()
+                if delay > 0 and not budget.sleep(delay):
+                    break
+                input_dispatch.click(x, y, delay=0)
+                report.clicks_issued += 1
+                unchecked += 1
+                # 클릭이 늦어졌더라도 밀린 클릭을 몰아서 보내지 않습니다.
+                next_click = max(next_click + interval, time.perf_counter())
+
+            try:
+                frame = screen_utils.grab_region(region)
+            except Exception as e:
+                print(f"구매 중 화면 캡처 오류 발생: {e}")
+                report.stopped_by = STOP_ERROR
+                break
+            report.checks += 1
+            digest = image_match.frame_digest(frame, WAIT_DIGEST_STEP)
+            if digest != last_digest:
+                last_digest = digest
+                if image_match.best_match(image_match.match_template(frame, template.image), GLOBAL_CONFIDENCE):
+                    report.stopped_by = STOP_NOMORE
+                    report.wasted_clicks = unchecked
+                    unchecked = 0
+                    break
+            report.purchases_confirmed += unchecked
+            unchecked = 0
+
+        report.seconds = time.perf_counter() - start
+        self.last_report = report
+        print(f"구매 종료({report.stopped_by}): {report.as_dict()}")
+        return report
+
+
+SHOP_BUYER = BuyEngine()
@@ -0,0 +1,111 @@
+# template_registry.py
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from config import ASSETS_DIR, TEMPLATE_MTIME_CHECK_INTERVAL
+from image_match import load_image_bgr
+
+
+@dataclass(frozen=True)
+class Template:
+    """매칭 준비가 끝난(디코딩된) 템플릿 이미지와 그 메타데이터입니다."""
+    path: Path
+    image: np.ndarray
+    width: int
+    height: int
+    mtime: float
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+class TemplateRegistry:
+    """
+    에셋 이미지를 한 번만 디코딩해 보관하는 레지스트리입니다.
+    파일의 mtime이 바뀌면 다시 읽어오며, mtime 확인은 check_interval 초에 한 번만 수행합니다.
+    """
+
+    def __init__(self, check_interval: float = TEMPLATE_MTIME_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._templates: Dict[Path, Template] = {}
+        self._last_checked: Dict[Path, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_path: Union[Path, str]) -> Optional[Template]:
+        """경로에 해당하는 템플릿을 반환합니다. 파일이 없거나 읽을 수 없으면 None을 반환합니다."""
+        key = Path(image_path)
+        now = time.monotonic()
+        with self._lock:
+            template = self._templates.get(key)
+            if template and now - self._last_checked.get(key, 0.0) < self.check_interval:
+                return template
+
+        try:
+            mtime = os.stat(key).st_mtime
+        except FileNotFoundError:
+            self.invalidate(key)
+            return None
+
+        if template and template.mtime == mtime:
+            with self._lock:
+                self._last_checked[key] = now
+            return template
+
+        template = self._load(key, mtime)
+        with self._lock:
+            if template:
+                self._templates[key] = template
+                self._last_checked[key] = now
+            else:
+                self._templates.pop(key, None)
+                self._last_checked.pop(key, None)
+        return template
+
+    def preload(self, directory: Path = ASSETS_DIR, pattern: str = "*.png") -> int:
+        """디렉터리의 모든 이미지를 미리 읽어 두고, 읽어 온 템플릿 수를 반환합니다."""
+        loaded = 0
+        for image_path in sorted(directory.glob(pattern)):
+            if self.get(image_path):
+                loaded += 1
+        return loaded
+
+    def invalidate(self, image_path: Optional[Union[Path, str]] = None):
+        """특정 템플릿(또는 전체)을 캐시에서 제거합니다."""
+        with self._lock:
+            if image_path is None:
+                self._templates.clear()
+                self._last_checked.clear()
+            else:
+                self._templates.pop(Path(image_path), None)
+                self._last_checked.pop(Path(image_path), None)
+
+    @staticmethod
+    def _load(image_path: Path, mtime: float) -> Optional[Template]:
+        image = load_image_bgr(image_path)
+        if image is None:
+            print(f"오류: '{image_path}' 이미지를 읽을 수 없습니다.")
+            return None
+        height, width = image.shape[:2]
+        return Template(path=image_path, image=image, width=width, height=height, mtime=mtime)
+
+
+REGISTRY = TemplateRegistry()
+
+
+def get_template(image_path: Union[Path, str]) -> Optional[Template]:
+    """공용 레지스트리에서 템플릿을 가져옵니다."""
+    return REGISTRY.get(image_path)
+
+
+def preload_assets() -> int:
+    """config.ASSETS_DIR의 모든 에셋을 공용 레지스트리에 미리 읽어 둡니다."""
+    count = REGISTRY.preload()
+    print(f"템플릿 {count}개를 미리 읽어 두었습니다.")
+    return count
@@ -0,0 +1,179 @@
+# tracing.py
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+import cancellation
+from config import TRACE_CONFIG, TraceConfig
+
+
+@dataclass
+class Span:
+    """이름 붙은 구간 하나의 시작/끝 시각(time.perf_counter_ns)과 중첩 정보입니다."""
+    name: str
+    category: str
+    start_ns: int
+    end_ns: int = 0
+    thread_id: int = 0
+    thread_name: str = ""
+    depth: int = 0
+    parent: Optional[str] = None
+    args: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _SpanStack(threading.local):
+    def __init__(self):
+        self.spans: List[Span] = []
+
+
+class TraceCollector:
+    """
+    작업 단계별 소요 시간을 중첩 구간(span)으로 메모리에 모읍니다.
+    모은 구간은 Chrome trace-event JSON(chrome://tracing, Perfetto)으로 내보내거나 단계별 지연 히스토그램으로 요약합니다.
+    """
+
+    def __init__(self, config: TraceConfig = TRACE_CONFIG):
+        self.config = config
+        self.enabled = config.enabled
+        self._spans: Deque[Span] = deque(maxlen=config.max_spans)
+        self._stack = _SpanStack()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "step", **args) -> Iterator[Optional[Span]]:
+        """with 블록의 실행 시간을 기록합니다. 블록 안에서 연 구간은 이 구간의 자식이 됩니다."""
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack.spans
+        thread = threading.current_thread()
+        current = Span(name, category, time.perf_counter_ns(), thread_id=thread.ident or 0,
+                       thread_name=thread.name, depth=len(stack),
+                       parent=stack[-1].name if stack else None, args=args)
+        stack.append(current)
+        try:
+            yield current
+        finally:
+            current.end_ns = time.perf_counter_ns()
+            stack.pop()
+            with self._lock:
+                self._spans.append(current)
+
+    def traced(self, name: Optional[str] = None, category: str = "step") -> Callable:
+        """함수 호출 전체를 하나의 구간으로 기록하는 데코레이터입니다."""
+
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def chrome_trace(self) -> Dict[str, object]:
+        """Chrome trace-event 형식(완료 이벤트 'X')의 사전을 만듭니다. 시각 단위는 마이크로초입니다."""
+        spans = self.spans()
+        origin = min((s.start_ns for s in spans), default=0)
+        pid = os.getpid()
+        events = [{"name": s.name, "cat": s.category, "ph": "X", "pid": pid, "tid": s.thread_id,
+                   "ts": (s.start_ns - origin) / 1000, "dur": (s.end_ns - s.start_ns) / 1000,
+                   "args": {key: str(value) for key, value in s.args.items()}} for s in spans]
+        names = {s.thread_id: s.thread_name for s in spans}
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+                      for tid, thread_name in names.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, name: str, directory: Optional[Path] = None) -> Optional[Path]:
+        """모은 구간을 Chrome trace-event JSON 파일로 기록하고 그 경로를 반환합니다."""
+        if not self._spans:
+            return None
+        export_dir = directory or self.config.export_dir
+        export_dir.mkdir(parents=True, exist_ok=True)
+        path = export_dir / f"{time.strftime('%Y%m%d_%H%M%S')}_{name}.json"
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        print(f"작업 구간 {len(self._spans)}개를 '{path}'에 기록했습니다.")
+        return path
+
+    def histograms(self, bucket_edges_ms: Sequence[float] = ()) -> Dict[str, Dict[str, object]]:
+        """
+        구간 이름별 지연 히스토그램과 요약(횟수, 합계, p50/p90/최대, ms)을 반환합니다.
+        buckets의 키 '<=N'은 N ms 이하인 구간 수이고, 마지막 '>N'은 가장 큰 경계를 넘는 구간 수입니다.
+        """
+        edges = list(bucket_edges_ms or self.config.histogram_edges_ms)
+        durations: Dict[str, List[float]] = {}
+        for s in self.spans():
+            durations.setdefault(s.name, []).append(s.duration_ms)
+
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            buckets = {f"<={edge:g}": 0 for edge in edges}
+            buckets[f">{edges[-1]:g}"] = 0
+            for value in values:
+                key = next((f"<={edge:g}" for edge in edges if value <= edge), f">{edges[-1]:g}")
+                buckets[key] += 1
+            result[name] = {"count": len(values), "total_ms": round(sum(values), 2),
+                            "p50_ms": round(_percentile(values, 50), 2), "p90_ms": round(_percentile(values, 90), 2),
+                            "max_ms": round(values[-1], 2), "buckets": buckets}
+        return result
+
+    def summary(self, top: int = 10) -> str:
+        """합계 시간이 큰 순서로 단계별 요약을 여러 줄 문자열로 만듭니다."""
+        rows = sorted(self.histograms().items(), key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+        lines = [f"{'단계':<28}{'횟수':>6}{'합계ms':>11}{'p50':>9}{'p90':>9}{'최대':>9}"]
+        for name, h in rows:
+            lines.append(f"{name:<28}{h['count']:>6}{h['total_ms']:>11.1f}{h['p50_ms']:>9.1f}"
+                         f"{h['p90_ms']:>9.1f}{h['max_ms']:>9.1f}")
+        return "\n".join(lines)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+TRACER = TraceCollector()
+
+
+def span(name: str, category: str = "step", **args):
+    """공용 수집기에 구간을 기록합니다."""
+    return TRACER.span(name, category, **args)
+
+
+def traced(name: Optional[str] = None, category: str = "step") -> Callable:
+    """공용 수집기에 함수 호출을 구간으로 기록하는 데코레이터입니다."""
+    return TRACER.traced(name, category)
+
+
+def traced_sleep(seconds: float, name: str = "sleep") -> bool:
+    """
+    고정 대기 시간도 단계별 합계에 드러나도록 구간으로 기록하며 잠듭니다.
+    현재 작업이 취소되면 즉시 깨어나 False를 반환합니다.
+    """
+    with TRACER.span(name, "sleep", seconds=seconds):
+        return cancellation.sleep(seconds)
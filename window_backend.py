@@ -0,0 +1,164 @@
+# window_backend.py
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+Region = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class WindowInfo:
+    """최상위 창 하나의 핸들, 제목, 화면 좌표 기준 위치와 크기입니다."""
+    handle: int
+    title: str
+    left: int
+    top: int
+    width: int
+    height: int
+
+    @property
+    def region(self) -> Region:
+        return self.left, self.top, self.width, self.height
+
+
+class WindowBackend:
+    """
+    운영체제의 최상위 창을 찾고 옮기고 활성화하는 백엔드의 공통 인터페이스입니다.
+    창은 핸들(int)로 구분하며, 위치와 크기는 항상 화면 좌표 기준입니다.
+    """
+
+    def list_windows(self, title: str) -> List[WindowInfo]:
+        """제목에 title이 들어간 창을 모두 반환합니다."""
+        raise NotImplementedError
+
+    def geometry(self, handle: int) -> Optional[WindowInfo]:
+        """창의 현재 위치와 크기를 반환합니다. 창이 닫혔으면 None."""
+        raise NotImplementedError
+
+    def foreground(self) -> Optional[int]:
+        """현재 맨 앞(입력을 받는) 창의 핸들입니다."""
+        raise NotImplementedError
+
+    def activate(self, handle: int, timeout: float = 0.2) -> bool:
+        """창을 최소화에서 복원해 맨 앞으로 가져오고, 실제로 앞에 올 때까지 최대 timeout초 기다립니다."""
+        raise NotImplementedError
+
+    def move_resize(self, handle: int, left: int, top: int, width: int, height: int) -> bool:
+        raise NotImplementedError
+
+
+class PyGetWindowBackend(WindowBackend):
+    """pygetwindow/win32gui로 실제 창을 다루는 윈도우용 백엔드입니다."""
+
+    def __init__(self):
+        import pygetwindow
+        import win32gui
+        self._gw = pygetwindow
+        self._win32gui = win32gui
+
+    def list_windows(self, title: str) -> List[WindowInfo]:
+        return [self._info(window) for window in self._gw.getWindowsWithTitle(title)]
+
+    def geometry(self, handle: int) -> Optional[WindowInfo]:
+        if not self._win32gui.IsWindow(handle):
+            return None
+        left, top, right, bottom = self._win32gui.GetWindowRect(handle)
+        return WindowInfo(handle, self._win32gui.GetWindowText(handle), left, top, right - left, bottom - top)
+
+    def foreground(self) -> Optional[int]:
+        return self._win32gui.GetForegroundWindow() or None
+
+    def activate(self, handle: int, timeout: float = 0.2) -> bool:
+        window = self._gw.Win32Window(handle)
+        if window.isMinimized:
+            window.restore()
+        window.activate()
+        deadline = time.monotonic() + timeout
+        while self.foreground() != handle:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def move_resize(self, handle: int, left: int, top: int, width: int, height: int) -> bool:
+        window = self._gw.Win32Window(handle)
+        if window.isMinimized:
+            window.restore()
+        window.resizeTo(width, height)
+        window.moveTo(left, top)
+        return True
+
+    @staticmethod
+    def _info(window) -> WindowInfo:
+        return WindowInfo(window._hWnd, window.title, window.left, window.top, window.width, window.height)
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+    실제 창 없이 창 목록과 맨 앞 창을 흉내 내는 백엔드입니다. 리눅스 헤드리스에서 여러 창 모드를 시험할 때 사용합니다.
+    화면 내용은 캡처 백엔드(예: ReplayCaptureBackend)로 따로 공급합니다.
+    """
+
+    def __init__(self, windows: Optional[List[WindowInfo]] = None):
+        self._windows: Dict[int, WindowInfo] = {window.handle: window for window in windows or []}
+        self._foreground: Optional[int] = None
+        self._lock = threading.Lock()
+        self.activations: List[int] = []
+
+    def add(self, window: WindowInfo):
+        with self._lock:
+            self._windows[window.handle] = window
+
+    def close(self, handle: int):
+        with self._lock:
+            self._windows.pop(handle, None)
+            if self._foreground == handle:
+                self._foreground = None
+
+    def list_windows(self, title: str) -> List[WindowInfo]:
+        with self._lock:
+            return [window for window in self._windows.values() if title in window.title]
+
+    def geometry(self, handle: int) -> Optional[WindowInfo]:
+        with self._lock:
+            return self._windows.get(handle)
+
+    def foreground(self) -> Optional[int]:
+        return self._foreground
+
+    def activate(self, handle: int, timeout: float = 0.2) -> bool:
+        with self._lock:
+            if handle not in self._windows:
+                return False
+            self._foreground = handle
+            self.activations.append(handle)
+        return True
+
+    def move_resize(self, handle: int, left: int, top: int, width: int, height: int) -> bool:
+        with self._lock:
+            window = self._windows.get(handle)
+            if window is None:
+                return False
+            self._windows[handle] = replace(window, left=left, top=top, width=width, height=height)
+        return True
+
+
+_backend: Optional[WindowBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> WindowBackend:
+    """현재 창 백엔드를 반환합니다. 설정되지 않았다면 pygetwindow 백엔드를 만듭니다."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = PyGetWindowBackend()
+        return _backend
+
+
+def set_backend(backend: WindowBackend):
+    """창 백엔드를 교체합니다. (예: 가짜 백엔드로 헤드리스 실행)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,146 @@
+# window_context.py
+import functools
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, Optional, Tuple, TypeVar
+
+import window_backend
+
+T = TypeVar("T")
+Region = Tuple[int, int, int, int]
+
+
+class WindowTarget:
+    """
+    작업 스레드 하나가 조작하는 게임 창입니다. activate()한 스레드에서는 화면 캡처 영역과 입력 좌표가
+    창 좌상단 기준(창이 (0, 0)에 있을 때와 같은 좌표)으로 해석되어, 기존 워크플로우를 좌표 수정 없이 그대로 실행할 수 있습니다.
+    """
+
+    def __init__(self, name: str, handle: int, region: Region, activate_timeout: float = 0.2):
+        self.name = name
+        self.handle = handle
+        self.left, self.top, self.width, self.height = region
+        self.activate_timeout = activate_timeout
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        return self.left, self.top
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def region(self) -> Region:
+        return self.left, self.top, self.width, self.height
+
+    def move(self, region: Region):
+        """창을 옮긴 뒤 새 위치와 크기를 반영합니다."""
+        self.left, self.top, self.width, self.height = region
+
+    def to_screen(self, region: Region) -> Region:
+        left, top, width, height = region
+        return left + self.left, top + self.top, width, height
+
+    def to_screen_point(self, x: int, y: int) -> Tuple[int, int]:
+        return x + self.left, y + self.top
+
+    def bring_to_front(self) -> bool:
+        """창이 맨 앞이 아니면 활성화합니다."""
+        backend = window_backend.get_backend()
+        if backend.foreground() == self.handle:
+            return True
+        return backend.activate(self.handle, self.activate_timeout)
+
+    @contextmanager
+    def activate(self) -> Iterator["WindowTarget"]:
+        """with 블록 동안 현재 스레드의 current_target()을 이 창으로 바꿉니다."""
+        previous = getattr(_active, "target", None)
+        _active.target = self
+        try:
+            yield self
+        finally:
+            _active.target = previous
+
+    def __repr__(self) -> str:
+        return f"WindowTarget({self.name!r}, handle={self.handle}, region={self.region})"
+
+
+class WindowLocal(Generic[T]):
+    """
+    창마다 따로 만들어지는 객체의 대리자입니다. 속성에 접근하면 현재 스레드의 창(current_target())에 속한 인스턴스로 전달되고,
+    창이 지정되지 않은 스레드에서는 기본 인스턴스를 사용합니다. 기준 이미지 위치, 인벤토리 지도처럼
+    화면 상태를 기억하는 모듈 단위 객체를 호출하는 쪽 코드 변경 없이 창별로 분리할 때 사용합니다.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._default: Optional[T] = None
+        self._instances: Dict[int, T] = {}
+        self._lock = threading.Lock()
+        _window_locals.add(self)
+
+    def get(self) -> T:
+        target = current_target()
+        with self._lock:
+            if target is None:
+                if self._default is None:
+                    self._default = self._factory()
+                return self._default
+            instance = self._instances.get(target.handle)
+            if instance is None:
+                instance = self._instances[target.handle] = self._factory()
+            return instance
+
+    def discard(self, handle: int):
+        """닫힌 창의 인스턴스를 버립니다."""
+        with self._lock:
+            self._instances.pop(handle, None)
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+_active = threading.local()
+_window_locals: "weakref.WeakSet[WindowLocal]" = weakref.WeakSet()
+# 마우스/키보드와 클립보드는 모든 창이 함께 쓰므로, 입력 묶음 하나를 보내는 동안에는 한 창만 입력합니다.
+_input_lock = threading.RLock()
+
+
+def current_target() -> Optional[WindowTarget]:
+    """현재 스레드가 조작하는 창입니다. 한 창만 다루는 기존 모드에서는 None."""
+    return getattr(_active, "target", None)
+
+
+@contextmanager
+def input_focus() -> Iterator[Optional[WindowTarget]]:
+    """
+    with 블록 동안 입력 장치를 독점하고, 현재 스레드의 창이 있으면 맨 앞으로 가져옵니다.
+    같은 스레드에서 중첩해 사용할 수 있으므로 클립보드 붙여넣기처럼 여러 입력 묶음을 이어서 보내야 할 때 감쌉니다.
+    """
+    with _input_lock:
+        target = current_target()
+        if target is not None:
+            target.bring_to_front()
+        yield target
+
+
+def discard_window(handle: int):
+    """닫힌 창에 속한 창별 인스턴스를 모두 버립니다."""
+    for local in list(_window_locals):
+        local.discard(handle)
+
+
+def bind(func: Callable[..., T]) -> Callable[..., T]:
+    """호출한 스레드의 창을 기억했다가, 다른 스레드(스레드 풀 등)에서 func를 실행할 때도 같은 창을 적용합니다."""
+    target = current_target()
+    if target is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with target.activate():
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -1,20 +1,88 @@
 # window_util.py
+import threading
 import time
-from typing import Optional
-
-import pygetwindow as gw
-import win32con
-import win32gui
-
-WINDOW_TITLE = 'MapleStory Worlds-Mapleland'
-
-
-def _get_window() -> Optional[gw.Win32Window]:
-    """지정된 제목의 창 객체를 찾아서 반환합니다."""
+from typing import Dict, Optional
+
+import screen_utils
+import window_backend
+import window_context
+from config import READINESS_CONFIG, WINDOW_CHECK_INTERVAL, WINDOW_TITLE
+from tracing import traced
+from window_backend import WindowInfo
+
+
+class WindowCache:
+    """
+    게임 창의 핸들과 위치/크기를 기억합니다. 매번 모든 최상위 창을 훑는 대신 캐시된 핸들이 아직 같은 창인지
+    (IsWindow/GetWindowRect 수준의 값싼 확인)만 보고, check_interval 동안은 그 확인도 생략해 같은 값을 돌려줍니다.
+    창을 직접 옮기거나 크기를 바꾼 뒤에는 invalidate()로 다음 조회 때 새로 읽게 합니다.
+    """
+
+    def __init__(self, title: str = WINDOW_TITLE, check_interval: float = WINDOW_CHECK_INTERVAL):
+        self.title = title
+        self.check_interval = check_interval
+        self.hits = 0
+        self.validations = 0
+        self.enumerations = 0
+        self._info: Optional[WindowInfo] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, refresh: bool = False) -> Optional[WindowInfo]:
+        """게임 창의 현재 위치와 크기를 반환합니다. refresh이면 확인 간격과 상관없이 창 위치를 다시 읽습니다."""
+        with self._lock:
+            now = time.monotonic()
+            # 창을 찾지 못한 결과도 확인 간격 동안은 그대로 돌려줍니다.
+            if not refresh and self._checked_at is not None and now - self._checked_at < self.check_interval:
+                self.hits += 1
+                return self._info
+
+            backend = window_backend.get_backend()
+            info = None
+            if self._info:
+                self.validations += 1
+                info = backend.geometry(self._info.handle)
+                if info and self.title not in info.title:
+                    info = None
+            if info is None:
+                # 창이 닫혔거나 처음 찾는 경우에만 창 목록 전체를 훑습니다.
+                self.enumerations += 1
+                windows = backend.list_windows(self.title)
+                info = windows[0] if windows else None
+            self._info = info
+            self._checked_at = now
+            return info
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+    def stats(self) -> Dict[str, int]:
+        """캐시로 바로 답한 횟수(hits), 핸들만 재확인한 횟수, 창 목록을 훑은 횟수를 반환합니다."""
+        with self._lock:
+            return {"hits": self.hits, "validations": self.validations, "enumerations": self.enumerations}
+
+
+WINDOW_CACHE = WindowCache()
+
+
+def get_window_info(refresh: bool = False) -> Optional[WindowInfo]:
+    """
+    게임 창의 핸들과 위치/크기를 현재 스레드의 좌표계로 반환합니다.
+    여러 창을 동시에 조작하는 스레드에서는 맡은 창을 좌상단 (0, 0) 기준으로 돌려줍니다.
+    """
+    target = window_context.current_target()
+    if target is not None:
+        return WindowInfo(target.handle, WINDOW_CACHE.title, 0, 0, target.width, target.height)
+    return WINDOW_CACHE.get(refresh)
+
+
+def _get_window() -> Optional[WindowInfo]:
+    """지정된 제목의 창을 찾아서 반환합니다."""
     try:
-        window_list = gw.getWindowsWithTitle(WINDOW_TITLE)
-        if window_list:
-            return window_list[0]
+        window = get_window_info()
+        if window:
+            return window
         else:
             print(f"'{WINDOW_TITLE}' 창을 찾을 수 없습니다.")
             return None
@@ -25,20 +93,23 @@ def _get_window() -> Optional[gw.Win32Window]:
 
 def activate_maple_window() -> bool:
     """MapleStory Worlds-Mapleland 창을 찾아 활성화하고 맨 앞으로 가져옵니다."""
+    target = window_context.current_target()
+    if target is not None:
+        # 여러 창을 동시에 조작하는 중이면 제목으로 찾은 첫 창이 아니라 이 스레드가 맡은 창을 활성화합니다.
+        return target.bring_to_front()
+
     window = _get_window()
     if not window:
         print(f"경고: '{WINDOW_TITLE}' 창이 없어 활성화할 수 없습니다.")
         return False
 
     try:
-        if window.isMinimized:
-            window.restore()
-
-        window.activate()
+        # 고정 대기 대신 창이 실제로 앞에 올라오는 즉시 진행합니다.
+        window_backend.get_backend().activate(window.handle, READINESS_CONFIG.activate_timeout)
         print(f"'{WINDOW_TITLE}' 창을 활성화했습니다.")
-        time.sleep(0.2)
         return True
     except Exception as e:
+        WINDOW_CACHE.invalidate()
         print(f"창 활성화 중 오류 발생: {e}")
         return False
 
@@ -50,7 +121,11 @@ def remove_window_border():
         return
 
     try:
-        hwnd = maple_window._hWnd
+        # pywin32는 Windows에만 있으므로, 다른 모듈이 window_util을 불러올 때가 아니라 실제로 쓸 때 불러옵니다.
+        import win32con
+        import win32gui
+
+        hwnd = maple_window.handle
         style = win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE)
         style &= ~(win32con.WS_CAPTION | win32con.WS_THICKFRAME)
         win32gui.SetWindowLong(hwnd, win32con.GWL_STYLE, style)
@@ -60,25 +135,60 @@ def remove_window_border():
         print(f"'{WINDOW_TITLE}' 창의 테두리가 제거되었습니다.")
     except Exception as e:
         print(f"창 테두리 제거 중 오류 발생: {e}")
-
-
-def resize_window(width: int, height: int):
-    """[수정됨] 창의 크기를 지정된 크기로 변경하고, 화면 좌상단(0, 0)으로 이동시킵니다."""
+    finally:
+        # 테두리가 빠지면 창 크기가 바뀝니다.
+        WINDOW_CACHE.invalidate()
+
+
+@traced()
+def resize_window(width: int, height: int, ready_timeout: float = 0.0) -> bool:
+    """
+    [수정됨] 창의 크기를 지정된 크기로 변경하고, 화면 좌상단(0, 0)으로 이동시킵니다.
+    ready_timeout이 주어지면 창 크기가 반영되고 화면이 다시 그려져 안정될 때까지 최대 그 시간만큼 기다립니다.
+    여러 창을 동시에 조작하는 스레드에서는 맡은 창을 제자리에서 크기만 바꿉니다.
+    """
     maple_window = _get_window()
     if not maple_window:
         print(f"경고: '{WINDOW_TITLE}' 창을 찾을 수 없어 크기를 변경할 수 없습니다.")
-        return
+        return False
 
+    target = window_context.current_target()
+    left, top = target.origin if target is not None else (0, 0)
     try:
-        if maple_window.isMinimized:
-            maple_window.restore()
-        maple_window.activate()
+        backend = window_backend.get_backend()
+        backend.activate(maple_window.handle, READINESS_CONFIG.activate_timeout)
+        # [신규] 창 크기 변경과 함께 창 위치를 (0, 0)으로 이동
+        backend.move_resize(maple_window.handle, left, top, width, height)
+        if target is not None:
+            target.move((left, top, width, height))
+
+        print(f"'{WINDOW_TITLE}' 창 크기가 {width}x{height}로 변경되고 ({left},{top}) 위치로 이동되었습니다.")
+    except Exception as e:
+        print(f"창 크기/위치 변경 중 오류 발생: {e}")
+        return False
+    finally:
+        WINDOW_CACHE.invalidate()
 
-        # 창 크기 변경
-        maple_window.resizeTo(width, height)
-        # [신규] 창 위치를 (0, 0)으로 이동
-        maple_window.moveTo(0, 0)
+    if ready_timeout > 0:
+        return wait_for_window_ready(width, height, ready_timeout)
+    return True
 
-        print(f"'{WINDOW_TITLE}' 창 크기가 {width}x{height}로 변경되고 (0,0) 위치로 이동되었습니다.")
-    except Exception as e:
-        print(f"창 크기/위치 변경 중 오류 발생: {e}")
\ No newline at end of file
+
+def wait_for_window_ready(width: int, height: int, timeout: float) -> bool:
+    """창이 (0, 0)에서 지정된 크기가 되고, 창 영역 화면이 다시 그려져 안정될 때까지 기다립니다."""
+    deadline = time.monotonic() + timeout
+    target = window_context.current_target()
+    expected = target.to_screen((0, 0, width, height)) if target is not None else (0, 0, width, height)
+
+    def resized() -> bool:
+        # 실제 창 위치를 확인해야 하므로 캐시를 거치지 않고 매번 다시 읽습니다.
+        if target is not None:
+            window = window_backend.get_backend().geometry(target.handle)
+        else:
+            window = WINDOW_CACHE.get(refresh=True)
+        return window is not None and window.region == expected
+
+    if not screen_utils.wait_until(resized, timeout):
+        print(f"경고: {timeout}초 내에 창 크기가 {width}x{height}로 반영되지 않았습니다.")
+        return False
+    return screen_utils.wait_until_stable((0, 0, width, height), timeout=max(deadline - time.monotonic(), 0.0))
@@ -0,0 +1,160 @@
+# workflow.py
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import screen_utils
+from cancellation import current_token
+from tracing import span
+
+Context = Dict[str, Any]
+StepAction = Callable[[Context], Any]
+StepCondition = Callable[[Context], bool]
+
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    워크플로우의 한 단계입니다. 모든 콜백은 워크플로우 실행 하나가 공유하는 context 사전을 받습니다.
+    - ready: 동작 전 조건. 참이 될 때까지 최대 ready_timeout초 기다립니다. (고정 sleep 대신 사용)
+    - action: 동작. False를 반환하면 이번 시도는 실패입니다. (None 등 다른 값은 성공)
+    - done: 완료 조건. 동작 전에 이미 참이면 단계를 건너뛰고, 동작 후에는 timeout초 안에 참이 되어야 성공입니다.
+    - retries: 시도가 실패했을 때 같은 단계를 다시 시도할 횟수
+    """
+    name: str
+    action: Optional[StepAction] = None
+    done: Optional[StepCondition] = None
+    ready: Optional[StepCondition] = None
+    timeout: float = 0.0
+    ready_timeout: float = 0.0
+    retries: int = 0
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str
+    attempts: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class WorkflowResult:
+    """워크플로우 실행 한 번의 결과입니다. 실패했다면 failed_step부터 resume으로 이어서 실행할 수 있습니다."""
+    workflow: str
+    context: Context
+    start_index: int = 0
+    steps: List[StepResult] = field(default_factory=list)
+    failed_step: Optional[str] = None
+    cancelled: bool = False
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_step is None and not self.cancelled
+
+    def latencies(self) -> Dict[str, float]:
+        """단계 이름별 소요 시간(초)입니다."""
+        return {step.name: round(step.seconds, 3) for step in self.steps}
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"workflow": self.workflow, "ok": self.ok, "failed_step": self.failed_step,
+                "cancelled": self.cancelled, "seconds": round(self.seconds, 3),
+                "steps": {step.name: f"{step.status}/{step.attempts}회/{step.seconds * 1000:.0f}ms"
+                          for step in self.steps}}
+
+
+class Workflow:
+    """
+    선언된 단계 목록을 순서대로 실행합니다. 단계 사이마다 중단 요청을 확인하고,
+    단계별 소요 시간을 결과와 tracing 구간으로 기록합니다. 실패한 단계가 있으면 그 단계에서 멈추며,
+    resume(result)로 앞서 끝난 단계를 다시 하지 않고 실패한 단계부터 이어서 실행합니다.
+    """
+
+    def __init__(self, name: str, steps: Sequence[Step]):
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"워크플로우 '{name}'에 같은 이름의 단계가 있습니다: {names}")
+        self.name = name
+        self.steps = list(steps)
+
+    def step_index(self, step: Union[int, str]) -> int:
+        if isinstance(step, int):
+            return step
+        for index, candidate in enumerate(self.steps):
+            if candidate.name == step:
+                return index
+        raise ValueError(f"워크플로우 '{self.name}'에 '{step}' 단계가 없습니다.")
+
+    def run(self, context: Optional[Context] = None, start_at: Union[int, str] = 0,
+            should_stop: Optional[Callable[[], bool]] = None,
+            on_step_done: Optional[Callable[[str, Context], None]] = None) -> WorkflowResult:
+        """
+        start_at 단계부터 실행합니다. on_step_done(단계 이름, context)은 단계가 성공하거나 건너뛰어질 때마다 호출됩니다.
+        """
+        should_stop = should_stop or current_token()
+        result = WorkflowResult(self.name, {} if context is None else context, self.step_index(start_at))
+        start = time.perf_counter()
+        with span(self.name, "workflow", start_at=self.steps[result.start_index].name):
+            for step in self.steps[result.start_index:]:
+                if should_stop():
+                    result.cancelled = True
+                    break
+                step_result = self._run_step(step, result.context, should_stop)
+                result.steps.append(step_result)
+                if step_result.status == STATUS_CANCELLED:
+                    result.cancelled = True
+                    break
+                if step_result.status == STATUS_FAILED:
+                    result.failed_step = step.name
+                    print(f"'{self.name}' 워크플로우의 '{step.name}' 단계가 {step_result.attempts}회 시도 후 실패했습니다.")
+                    break
+                if on_step_done:
+                    on_step_done(step.name, result.context)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def resume(self, result: WorkflowResult, should_stop: Optional[Callable[[], bool]] = None,
+               on_step_done: Optional[Callable[[str, Context], None]] = None) -> WorkflowResult:
+        """실패한 실행을 같은 context로 실패한 단계부터 다시 실행합니다. 성공한 결과는 그대로 반환합니다."""
+        if result.ok:
+            return result
+        # 중단된 실행은 마지막으로 시작한 단계부터 이어갑니다.
+        start_at = result.failed_step or (result.steps[-1].name if result.steps
+                                          else self.steps[result.start_index].name)
+        print(f"'{self.name}' 워크플로우를 '{start_at}' 단계부터 이어서 실행합니다.")
+        return self.run(result.context, start_at, should_stop, on_step_done)
+
+    @staticmethod
+    def _run_step(step: Step, context: Context, should_stop: Callable[[], bool]) -> StepResult:
+        result = StepResult(step.name, STATUS_FAILED)
+        start = time.perf_counter()
+        with span(step.name, "step") as current:
+            if step.done and step.done(context):
+                result.status = STATUS_SKIPPED
+            else:
+                for _ in range(step.retries + 1):
+                    if should_stop():
+                        result.status = STATUS_CANCELLED
+                        break
+                    result.attempts += 1
+                    if step.ready and not screen_utils.wait_until(lambda: step.ready(context), step.ready_timeout,
+                                                                   should_stop=should_stop):
+                        continue
+                    if step.action and step.action(context) is False:
+                        continue
+                    if step.done is None or screen_utils.wait_until(lambda: step.done(context), step.timeout,
+                                                                     should_stop=should_stop):
+                        result.status = STATUS_DONE
+                        break
+                if result.status == STATUS_FAILED and should_stop():
+                    result.status = STATUS_CANCELLED
+            if current:
+                current.args.update(status=result.status, attempts=result.attempts)
+        result.seconds = time.perf_counter() - start
+        return result